@@ -0,0 +1,185 @@
+"""
+ทดสอบการใช้ไฟล์ข้อมูลสินค้าพร้อมกันหลายโปรเซส (จำลองหลายเครื่องสแกน)
+
+แต่ละโปรเซสเพิ่มสินค้าของตัวเอง เพิ่มค่า stock ของสินค้าที่ใช้ร่วมกันทีละ 1
+และลบสินค้าเดิมที่ได้รับมอบหมาย / แก้ไขสินค้าของตัวเองด้วยตำแหน่งที่ค้นไว้ก่อนล็อก
+(โปรแกรมอื่นลบแถวก่อนหน้าได้ระหว่างนั้น: ตำแหน่งเลื่อน ต้องได้ conflict แล้วค้นใหม่)
+เมื่อจบ ตรวจว่าไม่มีการแก้ไขหายหรือผิดแถว: จำนวนสินค้า ค่า stock และสินค้าที่ถูกลบ
+ต้องตรงกับที่ทุกโปรเซสทำ
+
+วิธีใช้:
+    python benchmarks/concurrency_stress.py --processes 4 --ops 200
+    python benchmarks/concurrency_stress.py --no-transaction   # อ่าน-แก้ไขนอก transaction (เห็นค่าหาย)
+"""
+
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from modules.dataset_cache import save_dataset
+from modules.product_manager import ProductManager
+
+SHARED_BARCODE = "0000000000000"
+# ลองใหม่เมื่อแถวเลื่อนตำแหน่ง (conflict) ได้ไม่เกินจำนวนนี้
+MAX_RETRIES = 50
+
+
+def _filler_barcode(i: int) -> str:
+    return f"{8850000000000 + i}"
+
+
+def _by_barcode(manager: ProductManager, barcode: str, action) -> Tuple[bool, int]:
+    """
+    ค้นตำแหน่งสินค้านอกล็อก แล้วส่งให้ action(index) (แบบหน้าจอที่แสดงรายการไว้ก่อนกดแก้ไข)
+    ถ้าแถวเลื่อนเพราะโปรแกรมอื่นลบ จะได้ conflict: ดึงข้อมูลใหม่แล้วค้นอีกครั้ง
+
+    Returns:
+        (สำเร็จ, จำนวน conflict)
+    """
+    conflicts = 0
+    for _ in range(MAX_RETRIES):
+        positions = np.flatnonzero(manager.df['barcode'].astype(str).to_numpy() == barcode)
+        if len(positions) == 0:
+            return False, conflicts
+        success, _ = action(int(positions[0]))
+        if success:
+            return True, conflicts
+        conflicts += 1
+        manager.refresh()
+    return False, conflicts
+
+
+def _worker(data_file: str, worker_id: int, ops: int, use_transaction: bool, results) -> None:
+    manager = ProductManager(data_file)
+    manager.load_data()
+    latencies = []
+    failures = 0
+    conflicts = 0
+
+    for i in range(ops):
+        started = time.perf_counter()
+        if not use_transaction:
+            # ค่าที่อ่านไว้ก่อนบันทึกอย่างอื่น (แบบหน้าจอที่แสดงค่าเก่าอยู่)
+            stale_stock = int(manager.get_product_by_barcode(SHARED_BARCODE)['stock'])
+        own_barcode = f"w{worker_id:02d}-{i:06d}"
+        success, _ = manager.add_product({
+            'barcode': own_barcode, 'name': f"สินค้า {worker_id}-{i}",
+            'type': 'หมู', 'price': 100.0, 'stock': 0,
+        })
+        failures += not success
+
+        if use_transaction:
+            # อ่านค่าและแก้ไขภายใต้ล็อกเดียวกัน
+            with manager.transaction():
+                stock = int(manager.get_product_by_barcode(SHARED_BARCODE)['stock'])
+                success, _ = manager.update_product(0, {'stock': stock + 1})
+        else:
+            # ใช้ค่าที่อ่านไว้ก่อน: โปรแกรมอื่นอาจแก้ไขไปแล้วระหว่างนี้
+            success, _ = manager.update_product(0, {'stock': stale_stock + 1})
+        failures += not success
+
+        # ลบสินค้าเดิมที่ได้รับมอบหมาย และแก้ไขสินค้าของตัวเอง ด้วยตำแหน่งที่ค้นไว้ก่อนล็อก
+        success, retried = _by_barcode(manager, _filler_barcode(1 + worker_id * ops + i),
+                                       manager.delete_product)
+        failures += not success
+        conflicts += retried
+        success, retried = _by_barcode(manager, own_barcode,
+                                       lambda index: manager.update_product(index, {'stock': 1}))
+        failures += not success
+        conflicts += retried
+        latencies.append(time.perf_counter() - started)
+
+    results.put((worker_id, latencies, failures, conflicts))
+
+
+def run(processes: int, ops: int, rows: int, use_transaction: bool) -> bool:
+    """
+    รันการทดสอบแล้วพิมพ์ผล
+
+    Returns:
+        True ถ้าไม่มีการแก้ไขหาย
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = Path(tmp) / "uploaded_data.parquet"
+        save_dataset(pd.DataFrame({
+            'barcode': [SHARED_BARCODE] + [_filler_barcode(i) for i in range(1, rows)],
+            'name': [f"สินค้า {i}" for i in range(rows)],
+            'type': 'ไก่',
+            'price': 50.0,
+            'stock': 0,
+        }), data_file)
+
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        workers = [context.Process(target=_worker, args=(str(data_file), i, ops, use_transaction, results))
+                   for i in range(processes)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        collected = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        # ตรวจผลจากไฟล์ด้วยอินสแตนซ์ใหม่
+        checker = ProductManager(data_file)
+        checker.load_data()
+        barcodes = checker.df['barcode'].astype(str)
+        own = barcodes.str.startswith('w')
+        added = int(own.sum())
+        # สินค้าของแต่ละโปรเซสต้องมี stock 1 และสินค้าเดิมที่เหลือต้องไม่ถูกแก้ไข
+        wrong_rows = int((checker.df.loc[own, 'stock'] != 1).sum() +
+                         (checker.df.loc[~own & (barcodes != SHARED_BARCODE), 'stock'] != 0).sum())
+        remaining = set(barcodes[~own])
+        stock = int(checker.get_product_by_barcode(SHARED_BARCODE)['stock'])
+
+    latencies = sorted(latency for _, worker_latencies, _, _ in collected for latency in worker_latencies)
+    failures = sum(worker_failures for _, _, worker_failures, _ in collected)
+    conflicts = sum(worker_conflicts for _, _, _, worker_conflicts in collected)
+    expected = processes * ops
+    lost_rows = expected - added
+    lost_updates = expected - stock
+    # ลบผิดแถว: สินค้าที่ไม่ได้มอบหมายให้ลบแต่หายไป หรือที่มอบหมายแต่ยังอยู่
+    deleted = {_filler_barcode(i) for i in range(1, expected + 1)}
+    wrong_deletes = (len(deleted & remaining) +
+                     sum(_filler_barcode(i) not in remaining for i in range(expected + 1, rows)))
+
+    print("🔒 ทดสอบหลายโปรเซสพร้อมกัน")
+    print(f"├─ โปรเซส: {processes} | รอบต่อโปรเซส: {ops} | สินค้าเริ่มต้น: {rows:,} "
+          f"| transaction: {'ใช้' if use_transaction else 'ไม่ใช้'}")
+    print(f"├─ เวลา: {elapsed:.2f} วินาที ({4 * expected / elapsed:,.0f} การแก้ไข/วินาที)")
+    print(f"├─ เวลาต่อรอบ: p50 {latencies[len(latencies) // 2] * 1e3:.1f} ms | "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.1f} ms")
+    print(f"├─ แก้ไขไม่สำเร็จ: {failures} | แถวเลื่อน (ค้นใหม่แล้วลองอีกครั้ง): {conflicts}")
+    print(f"├─ สินค้าที่เพิ่ม: {added}/{expected} (หาย {lost_rows})")
+    print(f"├─ ลบ/แก้ไขผิดแถว: {wrong_deletes + wrong_rows}")
+    print(f"└─ stock สินค้าร่วม: {stock}/{expected} (หาย {lost_updates})")
+    return lost_rows == 0 and lost_updates == 0 and failures == 0 and wrong_deletes + wrong_rows == 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ทดสอบการแก้ไขไฟล์สินค้าพร้อมกันหลายโปรเซส")
+    parser.add_argument('--processes', type=int, default=4, help="จำนวนโปรเซส")
+    parser.add_argument('--ops', type=int, default=200, help="จำนวนรอบต่อโปรเซส")
+    parser.add_argument('--rows', type=int, default=10_000, help="จำนวนสินค้าเริ่มต้น")
+    parser.add_argument('--no-transaction', action='store_true',
+                        help="เพิ่ม stock โดยไม่ใช้ transaction (แสดงการแก้ไขที่หาย)")
+    args = parser.parse_args()
+    if args.rows <= args.processes * args.ops:
+        parser.error("--rows ต้องมากกว่า --processes x --ops (สินค้าเดิมที่มอบหมายให้ลบ)")
+
+    ok = run(args.processes, args.ops, args.rows, not args.no_transaction)
+    sys.exit(0 if ok or args.no_transaction else 1)
+
+
+if __name__ == '__main__':
+    main()
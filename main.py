@@ -3,16 +3,24 @@
 ระบบ: Windows
 """
 
+import time
+
+# เวลาเริ่มโปรแกรม (ก่อน import โมดูลอื่น) สำหรับวัดเวลาเปิดโปรแกรม
+_STARTED = time.perf_counter()
+
+import argparse
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 import pandas as pd
 import os
 from pathlib import Path
 
+from modules.cleaning_plan import CleaningPlan
 from modules.data_loader import DataLoader
 from modules.data_validator import DataValidator
 from modules.model_trainer import ModelTrainer
 from modules.product_manager import ProductManager
+from modules.warmup import BackgroundWarmup
 from modules.ui_components import (
     ModernButton, ModernEntry, ModernLabel, ModernTextBox,
     FileUploadFrame, TabFrame, show_info, show_error, show_warning, show_success
@@ -22,6 +30,13 @@ from modules.ui_components import (
 class MeatModelTrainerApp(ctk.CTk):
     """แอปพลิเคชันหลักสำหรับเทรนโมเดล"""
     
+    # ชื่อโหมดบันทึกไฟล์ข้อมูลที่แสดง -> โหมดของ DataLoader.save_data_file
+    INGEST_MODES = {
+        "แทนที่ข้อมูลเดิม": 'replace',
+        "ต่อท้ายข้อมูลเดิม": 'append',
+        "อัปเดตตามคีย์": 'upsert',
+    }
+    
     def __init__(self):
         super().__init__()
         
@@ -46,8 +61,8 @@ class MeatModelTrainerApp(ctk.CTk):
         
         # โมดูล
         self.data_loader = DataLoader(self.data_dir)
-        self.data_validator = DataValidator(f"{self.data_dir}/uploaded_data.csv")
-        self.product_manager = ProductManager(f"{self.data_dir}/uploaded_data.csv")
+        self.data_validator = DataValidator(self.data_loader.data_file)
+        self.product_manager = ProductManager(self.data_loader.data_file)
         self.model_trainer = None
         
         try:
@@ -57,6 +72,29 @@ class MeatModelTrainerApp(ctk.CTk):
         
         # สร้าง UI
         self.create_ui()
+        
+        # โหลด TensorFlow / scikit-learn / openpyxl เบื้องหลังหลังหน้าต่างแสดงแล้ว
+        self.warmup = BackgroundWarmup()
+        self._train_pending = False
+        self.after(200, self.start_warmup)
+    
+    def start_warmup(self):
+        """เริ่มโหลดไลบรารีเบื้องหลัง และติดตามสถานะ"""
+        self.warmup.start()
+        self.poll_warmup()
+    
+    def poll_warmup(self):
+        """อัปเดตตัวแสดงสถานะการโหลดไลบรารี"""
+        if not self.warmup.is_done():
+            self.ready_label.configure(text=f"⏳ กำลังโหลด {self.warmup.current or ''}...")
+            self.after(250, self.poll_warmup)
+            return
+        
+        if self.warmup.status == 'ready':
+            self.ready_label.configure(text="✅ พร้อมเทรนโมเดล", text_color="#4CAF50")
+        else:
+            missing = ", ".join(self.warmup.errors)
+            self.ready_label.configure(text=f"⚠️ โหลดไม่ได้: {missing}", text_color="#FF9800")
     
     def create_ui(self):
         """สร้าง User Interface"""
@@ -71,6 +109,11 @@ class MeatModelTrainerApp(ctk.CTk):
         )
         header_label.pack()
         
+        # สถานะการโหลดไลบรารีสำหรับเทรน
+        self.ready_label = ModernLabel(header_frame, text="⏳ กำลังเตรียมระบบเทรน...")
+        self.ready_label.configure(text_color="#888888")
+        self.ready_label.pack()
+        
         # Tabview
         self.tabview = ctk.CTkTabview(self, width=950, height=600)
         self.tabview.pack(fill="both", expand=True, padx=20, pady=(10, 20))
@@ -125,6 +168,22 @@ class MeatModelTrainerApp(ctk.CTk):
         )
         save_image_btn.pack(pady=(0, 10), padx=10)
         
+        # ปุ่มนำเข้าภาพทั้งโฟลเดอร์
+        import_images_btn = ModernButton(
+            image_section,
+            text="📂 นำเข้าภาพทั้งโฟลเดอร์",
+            command=self.import_image_folder
+        )
+        import_images_btn.pack(pady=(0, 10), padx=10)
+        
+        # ปุ่มสร้างแคชภาพสำหรับเทรน
+        image_cache_btn = ModernButton(
+            image_section,
+            text="🧊 สร้างแคชภาพสำหรับเทรน",
+            command=self.build_image_cache
+        )
+        image_cache_btn.pack(pady=(0, 10), padx=10)
+        
         # ===== Section: อัปโหลดข้อมูล =====
         data_section = ctk.CTkFrame(scroll_frame, fg_color="#1a1a1a", corner_radius=10)
         data_section.pack(fill="x", pady=10)
@@ -150,6 +209,19 @@ class MeatModelTrainerApp(ctk.CTk):
         self.data_label = ModernLabel(data_btn_frame, text="ยังไม่ได้เลือกไฟล์")
         self.data_label.pack(side="left", padx=10, anchor="w")
         
+        # โหมดการบันทึก (แทนที่ / ต่อท้าย / อัปเดตตามคีย์)
+        data_mode_frame = ctk.CTkFrame(data_section, fg_color="transparent")
+        data_mode_frame.pack(fill="x", padx=10, pady=5)
+        
+        self.data_mode_menu = ctk.CTkOptionMenu(
+            data_mode_frame,
+            values=list(self.INGEST_MODES.keys())
+        )
+        self.data_mode_menu.pack(side="left", padx=5)
+        
+        self.data_key_entry = ModernEntry(data_mode_frame, placeholder="คอลัมน์คีย์ เช่น: barcode")
+        self.data_key_entry.pack(side="left", padx=5, fill="x", expand=True)
+        
         # ปุ่มบันทึกไฟล์ข้อมูล
         save_data_btn = ModernButton(
             data_section,
@@ -158,6 +230,14 @@ class MeatModelTrainerApp(ctk.CTk):
         )
         save_data_btn.pack(pady=(0, 10), padx=10)
         
+        # ปุ่มส่งออก CSV
+        export_csv_btn = ModernButton(
+            data_section,
+            text="📤 ส่งออก CSV",
+            command=self.export_data_csv
+        )
+        export_csv_btn.pack(pady=(0, 10), padx=10)
+        
         # ===== Section: สถานะข้อมูล =====
         status_section = ctk.CTkFrame(scroll_frame, fg_color="#1a1a1a", corner_radius=10)
         status_section.pack(fill="both", expand=True, pady=10)
@@ -231,6 +311,46 @@ class MeatModelTrainerApp(ctk.CTk):
         )
         remove_dup_btn.pack(side="left", padx=5)
         
+        rules_btn = ModernButton(
+            button_frame,
+            text="📏 ตรวจตามกฎ",
+            command=self.check_rules
+        )
+        rules_btn.pack(side="left", padx=5)
+        
+        clean_all_btn = ModernButton(
+            button_frame,
+            text="🧽 ทำความสะอาดทั้งหมด",
+            command=self.clean_all
+        )
+        clean_all_btn.pack(side="left", padx=5)
+        
+        image_dup_btn = ModernButton(
+            button_frame,
+            text="🖼️ ตรวจภาพซ้ำ",
+            command=self.check_image_duplicates
+        )
+        image_dup_btn.pack(side="left", padx=5)
+        
+        outlier_btn = ModernButton(
+            button_frame,
+            text="📈 ค่าผิดปกติ",
+            command=self.check_outliers
+        )
+        outlier_btn.pack(side="left", padx=5)
+        
+        self.dup_key_entry = ModernEntry(button_frame, placeholder="คอลัมน์คีย์ เช่น: barcode (ว่าง = ทั้งแถว)")
+        self.dup_key_entry.pack(side="left", padx=5, fill="x", expand=True)
+        
+        # ตรวจสอบทีละ chunk สำหรับไฟล์ที่ใหญ่กว่าหน่วยความจำ
+        self.stream_check_var = ctk.BooleanVar(value=False)
+        stream_check = ctk.CTkCheckBox(
+            self.tab_validate,
+            text="ตรวจสอบทีละ chunk (ไฟล์ใหญ่กว่าหน่วยความจำ)",
+            variable=self.stream_check_var
+        )
+        stream_check.pack(padx=20, anchor="w")
+        
         # ผลการตรวจสอบ
         result_frame = ctk.CTkFrame(self.tab_validate)
         result_frame.pack(fill="both", expand=True, padx=20, pady=10)
@@ -325,7 +445,7 @@ class MeatModelTrainerApp(ctk.CTk):
     def select_data_file(self):
         """เลือกไฟล์ข้อมูล"""
         file_path = filedialog.askopenfilename(
-            filetypes=[("Data Files", "*.csv *.xlsx *.json"), ("All Files", "*.*")]
+            filetypes=[("Data Files", "*.csv *.xlsx *.xls *.json *.jsonl"), ("All Files", "*.*")]
         )
         
         if file_path:
@@ -359,6 +479,53 @@ class MeatModelTrainerApp(ctk.CTk):
         
         self.refresh_data_info()
     
+    def import_image_folder(self):
+        """นำเข้าไฟล์ภาพทั้งโฟลเดอร์"""
+        folder = filedialog.askdirectory()
+        
+        if not folder:
+            return
+        
+        success, message, _ = self.data_loader.import_images(
+            [folder],
+            progress_callback=self.on_image_import_progress
+        )
+        
+        if success:
+            show_success("สำเร็จ", message)
+        else:
+            show_error("เกิดข้อผิดพลาด", message)
+        
+        self.image_label.configure(text="ยังไม่ได้เลือกไฟล์")
+        self.refresh_data_info()
+    
+    def on_image_import_progress(self, stats):
+        """แสดงความคืบหน้าระหว่างนำเข้าไฟล์ภาพ"""
+        self.image_label.configure(
+            text=f"⏳ {stats['files']:,} ไฟล์ ({stats['files_per_sec']:,.0f} ไฟล์/วินาที)"
+        )
+        self.update_idletasks()
+    
+    def build_image_cache(self):
+        """decode ภาพใน catalog เป็นแคช shard สำหรับเทรน"""
+        success, message = self.data_loader.build_image_cache(
+            progress_callback=self.on_image_cache_progress
+        )
+        
+        if success:
+            show_success("สำเร็จ", message)
+        else:
+            show_error("เกิดข้อผิดพลาด", message)
+        
+        self.image_label.configure(text="ยังไม่ได้เลือกไฟล์")
+    
+    def on_image_cache_progress(self, stats):
+        """แสดงความคืบหน้าระหว่างสร้างแคชภาพ"""
+        self.image_label.configure(
+            text=f"⏳ {stats['added'] + stats['failed']:,} / {stats['pending']:,} ภาพ"
+        )
+        self.update_idletasks()
+    
     def save_data(self):
         """บันทึกไฟล์ข้อมูล"""
         if not hasattr(self, 'selected_data_path'):
@@ -366,7 +533,18 @@ class MeatModelTrainerApp(ctk.CTk):
             return
         
         file_path = self.selected_data_path
-        success, message = self.data_loader.save_data_file(file_path)
+        mode = self.INGEST_MODES[self.data_mode_menu.get()]
+        key_column = self.data_key_entry.get().strip() or None
+        if mode == 'upsert' and key_column is None:
+            show_warning("ข้อผิดพลาด", "กรุณาระบุคอลัมน์คีย์สำหรับการอัปเดตตามคีย์")
+            return
+        
+        success, message = self.data_loader.save_data_file(
+            file_path,
+            progress_callback=self.on_ingest_progress,
+            mode=mode,
+            key_column=key_column
+        )
         
         if success:
             show_success("สำเร็จ", message)
@@ -377,11 +555,37 @@ class MeatModelTrainerApp(ctk.CTk):
         
         self.refresh_data_info()
     
+    def on_ingest_progress(self, stats):
+        """แสดงความคืบหน้าระหว่างนำเข้าไฟล์ข้อมูล"""
+        percent = 100 * stats['bytes_read'] / stats['total_bytes'] if stats['total_bytes'] else 100
+        self.data_label.configure(
+            text=f"⏳ {percent:.0f}% - {stats['rows']:,} แถว ({stats['rows_per_sec']:,.0f} แถว/วินาที)"
+        )
+        self.update_idletasks()
+    
+    def export_data_csv(self):
+        """ส่งออกไฟล์ข้อมูลเป็น CSV"""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            initialfile="uploaded_data.csv",
+            filetypes=[("CSV Files", "*.csv")]
+        )
+        
+        if not file_path:
+            return
+        
+        success, message = self.data_loader.export_data_csv(file_path)
+        
+        if success:
+            show_success("สำเร็จ", message)
+        else:
+            show_error("เกิดข้อผิดพลาด", message)
+    
     def refresh_data_info(self):
         """รีเฟรชข้อมูล"""
         # จำนวนภาพ
-        images = self.data_loader.get_image_list()
-        self.image_count_label.configure(text=f"{len(images)} ไฟล์" if images else "0 ไฟล์")
+        image_count = self.data_loader.count_images()
+        self.image_count_label.configure(text=f"{image_count} ไฟล์")
         
         # จำนวนข้อมูล
         rows, cols = self.data_loader.get_data_info()
@@ -394,14 +598,83 @@ class MeatModelTrainerApp(ctk.CTk):
         """ตรวจสอบข้อมูล"""
         self.validate_text.delete("1.0", "end")
         
-        success, message = self.data_validator.load_data()
+        if self.stream_check_var.get():
+            success, message = self.data_validator.validate_streaming(
+                progress_callback=self.on_validate_progress
+            )
+            self.validate_text.delete("1.0", "end")
+            self.validate_text.insert("end", message if success else f"❌ {message}")
+            return
         
-        if not success:
-            self.validate_text.insert("end", f"❌ {message}")
+        success, message = self.data_validator.check_data()
+        self.validate_text.insert("end", message if success else f"❌ {message}")
+    
+    def check_rules(self):
+        """ตรวจข้อมูลตามกฎใน data/validation_rules.json"""
+        self.validate_text.delete("1.0", "end")
+        
+        success, message, _ = self.data_validator.validate_rules()
+        
+        self.validate_text.insert("end", message if success else f"❌ {message}")
+    
+    def check_outliers(self):
+        """ตรวจค่าผิดปกติ (IQR) แล้วเลือกจำกัดค่าหรือลบแถว"""
+        self.validate_text.delete("1.0", "end")
+        
+        streaming = self.stream_check_var.get()
+        if not streaming:
+            success, message = self.data_validator.load_data()
+            if not success:
+                self.validate_text.insert("end", f"❌ {message}")
+                return
+        
+        success, message, results = self.data_validator.check_outliers(streaming=streaming)
+        self.validate_text.insert("end", message if success else f"❌ {message}")
+        
+        flagged = [col for col, result in (results or {}).items() if result['outliers']]
+        if not success or not flagged:
             return
         
-        summary = self.data_validator.get_summary()
-        self.validate_text.insert("end", summary)
+        answer = messagebox.askyesnocancel(
+            "ค่าผิดปกติ",
+            f"{message}\n\nใช่ = จำกัดค่าให้อยู่ในช่วงปกติ, ไม่ = ลบแถวที่มีค่าผิดปกติ"
+        )
+        if answer is None:
+            return
+        
+        if streaming:
+            success, message = self.data_validator.load_data()
+            if not success:
+                show_error("เกิดข้อผิดพลาด", message)
+                return
+        
+        plan = CleaningPlan()
+        for col in flagged:
+            plan.outliers(col, action='clip' if answer else 'remove')
+        success, message = self.data_validator.apply_plan(plan)
+        
+        if success:
+            show_success("สำเร็จ", message)
+            self.check_data()
+        else:
+            show_error("เกิดข้อผิดพลาด", message)
+    
+    def check_image_duplicates(self):
+        """หาภาพที่เกือบซ้ำกันด้วย perceptual hash"""
+        self.validate_text.delete("1.0", "end")
+        
+        success, message, _ = self.data_loader.find_near_duplicate_images()
+        
+        self.validate_text.insert("end", message if success else f"❌ {message}")
+    
+    def on_validate_progress(self, stats):
+        """แสดงความคืบหน้าระหว่างตรวจสอบทีละ chunk"""
+        self.validate_text.delete("1.0", "end")
+        self.validate_text.insert(
+            "end",
+            f"⏳ {stats['rows']:,} แถว / {stats['chunks']} chunk ({stats['chunks_per_sec']:,.1f} chunk/วินาที)"
+        )
+        self.update_idletasks()
     
     def remove_missing(self):
         """ลบค่าว่าง"""
@@ -427,7 +700,37 @@ class MeatModelTrainerApp(ctk.CTk):
             show_error("เกิดข้อผิดพลาด", message)
             return
         
-        success, message = self.data_validator.remove_duplicates()
+        subset = [col.strip() for col in self.dup_key_entry.get().split(",") if col.strip()]
+        success, message = self.data_validator.remove_duplicates(subset or None)
+        
+        if success:
+            show_success("สำเร็จ", message)
+            self.check_data()
+        else:
+            show_error("เกิดข้อผิดพลาด", message)
+    
+    def clean_all(self):
+        """ลบค่าว่างและแถวซ้ำในรอบเดียว (แสดงผลประเมินก่อนยืนยัน)"""
+        success, message = self.data_validator.load_data()
+        
+        if not success:
+            show_error("เกิดข้อผิดพลาด", message)
+            return
+        
+        subset = [col.strip() for col in self.dup_key_entry.get().split(",") if col.strip()]
+        plan = CleaningPlan().dropna().dedupe(subset or None)
+        
+        success, estimate = self.data_validator.apply_plan(plan, dry_run=True)
+        if not success:
+            show_error("เกิดข้อผิดพลาด", estimate)
+            return
+        
+        self.validate_text.delete("1.0", "end")
+        self.validate_text.insert("end", estimate)
+        if not messagebox.askyesno("ยืนยัน", f"{estimate}\n\nดำเนินการต่อหรือไม่?"):
+            return
+        
+        success, message = self.data_validator.apply_plan(plan)
         
         if success:
             show_success("สำเร็จ", message)
@@ -437,6 +740,15 @@ class MeatModelTrainerApp(ctk.CTk):
     
     # ============ Train Tab Methods ============
     
+    def poll_train_warmup(self):
+        """รอไลบรารีโหลดเสร็จโดยไม่บล็อกหน้าต่าง แล้วเริ่มเทรนที่ผู้ใช้สั่งไว้"""
+        if not self.warmup.is_done():
+            self.after(250, self.poll_train_warmup)
+            return
+        
+        self._train_pending = False
+        self.train_model()
+    
     def train_model(self):
         """เทรนโมเดล"""
         
@@ -444,6 +756,16 @@ class MeatModelTrainerApp(ctk.CTk):
             show_error("เกิดข้อผิดพลาด", "TensorFlow ยังไม่ได้ติดตั้ง")
             return
         
+        if not self.warmup.is_done():
+            # ไม่รอบน main thread: ตรวจซ้ำด้วย after แล้วเริ่มเทรนเมื่อโหลดเสร็จ
+            if not self._train_pending:
+                self._train_pending = True
+                self.train_text.delete("1.0", "end")
+                self.train_text.insert("end", "⏳ กำลังโหลด TensorFlow...\n")
+                self.warmup.start()
+                self.after(250, self.poll_train_warmup)
+            return
+        
         self.train_text.delete("1.0", "end")
         self.train_text.insert("end", "⏳ กำลังเตรียมข้อมูล...\n")
         self.update()
@@ -525,9 +847,38 @@ class MeatModelTrainerApp(ctk.CTk):
             show_error("เกิดข้อผิดพลาด", message)
 
 
+    # ============ วัดเวลาเปิดโปรแกรม ============
+    
+    def report_startup_time(self):
+        """พิมพ์เวลาที่หน้าต่างพร้อมใช้และเวลาโหลดไลบรารีเบื้องหลัง แล้วปิดโปรแกรม"""
+        window_seconds = time.perf_counter() - _STARTED
+        
+        def finish():
+            if not self.warmup.is_done():
+                self.after(100, finish)
+                return
+            print(f"startup.window_ready: {window_seconds:.3f}s")
+            print(f"startup.warmup_ready: {time.perf_counter() - _STARTED:.3f}s")
+            for name, seconds in self.warmup.timings.items():
+                status = "failed" if name in self.warmup.errors else "ok"
+                print(f"startup.import.{name}: {seconds:.3f}s ({status})")
+            self.destroy()
+        
+        finish()
+
+
 def main():
     """ฟังก์ชันหลัก"""
+    parser = argparse.ArgumentParser(description="Meat Model Trainer")
+    parser.add_argument(
+        "--startup-time", action="store_true",
+        help="วัดเวลาเปิดโปรแกรม (หน้าต่างพร้อมใช้ / โหลดไลบรารีเสร็จ) แล้วปิดอัตโนมัติ"
+    )
+    args = parser.parse_args()
+    
     app = MeatModelTrainerApp()
+    if args.startup_time:
+        app.after_idle(app.report_startup_time)
     app.mainloop()
 
 
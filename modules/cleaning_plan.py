@@ -0,0 +1,237 @@
+"""
+โมดูลสำหรับแผนทำความสะอาดข้อมูล: รวมหลายขั้นตอน (ลบค่าว่าง ลบแถวซ้ำ จำกัดช่วง ค่าผิดปกติ เติมค่า แปลงประเภท)
+แล้วทำในรอบเดียว อ่านหนึ่งครั้ง เขียนหนึ่งครั้ง
+"""
+
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from modules.outlier_detector import outlier_bounds
+from modules.row_hash_index import hash_rows
+
+
+class CleaningPlan:
+    """
+    แผนทำความสะอาดข้อมูลที่เรียงขั้นตอนไว้ก่อนแล้วทำพร้อมกัน
+
+    ตัวอย่าง:
+        plan = CleaningPlan().fill('grade', 'C').dropna().dedupe(['barcode']).clip('price', lower=0)
+        report = plan.dry_run(df)
+        cleaned, report = plan.apply(df)
+    """
+
+    def __init__(self):
+        self.steps: List[Dict] = []
+
+    # ============ เพิ่มขั้นตอน ============
+
+    def dropna(self, columns: Optional[List[str]] = None) -> "CleaningPlan":
+        """ลบแถวที่มีค่าว่าง (เฉพาะคอลัมน์ที่ระบุ หรือทุกคอลัมน์)"""
+        self.steps.append({'op': 'dropna', 'columns': list(columns) if columns else None})
+        return self
+
+    def dedupe(self, subset: Optional[List[str]] = None) -> "CleaningPlan":
+        """ลบแถวซ้ำ เก็บแถวแรก (ตรวจเฉพาะคอลัมน์ที่ระบุ หรือทั้งแถว)"""
+        self.steps.append({'op': 'dedupe', 'columns': list(subset) if subset else None})
+        return self
+
+    def clip(self, column: str, lower: Optional[float] = None,
+             upper: Optional[float] = None) -> "CleaningPlan":
+        """จำกัดค่าของคอลัมน์ให้อยู่ในช่วง [lower, upper]"""
+        self.steps.append({'op': 'clip', 'column': column, 'lower': lower, 'upper': upper})
+        return self
+
+    def outliers(self, column: str, method: str = 'iqr', threshold: Optional[float] = None,
+                 action: str = 'clip') -> "CleaningPlan":
+        """
+        จัดการค่าผิดปกติ (z-score / IQR / MAD) ของคอลัมน์ตัวเลข
+        ช่วงค่าปกติคำนวณจากแถวที่เหลือหลังขั้นตอนก่อนหน้า
+
+        Args:
+            column: ชื่อคอลัมน์
+            method: zscore / iqr / mad
+            threshold: จำนวนเท่าของส่วนเบี่ยงเบน (None = ค่าเริ่มต้นของวิธี)
+            action: clip = จำกัดค่าให้อยู่ในช่วง, remove = ลบแถว
+        """
+        if action not in ('clip', 'remove'):
+            raise ValueError(f"action ไม่รองรับ: {action} (ต้องเป็น clip หรือ remove)")
+        self.steps.append({'op': 'outliers', 'column': column, 'method': method,
+                           'threshold': threshold, 'action': action})
+        return self
+
+    def fill(self, column: str, value) -> "CleaningPlan":
+        """เติมค่าว่างของคอลัมน์ด้วยค่าที่กำหนด"""
+        self.steps.append({'op': 'fill', 'column': column, 'value': value})
+        return self
+
+    def cast(self, column: str, dtype: str) -> "CleaningPlan":
+        """แปลงประเภทข้อมูลของคอลัมน์ (ตัวเลขที่แปลงไม่ได้จะกลายเป็นค่าว่าง)"""
+        self.steps.append({'op': 'cast', 'column': column, 'dtype': dtype})
+        return self
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def describe(self) -> List[str]:
+        """คำอธิบายแต่ละขั้นตอน"""
+        descriptions = []
+        for step in self.steps:
+            op = step['op']
+            if op == 'dropna':
+                descriptions.append(f"ลบค่าว่าง ({', '.join(step['columns']) if step['columns'] else 'ทุกคอลัมน์'})")
+            elif op == 'dedupe':
+                descriptions.append(f"ลบแถวซ้ำ ({', '.join(step['columns']) if step['columns'] else 'ทั้งแถว'})")
+            elif op == 'clip':
+                descriptions.append(f"จำกัดช่วง {step['column']} [{step['lower']}, {step['upper']}]")
+            elif op == 'outliers':
+                action = "ลบแถว" if step['action'] == 'remove' else "จำกัดค่า"
+                descriptions.append(f"ค่าผิดปกติ {step['column']} ({step['method']}): {action}")
+            elif op == 'fill':
+                descriptions.append(f"เติมค่าว่าง {step['column']} = {step['value']}")
+            else:
+                descriptions.append(f"แปลง {step['column']} เป็น {step['dtype']}")
+        return descriptions
+
+    # ============ ทำงาน ============
+
+    def _run(self, df: pd.DataFrame) -> Tuple[Dict, np.ndarray, List[Dict]]:
+        """
+        คำนวณผลของทุกขั้นตอนโดยไม่สร้าง DataFrame ระหว่างทาง
+        คอลัมน์ที่ถูกแก้ไขเก็บแยกไว้ และแถวที่ถูกลบเก็บเป็น mask เดียว
+
+        Returns:
+            (คอลัมน์ที่แก้ไข, mask แถวที่เหลือ, ผลของแต่ละขั้นตอน)
+        """
+        changed: Dict[str, pd.Series] = {}
+        keep = np.ones(len(df), dtype=bool)
+        results = []
+
+        def column(name: str) -> pd.Series:
+            if name not in df.columns:
+                raise ValueError(f"ไม่พบคอลัมน์: {name}")
+            return changed.get(name, df[name])
+
+        for step, description in zip(self.steps, self.describe()):
+            op = step['op']
+            affected = 0
+
+            if op in ('dropna', 'dedupe'):
+                names = step['columns'] or list(df.columns)
+                current = pd.DataFrame({name: column(name) for name in names})
+                if op == 'dropna':
+                    drop = current.isna().any(axis=1).to_numpy() & keep
+                else:
+                    # เทียบเฉพาะแถวที่ยังเหลือ: hash ซ้ำเป็นเพียงแถวที่อาจซ้ำ
+                    # แล้วยืนยันด้วยการเทียบค่าจริงเฉพาะแถวเหล่านั้น
+                    positions = np.flatnonzero(keep)
+                    hashes = hash_rows(current.iloc[positions])
+                    positions = positions[pd.Series(hashes).duplicated(keep=False).to_numpy()]
+                    duplicated = current.iloc[positions].duplicated().to_numpy()
+                    drop = np.zeros(len(df), dtype=bool)
+                    drop[positions[duplicated]] = True
+                affected = int(drop.sum())
+                keep &= ~drop
+
+            elif op == 'clip':
+                series = column(step['column'])
+                clipped = series.clip(lower=step['lower'], upper=step['upper'])
+                affected = int((series.ne(clipped) & series.notna()).to_numpy()[keep].sum())
+                changed[step['column']] = clipped
+
+            elif op == 'outliers':
+                series = column(step['column'])
+                values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+                bounds = outlier_bounds(values[keep], step['method'], step['threshold'])
+                if bounds is not None:
+                    with np.errstate(invalid='ignore'):
+                        outside = ((values < bounds[0]) | (values > bounds[1])) & keep
+                    affected = int(outside.sum())
+                    if step['action'] == 'remove':
+                        keep &= ~outside
+                    elif affected:
+                        changed[step['column']] = series.clip(lower=bounds[0], upper=bounds[1])
+
+            elif op == 'fill':
+                series = column(step['column'])
+                if isinstance(series.dtype, pd.CategoricalDtype) and step['value'] not in series.cat.categories:
+                    series = series.cat.add_categories([step['value']])
+                affected = int(series.isna().to_numpy()[keep].sum())
+                changed[step['column']] = series.fillna(step['value'])
+
+            else:
+                series = column(step['column'])
+                dtype = step['dtype']
+                if dtype in ('int', 'float') or dtype.startswith(('int', 'float', 'uint')):
+                    converted = pd.to_numeric(series, errors='coerce')
+                    # ค่าที่แปลงไม่ได้ (ไม่ใช่ค่าว่างเดิม)
+                    affected = int((converted.isna() & series.notna()).to_numpy()[keep].sum())
+                    if converted.isna().any() and not dtype.startswith('float'):
+                        dtype = 'Int64'
+                    converted = converted.astype(dtype)
+                else:
+                    converted = series.astype(dtype)
+                changed[step['column']] = converted
+
+            removes_rows = op in ('dropna', 'dedupe') or (op == 'outliers' and step['action'] == 'remove')
+            results.append({'step': description, 'op': op, 'affected': affected, 'rows': removes_rows})
+
+        return changed, keep, results
+
+    def dry_run(self, df: pd.DataFrame) -> Dict:
+        """
+        ประเมินผลกระทบโดยไม่แก้ไขข้อมูล
+
+        Returns:
+            dict (rows_before, rows_after, rows_removed, steps: ผลของแต่ละขั้นตอน)
+        """
+        _, keep, results = self._run(df)
+        rows_after = int(keep.sum())
+        return {
+            'rows_before': len(df),
+            'rows_after': rows_after,
+            'rows_removed': len(df) - rows_after,
+            'steps': results,
+        }
+
+    def apply(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+        """
+        ทำทุกขั้นตอนและสร้าง DataFrame ผลลัพธ์ครั้งเดียว
+
+        Returns:
+            (DataFrame ใหม่, รายงานแบบเดียวกับ dry_run)
+        """
+        changed, keep, results = self._run(df)
+        if changed:
+            df = df.copy(deep=False)
+            for name, series in changed.items():
+                df[name] = series
+        cleaned = df[keep].reset_index(drop=True) if not keep.all() else df.reset_index(drop=True)
+
+        report = {
+            'rows_before': len(keep),
+            'rows_after': len(cleaned),
+            'rows_removed': len(keep) - len(cleaned),
+            'steps': results,
+        }
+        return cleaned, report
+
+
+def format_report(report: Dict, dry_run: bool = False) -> str:
+    """
+    สร้างข้อความสรุปผลของแผนทำความสะอาด
+
+    Args:
+        report: ผลจาก dry_run หรือ apply
+        dry_run: เป็นการประเมิน (ยังไม่แก้ไขข้อมูล)
+
+    Returns:
+        ข้อความสรุป
+    """
+    title = "🔍 ประเมินผลการทำความสะอาด" if dry_run else "🧽 ผลการทำความสะอาด"
+    text = f"{title}:\n"
+    for result in report['steps']:
+        unit = "แถว" if result['rows'] else "ค่า"
+        text += f"├─ {result['step']}: {result['affected']} {unit}\n"
+    text += f"└─ แถว: {report['rows_before']} → {report['rows_after']} (ลบ {report['rows_removed']})"
+    return text
@@ -0,0 +1,624 @@
+"""
+โมดูลสำหรับนำเข้าไฟล์ข้อมูลขนาดใหญ่แบบ streaming (อ่าน/แปลง/เขียนทีละ chunk)
+"""
+
+import io
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from modules.data_store import (
+    PARQUET_AVAILABLE, is_parquet, read_table, write_table, write_meta, read_meta,
+    describe_frame, read_manifest, add_segment, remove_segments, remove_journal, deltas_dir
+)
+from modules.file_lock import dataset_lock
+from modules.row_hash_index import RowHashIndex, hash_rows
+
+if PARQUET_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+
+SUPPORTED_EXTENSIONS = {'.csv', '.json', '.jsonl', '.ndjson', '.xlsx', '.xls'}
+# replace: แทนที่ข้อมูลเดิม, append: ต่อท้าย, upsert: แทนที่แถวที่คีย์ตรงกันและเพิ่มแถวใหม่
+INGEST_MODES = ('replace', 'append', 'upsert')
+
+# จำนวนแถวที่อ่านก่อนเพื่อประมาณขนาดต่อแถว
+SAMPLE_ROWS = 1_000
+# DataFrame ใช้หน่วยความจำมากกว่าข้อมูลดิบหลายเท่าระหว่างแปลงเป็น Arrow
+MEMORY_OVERHEAD = 3
+
+
+def _is_json_lines(source: Path) -> bool:
+    """ตรวจสอบว่าไฟล์ .json เป็นแบบ JSON Lines (หนึ่งอ็อบเจกต์ต่อบรรทัด) หรือไม่"""
+    if source.suffix.lower() in ('.jsonl', '.ndjson'):
+        return True
+
+    with open(source, 'r', encoding='utf-8') as f:
+        first_line = f.readline().strip()
+        second_line = f.readline().strip()
+
+    if not first_line.startswith('{') or not second_line:
+        return False
+
+    try:
+        json.loads(first_line)
+    except ValueError:
+        return False
+    return True
+
+
+class _ChunkReader:
+    """ตัวอ่านไฟล์ต้นฉบับที่ขอจำนวนแถวต่อ chunk ได้ทุกครั้ง"""
+
+    def __init__(self, source: Path):
+        self.source = source
+        self.total_bytes = source.stat().st_size
+        self._file = None
+        self._next = None
+
+        suffix = source.suffix.lower()
+        if suffix == '.csv':
+            self._file = open(source, 'rb')
+            reader = pd.read_csv(self._file, iterator=True)
+            self._next = reader.get_chunk
+        elif suffix in ('.json', '.jsonl', '.ndjson') and _is_json_lines(source):
+            self._file = open(source, 'r', encoding='utf-8')
+            self._next = self._next_json_lines
+        elif suffix == '.xlsx':
+            self._next = self._excel_reader()
+        elif suffix in ('.json', '.xls'):
+            # รูปแบบที่อ่านแบบ streaming ไม่ได้: อ่านทั้งไฟล์แล้วแบ่งส่ง
+            df = pd.read_json(source) if suffix == '.json' else pd.read_excel(source)
+            self._next = self._frame_slicer(df)
+        else:
+            raise ValueError(f"นามสกุลไม่รองรับ: {source.suffix}")
+
+    def read(self, rows: int) -> Optional[pd.DataFrame]:
+        """อ่าน chunk ถัดไป (None เมื่ออ่านครบ)"""
+        try:
+            chunk = self._next(rows)
+        except StopIteration:
+            return None
+        if chunk is None or len(chunk) == 0:
+            return None
+        return chunk
+
+    def bytes_read(self) -> int:
+        """จำนวนไบต์ที่อ่านแล้ว (โดยประมาณ)"""
+        if self._file is None or self._file.closed:
+            return self.total_bytes
+        try:
+            return min(self._file.tell(), self.total_bytes)
+        except (OSError, ValueError):
+            return self.total_bytes
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    def _next_json_lines(self, rows: int) -> Optional[pd.DataFrame]:
+        lines = [line for line in itertools.islice(self._file, rows) if line.strip()]
+        if not lines:
+            return None
+        return pd.read_json(io.StringIO(''.join(lines)), lines=True)
+
+    def _excel_reader(self) -> Callable[[int], Optional[pd.DataFrame]]:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.source, read_only=True, data_only=True)
+        rows_iter = workbook.active.iter_rows(values_only=True)
+        header = next(rows_iter, None)
+        if header is None:
+            workbook.close()
+            return lambda rows: None
+        columns = [str(name) if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+
+        def next_chunk(rows: int) -> Optional[pd.DataFrame]:
+            records = list(itertools.islice(rows_iter, rows))
+            if not records:
+                workbook.close()
+                return None
+            return pd.DataFrame.from_records(records, columns=columns)
+
+        return next_chunk
+
+    @staticmethod
+    def _frame_slicer(df: pd.DataFrame) -> Callable[[int], Optional[pd.DataFrame]]:
+        position = [0]
+
+        def next_chunk(rows: int) -> Optional[pd.DataFrame]:
+            start = position[0]
+            position[0] += rows
+            return df.iloc[start:start + rows]
+
+        return next_chunk
+
+
+def _widen_type(current: "pa.DataType", incoming: "pa.DataType") -> "pa.DataType":
+    """ประเภทข้อมูลที่รับได้ทั้งสองแบบ (ว่าง -> จำนวนเต็ม -> ทศนิยม -> ข้อความ)"""
+    if current.equals(incoming) or pa.types.is_null(incoming):
+        return current
+    if pa.types.is_null(current):
+        return incoming
+    if pa.types.is_integer(current) and pa.types.is_integer(incoming):
+        return pa.int64()
+    if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in (current, incoming)):
+        return pa.float64()
+    return pa.string()
+
+
+def _conform(table: "pa.Table", schema: "pa.Schema") -> "pa.Table":
+    """จัดคอลัมน์ของ table ตาม schema (คอลัมน์ที่ไม่มีเติมค่าว่าง)"""
+    names = set(table.column_names)
+    arrays = [table[field.name].cast(field.type) if field.name in names else pa.nulls(len(table), field.type)
+              for field in schema]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+class _ParquetChunkWriter:
+    """
+    เขียน chunk ลง Parquet ทีละ row group
+    ถ้า chunk หลังมีประเภทข้อมูลกว้างกว่าเดิม (เช่น คอลัมน์ว่างใน chunk แรกแต่มีข้อความภายหลัง
+    หรือบาร์โค้ดตัวเลขตามด้วยบาร์โค้ดที่มีตัวอักษร) จะขยาย schema แล้วเขียนส่วนที่เขียนไปแล้วใหม่
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._writer = None
+        # ไฟล์ที่กำลังเขียน (สลับชื่อเมื่อเขียนใหม่ด้วย schema ที่ขยาย)
+        self._current = path
+        self.rewrites = 0
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        table = pa.Table.from_pandas(chunk, preserve_index=False).replace_schema_metadata(None)
+        if self._writer is None:
+            # คอลัมน์ที่ว่างทั้งหมดใน chunk แรกให้เป็นข้อความ
+            schema = pa.schema([
+                field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                for field in table.schema
+            ])
+            self._writer = pq.ParquetWriter(self._current, schema)
+
+        schema = self._merged_schema(table.schema)
+        if not schema.equals(self._writer.schema):
+            self._rewrite(schema)
+        try:
+            table = _conform(table, schema)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            raise ValueError(f"โครงสร้างข้อมูลไม่ตรงกันระหว่าง chunk: {str(e)}")
+        self._writer.write_table(table)
+
+    def _merged_schema(self, incoming: "pa.Schema") -> "pa.Schema":
+        current = self._writer.schema
+        fields = []
+        for field in current:
+            index = incoming.get_field_index(field.name)
+            fields.append(field if index < 0 else field.with_type(_widen_type(field.type, incoming.field(index).type)))
+        fields.extend(field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                      for field in incoming if current.get_field_index(field.name) < 0)
+        return pa.schema(fields)
+
+    def _rewrite(self, schema: "pa.Schema") -> None:
+        """เขียนแถวที่เขียนไปแล้วใหม่ด้วย schema ที่ขยาย (ทีละ row group)"""
+        self._writer.close()
+        previous = self._current
+        self._current = self.path.with_name(self.path.name + (".widen" if previous == self.path else ""))
+        if self._current == previous:
+            self._current = self.path
+        self._writer = pq.ParquetWriter(self._current, schema)
+        source = pq.ParquetFile(previous)
+        for group in range(source.num_row_groups):
+            self._writer.write_table(_conform(source.read_row_group(group), schema))
+        source.close()
+        previous.unlink()
+        self.rewrites += 1
+
+    def dtypes(self) -> Dict[str, str]:
+        if self._writer is None:
+            return {}
+        empty = self._writer.schema.empty_table().to_pandas()
+        return {str(col): str(dtype) for col, dtype in empty.dtypes.items()}
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            if self._current != self.path:
+                os.replace(self._current, self.path)
+                self._current = self.path
+
+
+class _CsvChunkWriter:
+    """เขียน chunk ลงไฟล์ CSV (เขียนใหม่ หรือต่อท้ายไฟล์เดิม)"""
+
+    def __init__(self, path: Path, append_columns: Optional[List[str]] = None):
+        self.path = path
+        self._appending = append_columns is not None
+        self._start_size = path.stat().st_size if self._appending else 0
+        self._file = open(path, 'a' if self._appending else 'w', newline='', encoding='utf-8')
+        self._columns = list(append_columns) if self._appending else None
+        self._dtypes = {}
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        if not self._dtypes:
+            self._dtypes = {str(col): str(dtype) for col, dtype in chunk.dtypes.items()}
+        if self._columns is None:
+            self._columns = list(chunk.columns)
+            chunk.to_csv(self._file, index=False)
+        else:
+            chunk.reindex(columns=self._columns).to_csv(self._file, index=False, header=False)
+
+    def dtypes(self) -> Dict[str, str]:
+        return self._dtypes
+
+    def close(self) -> None:
+        self._file.close()
+
+    def rollback(self) -> None:
+        """ยกเลิกสิ่งที่เขียนไป (ตัดไฟล์กลับเป็นขนาดเดิมถ้าเป็นการต่อท้าย)"""
+        self._file.close()
+        if self._appending:
+            with open(self.path, 'r+b') as f:
+                f.truncate(self._start_size)
+        elif self.path.exists():
+            self.path.unlink()
+
+
+def _update_rate(stats: Dict, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    stats['seconds'] = elapsed
+    stats['rows_per_sec'] = stats['rows'] / elapsed if elapsed > 0 else 0.0
+
+
+def _read_chunks(reader: _ChunkReader, memory_limit_mb: int, stats: Dict, started: float,
+                 progress_callback: Optional[Callable[[Dict], None]]):
+    """อ่านไฟล์ต้นฉบับทีละ chunk โดยปรับขนาด chunk ตามเพดานหน่วยความจำ"""
+    budget_bytes = memory_limit_mb * 1024 * 1024
+    chunk_rows = SAMPLE_ROWS
+    first = True
+    while True:
+        chunk = reader.read(chunk_rows)
+        if chunk is None:
+            return
+
+        if first:
+            first = False
+            # ปรับขนาด chunk ตามขนาดต่อแถวของตัวอย่างแรก
+            row_bytes = max(1, chunk.memory_usage(deep=True).sum() // max(1, len(chunk)))
+            chunk_rows = max(SAMPLE_ROWS, int(budget_bytes // (row_bytes * MEMORY_OVERHEAD)))
+            stats['chunk_rows'] = chunk_rows
+
+        yield chunk
+
+        stats['rows'] += len(chunk)
+        stats['chunks'] += 1
+        stats['bytes_read'] = reader.bytes_read()
+        _update_rate(stats, started)
+        if progress_callback is not None:
+            progress_callback(dict(stats))
+
+
+def _current_state(target: Path, key: Optional[str] = None) -> Tuple[Dict, RowHashIndex, Optional[RowHashIndex]]:
+    """
+    โหลด metadata และ index ของข้อมูลปัจจุบัน
+    ถ้ายังไม่มี (หรือไม่ตรงกับข้อมูล) จะอ่านข้อมูลทั้งหมดหนึ่งครั้งเพื่อสร้างใหม่
+    """
+    meta = read_meta(target)
+    df = None
+    if meta is None:
+        df = read_table(target)
+        meta = write_meta(target, **describe_frame(df))
+
+    row_index = RowHashIndex(target)
+    key_index = RowHashIndex(target, [key]) if key else None
+    missing = [index for index in (row_index, key_index)
+               if index is not None and not index.load(meta['version'])]
+    if missing:
+        if df is None:
+            df = read_table(target)
+        for index in missing:
+            index.build(df)
+    return meta, row_index, key_index
+
+
+def _column_nulls(meta: Dict, col: str) -> int:
+    """จำนวนค่าว่างของคอลัมน์ในข้อมูลเดิม (คอลัมน์ที่ข้อมูลเดิมไม่มี = ค่าว่างทุกแถว)"""
+    if col not in meta['columns']:
+        return int(meta['rows'])
+    return int(meta['null_counts'].get(col, 0))
+
+
+def _hash_kind(dtype: str) -> str:
+    """กลุ่ม dtype ที่ hash_rows ให้ hash เดียวกันสำหรับค่าเดียวกัน (จำนวนเต็ม/ทศนิยม/bool, วันเวลา, ข้อความ)"""
+    try:
+        dtype = pd.api.types.pandas_dtype(dtype)
+    except TypeError:
+        return 'text'
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype):
+        return 'number'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'datetime'
+    return 'text'
+
+
+def _rehash_needed(hashed: Dict[str, set], stored: Dict[str, str]) -> bool:
+    """
+    มีคอลัมน์ที่ hash ไว้ด้วย dtype ต่างกลุ่มจากที่จัดเก็บจริงหรือไม่
+    (เช่น บาร์โค้ดตัวเลขใน chunk แรกที่ถูกขยายเป็นข้อความเพราะ chunk หลัง)
+    """
+    return any(_hash_kind(dtype) != _hash_kind(stored[col])
+               for col, dtypes in hashed.items() if col in stored for dtype in dtypes)
+
+
+def _merge_schema(meta: Dict, columns: List[str], dtypes: Dict[str, str]) -> Tuple[List[str], Dict[str, str]]:
+    merged_columns = list(meta['columns']) + [col for col in columns if col not in meta['columns']]
+    merged_dtypes = dict(dtypes)
+    merged_dtypes.update(meta['dtypes'])
+    return merged_columns, merged_dtypes
+
+
+def _read_current_rows(target: Path, key: str, key_hashes: np.ndarray) -> pd.DataFrame:
+    """
+    อ่านเฉพาะแถวปัจจุบันที่คีย์อยู่ใน key_hashes
+    อ่านคอลัมน์คีย์ของทุก segment แล้วอ่านเฉพาะ row group ที่มีคีย์ตรงกัน
+    """
+    files = [target] + [deltas_dir(target) / name for name in read_manifest(target)['segments']]
+    frames = []
+    for file in files:
+        parquet_file = pq.ParquetFile(file, memory_map=True)
+        keys = parquet_file.read(columns=[key]).to_pandas()
+        positions = np.flatnonzero(np.isin(hash_rows(keys, [key]), key_hashes))
+        if len(positions) == 0:
+            continue
+
+        group_rows = [parquet_file.metadata.row_group(i).num_rows for i in range(parquet_file.num_row_groups)]
+        offsets = np.concatenate([[0], np.cumsum(group_rows)])
+        groups = np.unique(np.searchsorted(offsets, positions, side='right') - 1)
+        frame = parquet_file.read_row_groups(list(groups)).to_pandas()
+        frames.append(frame[np.isin(hash_rows(frame, [key]), key_hashes)])
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True).drop_duplicates(subset=[key], keep='last')
+
+
+def stream_ingest(source_path, target_path, mode: str = 'replace', key_column: Optional[str] = None,
+                  memory_limit_mb: int = 256,
+                  progress_callback: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    นำเข้าไฟล์ข้อมูลทีละ chunk แล้วเขียนลงไฟล์ข้อมูลหลัก
+    ไฟล์ปลายทางถูกเปลี่ยนเมื่อนำเข้าสำเร็จเท่านั้น
+
+    โหมด append/upsert เขียนแถวใหม่เป็น segment ต่อท้าย (Parquet)
+    และปรับ metadata (จำนวนแถว ค่าว่าง แถวซ้ำ) จากแถวใหม่เท่านั้น
+
+    Args:
+        source_path: ที่อยู่ไฟล์ต้นฉบับ (.csv, .jsonl, .json, .xlsx, .xls)
+        target_path: ที่อยู่ไฟล์ข้อมูลหลัก (.parquet หรือ .csv)
+        mode: 'replace', 'append' หรือ 'upsert'
+        key_column: คอลัมน์คีย์สำหรับโหมด upsert
+        memory_limit_mb: เพดานหน่วยความจำโดยประมาณต่อ chunk (MB)
+        progress_callback: ฟังก์ชันรับ dict ความคืบหน้า
+            (rows, chunks, bytes_read, total_bytes, seconds, rows_per_sec)
+
+    Returns:
+        dict สถิติการนำเข้า
+    """
+    if mode not in INGEST_MODES:
+        raise ValueError(f"โหมดไม่รองรับ: {mode}")
+
+    source = Path(source_path)
+    target = Path(target_path)
+
+    if mode != 'replace' and not target.exists():
+        mode = 'replace'
+    if mode == 'append' and is_parquet(target) and read_manifest(target)['key']:
+        # ข้อมูลที่เคย upsert ต้องใช้คีย์เดิมต่อ
+        mode, key_column = 'upsert', read_manifest(target)['key']
+    if mode == 'upsert':
+        if not key_column:
+            raise ValueError("โหมด upsert ต้องระบุคอลัมน์คีย์")
+        with dataset_lock(target):
+            return _upsert_ingest(source, target, key_column, memory_limit_mb, progress_callback)
+
+    reader = _ChunkReader(source)
+    stats = {
+        'mode': mode, 'rows': 0, 'chunks': 0, 'chunk_rows': SAMPLE_ROWS,
+        'bytes_read': 0, 'total_bytes': reader.total_bytes,
+        'seconds': 0.0, 'rows_per_sec': 0.0,
+    }
+    started = time.perf_counter()
+
+    if mode == 'append':
+        meta, row_index, _ = _current_state(target)
+    else:
+        meta, row_index = None, RowHashIndex(target)
+
+    if is_parquet(target):
+        tmp_dir = deltas_dir(target) if mode == 'append' else target.parent
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        tmp_target = tmp_dir / (target.name + ".ingest.tmp")
+        writer = _ParquetChunkWriter(tmp_target)
+    elif mode == 'append':
+        tmp_target = None
+        writer = _CsvChunkWriter(target, append_columns=meta['columns'])
+    else:
+        tmp_target = target.with_name(target.name + ".ingest.tmp")
+        writer = _CsvChunkWriter(tmp_target)
+
+    columns = None
+    # คอลัมน์ที่ใช้ hash ทั้งแถว: ต้องตรงกับ index เดิม (แถวเดิมไม่มีคอลัมน์ที่เพิ่งเพิ่ม)
+    hash_columns = list(meta['columns']) if mode == 'append' else None
+    null_counts: Dict[str, int] = {}
+    # dtype ของแต่ละคอลัมน์ตอน hash (ข้อมูลเดิม + ทุก chunk) เทียบกับ dtype ที่จัดเก็บจริงตอนจบ
+    hashed_dtypes: Dict[str, set] = {}
+    if mode == 'append':
+        for col, dtype in meta['dtypes'].items():
+            hashed_dtypes.setdefault(col, set()).add(dtype)
+    rows_seen = 0
+    try:
+        for chunk in _read_chunks(reader, memory_limit_mb, stats, started, progress_callback):
+            if columns is None:
+                columns = [str(col) for col in chunk.columns]
+                if hash_columns is None:
+                    hash_columns = list(columns)
+            else:
+                columns += [str(col) for col in chunk.columns if str(col) not in columns]
+            writer.write(chunk)
+            row_index.add(hash_rows(chunk.reindex(columns=hash_columns)))
+            for col, dtype in chunk.dtypes.items():
+                hashed_dtypes.setdefault(str(col), set()).add(str(dtype))
+            # คอลัมน์ที่ไม่มีใน chunk เป็นค่าว่างทั้ง chunk (writer เติมค่าว่างให้)
+            chunk_nulls = {str(col): int(count) for col, count in chunk.isna().sum().items()}
+            for col in chunk_nulls:
+                null_counts.setdefault(col, rows_seen)
+            for col in null_counts:
+                null_counts[col] += chunk_nulls.get(col, len(chunk))
+            rows_seen += len(chunk)
+            del chunk
+    except Exception:
+        reader.close()
+        if isinstance(writer, _CsvChunkWriter):
+            writer.rollback()
+        else:
+            writer.close()
+            if tmp_target.exists():
+                tmp_target.unlink()
+        raise
+
+    writer.close()
+    reader.close()
+
+    if columns is None:
+        if tmp_target is not None:
+            tmp_target.unlink(missing_ok=True)
+        raise ValueError("ไฟล์ไม่มีข้อมูล")
+
+    # เปลี่ยนไฟล์ปลายทางภายใต้ล็อก: โปรแกรมอื่นไม่เห็นไฟล์ที่เปลี่ยนครึ่งทาง
+    with dataset_lock(target):
+        if mode == 'append':
+            if tmp_target is not None:
+                add_segment(target, tmp_target)
+            all_columns, dtypes = _merge_schema(meta, columns, writer.dtypes())
+            rows = meta['rows'] + stats['rows']
+            # คอลัมน์ที่เพิ่งมี: แถวเดิมเป็นค่าว่าง / คอลัมน์ที่ไฟล์ใหม่ไม่มี: แถวใหม่เป็นค่าว่าง
+            null_counts = {col: _column_nulls(meta, col) + null_counts.get(col, stats['rows'])
+                           for col in all_columns}
+        else:
+            os.replace(tmp_target, target)
+            if is_parquet(target):
+                remove_segments(target)
+            remove_journal(target)
+            all_columns, dtypes = columns, writer.dtypes()
+            rows = stats['rows']
+            null_counts = {col: null_counts.get(col, 0) for col in all_columns}
+
+        if list(all_columns) != hash_columns or _rehash_needed(hashed_dtypes, writer.dtypes()):
+            # มีคอลัมน์เพิ่ม หรือ dtype ถูกขยายหลัง hash: hash ของแถวเปลี่ยน ต้องสร้าง index ใหม่จากข้อมูล
+            row_index.build(read_table(target))
+        new_meta = write_meta(target, rows, all_columns, dtypes, null_counts,
+                              duplicate_rows=row_index.duplicate_count)
+        row_index.save(new_meta['version'])
+
+    _update_rate(stats, started)
+    stats['bytes_read'] = reader.total_bytes
+    stats['total_rows'] = rows
+    stats['duplicate_rows'] = row_index.duplicate_count
+    return stats
+
+
+def _upsert_ingest(source: Path, target: Path, key: str, memory_limit_mb: int,
+                   progress_callback: Optional[Callable[[Dict], None]]) -> Dict:
+    """
+    นำเข้าแบบ upsert: แถวที่คีย์ตรงกับข้อมูลเดิมจะแทนที่แถวเดิม แถวอื่นถูกเพิ่มต่อท้าย
+    แถวใหม่ทั้งหมดต้องอยู่ในหน่วยความจำได้ (ขนาดเท่าไฟล์ที่นำเข้า ไม่ใช่ข้อมูลทั้งหมด)
+    """
+    reader = _ChunkReader(source)
+    stats = {
+        'mode': 'upsert', 'rows': 0, 'chunks': 0, 'chunk_rows': SAMPLE_ROWS,
+        'bytes_read': 0, 'total_bytes': reader.total_bytes,
+        'seconds': 0.0, 'rows_per_sec': 0.0,
+    }
+    started = time.perf_counter()
+    try:
+        chunks = list(_read_chunks(reader, memory_limit_mb, stats, started, progress_callback))
+    finally:
+        reader.close()
+    if not chunks:
+        raise ValueError("ไฟล์ไม่มีข้อมูล")
+
+    new_df = pd.concat(chunks, ignore_index=True)
+    del chunks
+    if key not in new_df.columns:
+        raise ValueError(f"ไม่พบคอลัมน์คีย์: {key}")
+    new_df = new_df.drop_duplicates(subset=[key], keep='last').reset_index(drop=True)
+
+    if not is_parquet(target):
+        # CSV ต่อท้ายแบบมีคีย์ไม่ได้: รวมแล้วเขียนใหม่ทั้งไฟล์
+        merged = pd.concat([read_table(target), new_df], ignore_index=True)
+        merged = merged.drop_duplicates(subset=[key], keep='last').reset_index(drop=True)
+        write_table(merged, target)
+        _update_rate(stats, started)
+        stats.update(total_rows=len(merged), inserted=None, updated=None)
+        return stats
+
+    if read_manifest(target)['key'] != key:
+        # upsert ครั้งแรกหรือเปลี่ยนคีย์: รวม segment และทำให้คีย์ไม่ซ้ำก่อน (ครั้งเดียว)
+        current = read_table(target)
+        if key not in current.columns:
+            raise ValueError(f"ไม่พบคอลัมน์คีย์ในข้อมูลเดิม: {key}")
+        write_table(current.drop_duplicates(subset=[key], keep='last').reset_index(drop=True), target)
+        del current
+
+    meta, row_index, key_index = _current_state(target, key)
+
+    new_keys = hash_rows(new_df, [key])
+    overlap = key_index.contains(new_keys)
+    replaced = _read_current_rows(target, key, new_keys[overlap]) if overlap.any() else pd.DataFrame()
+
+    # เขียนแถวใหม่เป็น segment
+    directory = deltas_dir(target)
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp_target = directory / (target.name + ".ingest.tmp")
+    writer = _ParquetChunkWriter(tmp_target)
+    try:
+        writer.write(new_df)
+    finally:
+        writer.close()
+    add_segment(target, tmp_target, key=key)
+
+    # ปรับสถิติจากแถวใหม่และแถวที่ถูกแทนที่เท่านั้น
+    columns, dtypes = _merge_schema(meta, [str(col) for col in new_df.columns], writer.dtypes())
+    # คอลัมน์ที่ไม่มีในแถวชุดใดนับเป็นค่าว่างทั้งชุด
+    new_nulls = new_df.reindex(columns=columns).isna().sum()
+    old_nulls = replaced.reindex(columns=columns).isna().sum()
+    null_counts = {
+        col: _column_nulls(meta, col) + int(new_nulls[col]) - int(old_nulls[col])
+        for col in columns
+    }
+    rows = meta['rows'] + len(new_df) - len(replaced)
+
+    if columns != list(meta['columns']):
+        # มีคอลัมน์เพิ่ม: hash ทั้งแถวของทุกแถวเปลี่ยน ต้องสร้าง index ใหม่จากข้อมูล
+        row_index.build(read_table(target))
+    else:
+        if len(replaced):
+            row_index.remove(hash_rows(replaced.reindex(columns=meta['columns'])))
+        row_index.add(hash_rows(new_df.reindex(columns=meta['columns'])))
+    key_index.add(new_keys[~overlap])
+
+    new_meta = write_meta(target, rows, columns, dtypes, null_counts,
+                          duplicate_rows=row_index.duplicate_count)
+    row_index.save(new_meta['version'])
+    key_index.save(new_meta['version'])
+
+    _update_rate(stats, started)
+    stats['bytes_read'] = reader.total_bytes
+    stats.update(total_rows=rows, inserted=int((~overlap).sum()), updated=int(overlap.sum()),
+                 duplicate_rows=row_index.duplicate_count)
+    return stats
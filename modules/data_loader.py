@@ -3,10 +3,20 @@
 """
 
 import os
-import shutil
 from pathlib import Path
 import pandas as pd
-from typing import Tuple, List
+from typing import Callable, Tuple, List, Optional
+
+from modules.data_store import (
+    LEGACY_CSV_NAME, default_data_file, is_parquet, write_table, export_csv,
+    read_meta, write_meta, describe_frame
+)
+from modules.data_ingest import SUPPORTED_EXTENSIONS, stream_ingest
+from modules.image_catalog import ImageCatalog
+from modules.image_importer import ImageImporter, is_image_name
+from modules.image_similarity import DEFAULT_MAX_DISTANCE, PIL_AVAILABLE, ImageSimilarityIndex
+from modules.image_tensor_cache import ImageTensorCache
+from modules.dataset_cache import compact_journal, dataset_cache, load_dataset
 
 
 class DataLoader:
@@ -19,14 +29,34 @@ class DataLoader:
         """
         self.data_dir = Path(data_dir)
         self.images_dir = self.data_dir / "images"
-        self.data_file = self.data_dir / "uploaded_data.csv"
+        self.data_file = default_data_file(self.data_dir)
+        self.exports_dir = self.data_dir / "exports"
+        self.last_ingest_stats = None
         
         # สร้างโฟลเดอร์ถ้ายังไม่มี
         self.images_dir.mkdir(parents=True, exist_ok=True)
+        self.image_catalog = ImageCatalog(self.images_dir)
+        self.image_importer = ImageImporter(self.images_dir, catalog=self.image_catalog)
+        self.image_similarity = ImageSimilarityIndex(self.image_catalog) if PIL_AVAILABLE else None
+        self.image_tensor_cache: Optional[ImageTensorCache] = None
+        
+        self._migrate_legacy_csv()
+    
+    def _migrate_legacy_csv(self) -> None:
+        """แปลงไฟล์ uploaded_data.csv เดิมเป็นไฟล์ข้อมูลหลัก (ครั้งเดียว)"""
+        legacy_file = self.data_dir / LEGACY_CSV_NAME
+        if not is_parquet(self.data_file) or self.data_file.exists() or not legacy_file.exists():
+            return
+        
+        try:
+            write_table(pd.read_csv(legacy_file), self.data_file)
+        except Exception:
+            # ถ้าแปลงไม่ได้ ปล่อยไฟล์เดิมไว้ให้ผู้ใช้อัปโหลดใหม่
+            pass
     
     def save_image(self, source_path: str) -> Tuple[bool, str]:
         """
-        บันทึกไฟล์ภาพ
+        บันทึกไฟล์ภาพ (จัดเก็บตาม hash ของเนื้อหา ภาพซ้ำจะไม่ถูกเก็บซ้ำ)
 
         Args:
             source_path: ที่อยู่ไฟล์ต้นฉบับ
@@ -40,25 +70,138 @@ class DataLoader:
                 return False, "ไฟล์ไม่พบ"
             
             # ตรวจสอบนามสกุลไฟล์
-            valid_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.gif'}
-            if source.suffix.lower() not in valid_extensions:
+            if not is_image_name(source.name):
                 return False, f"นามสกุลไม่รองรับ: {source.suffix}"
             
             # คัดลอกไฟล์ไปยังโฟลเดอร์ images
-            destination = self.images_dir / source.name
-            shutil.copy2(source, destination)
+            result = self.image_importer.import_file(source)
+            self.image_importer.save_index()
+            
+            if result['status'] != 'imported':
+                return True, f"ภาพนี้มีอยู่แล้ว: {result['name']}"
+            
+            self._update_image_hashes([result['name']])
+            
+            return True, f"บันทึกสำเร็จ: {source.name} → {result['name']}"
+        
+        except Exception as e:
+            return False, f"เกิดข้อผิดพลาด: {str(e)}"
+    
+    def import_images(self, sources: List[str], label: Optional[str] = None,
+                      progress_callback: Optional[Callable[[dict], None]] = None
+                      ) -> Tuple[bool, str, Optional[dict]]:
+        """
+        นำเข้าไฟล์ภาพจำนวนมากจากโฟลเดอร์ glob หรือไฟล์บีบอัด (.zip, .tar)
+
+        Args:
+            sources: รายการโฟลเดอร์ / glob pattern / ไฟล์
+            label: label ของภาพที่นำเข้า (เช่น ประเภทเนื้อ)
+            progress_callback: ฟังก์ชันรับ dict ความคืบหน้า
+
+        Returns:
+            (สำเร็จ, ข้อความ, dict สถิติ)
+        """
+        try:
+            stats = self.image_importer.import_sources(
+                sources, label=label, progress_callback=progress_callback
+            )
+            
+            if stats['files'] == 0 and not stats['errors']:
+                return False, "ไม่พบไฟล์ภาพ", stats
+            
+            self._update_image_hashes(stats['names'])
+            
+            message = (f"นำเข้าสำเร็จ: ใหม่ {stats['imported']}, ซ้ำ {stats['duplicates']}, "
+                       f"เคยนำเข้าแล้ว {stats['known']} "
+                       f"({stats['files_per_sec']:,.0f} ไฟล์/วินาที, {stats['mb_per_sec']:,.1f} MB/วินาที)")
+            if stats['errors']:
+                message += f"\nผิดพลาด {len(stats['errors'])} ไฟล์"
+            
+            return True, message, stats
+        
+        except Exception as e:
+            return False, f"เกิดข้อผิดพลาด: {str(e)}", None
+    
+    def _update_image_hashes(self, names: List[str]) -> None:
+        """คำนวณ perceptual hash เฉพาะภาพที่เพิ่งนำเข้า (ไม่มี Pillow = ข้าม)"""
+        if self.image_similarity is not None and names:
+            self.image_similarity.update(names)
+    
+    def find_near_duplicate_images(self, max_distance: int = DEFAULT_MAX_DISTANCE
+                                   ) -> Tuple[bool, str, Optional[List[List[str]]]]:
+        """
+        หาภาพที่เกือบซ้ำกัน (ถ่ายซ้ำ หรือบันทึกใหม่ด้วยการบีบอัดต่างกัน)
+
+        Args:
+            max_distance: ระยะ Hamming สูงสุดของ pHash (จาก 64 บิต)
+
+        Returns:
+            (สำเร็จ, ข้อความ, list ของกลุ่มชื่อไฟล์)
+        """
+        if self.image_similarity is None:
+            return False, "ต้องติดตั้ง Pillow: pip install pillow", None
+        
+        try:
+            self.image_catalog.rescan()
+            groups = self.image_similarity.near_duplicate_groups(max_distance)
+            
+            if not groups:
+                return True, "✅ ไม่พบภาพที่เกือบซ้ำกัน", groups
+            
+            message = f"⚠️ พบภาพที่เกือบซ้ำกัน {len(groups)} กลุ่ม (ระยะไม่เกิน {max_distance} บิต):\n"
+            for names in groups:
+                message += f"├─ {', '.join(names)}\n"
+            message += f"└─ รวม {sum(len(names) for names in groups)} ภาพ"
+            return True, message, groups
+        
+        except Exception as e:
+            return False, f"เกิดข้อผิดพลาด: {str(e)}", None
+    
+    def build_image_cache(self, progress_callback: Optional[Callable[[dict], None]] = None
+                          ) -> Tuple[bool, str]:
+        """
+        decode/resize ภาพใน catalog เป็นแคช shard สำหรับเทรน (เฉพาะภาพที่ยังไม่อยู่ในแคช)
+
+        Args:
+            progress_callback: ฟังก์ชันรับ dict ความคืบหน้า
+
+        Returns:
+            (สำเร็จ, ข้อความสรุป)
+        """
+        if not PIL_AVAILABLE:
+            return False, "ต้องติดตั้ง Pillow: pip install pillow"
+        
+        try:
+            if self.image_tensor_cache is None:
+                self.image_tensor_cache = ImageTensorCache(self.image_catalog,
+                                                           cache_dir=str(self.data_dir / "cache" / "tensors"))
+            stats = self.image_tensor_cache.build(progress_callback=progress_callback)
             
-            return True, f"บันทึกสำเร็จ: {source.name}"
+            message = "✅ อัปเดตแคชภาพสำหรับเทรนแล้ว\n"
+            message += f"├─ เพิ่ม: {stats['added']:,} ภาพ\n"
+            message += f"├─ ลบ: {stats['removed']:,} ภาพ\n"
+            if stats['failed'] or stats['skipped']:
+                message += f"├─ ⚠️ decode ไม่ได้: {stats['failed'] + stats['skipped']:,} ภาพ\n"
+            message += f"└─ รวม: {stats['total']:,} ภาพใน {stats['shards']:,} shard"
+            return True, message
         
         except Exception as e:
             return False, f"เกิดข้อผิดพลาด: {str(e)}"
     
-    def save_data_file(self, source_path: str) -> Tuple[bool, str]:
+    def save_data_file(self, source_path: str,
+                       progress_callback: Optional[Callable[[dict], None]] = None,
+                       memory_limit_mb: int = 256, mode: str = 'replace',
+                       key_column: Optional[str] = None) -> Tuple[bool, str]:
         """
-        บันทึกไฟล์ข้อมูล (.csv, .xlsx, .json)
+        บันทึกไฟล์ข้อมูล (.csv, .xlsx, .json, .jsonl) แบบอ่าน/เขียนทีละ chunk
 
         Args:
             source_path: ที่อยู่ไฟล์ต้นฉบับ
+            mode: 'replace' แทนที่ข้อมูลเดิม, 'append' ต่อท้าย,
+                  'upsert' แทนที่แถวที่คีย์ตรงกันและเพิ่มแถวใหม่
+            key_column: คอลัมน์คีย์สำหรับโหมด upsert
+            progress_callback: ฟังก์ชันรับ dict ความคืบหน้า (rows, bytes_read, rows_per_sec, ...)
+            memory_limit_mb: เพดานหน่วยความจำโดยประมาณต่อ chunk (MB)
 
         Returns:
             (สำเร็จ, ข้อความ)
@@ -68,35 +211,58 @@ class DataLoader:
             if not source.exists():
                 return False, "ไฟล์ไม่พบ"
             
-            # อ่านไฟล์ตามนามสกุล
-            if source.suffix.lower() == '.csv':
-                df = pd.read_csv(source)
-            elif source.suffix.lower() in ['.xlsx', '.xls']:
-                df = pd.read_excel(source)
-            elif source.suffix.lower() == '.json':
-                df = pd.read_json(source)
-            else:
+            if source.suffix.lower() not in SUPPORTED_EXTENSIONS:
                 return False, f"นามสกุลไม่รองรับ: {source.suffix}"
             
-            # บันทึกเป็น CSV
-            df.to_csv(self.data_file, index=False)
+            # ต่อท้าย/upsert อ้างอิงข้อมูลเดิม: รวมการแก้ไขที่ค้างใน journal เข้าไฟล์ก่อน
+            if mode != 'replace':
+                compact_journal(self.data_file)
+            
+            # อ่าน แปลง และบันทึกเป็นไฟล์ข้อมูลหลักทีละ chunk
+            stats = stream_ingest(source, self.data_file, mode=mode, key_column=key_column,
+                                  memory_limit_mb=memory_limit_mb,
+                                  progress_callback=progress_callback)
+            dataset_cache.invalidate(self.data_file)
+            self.last_ingest_stats = stats
             
-            return True, f"บันทึกสำเร็จ: {len(df)} แถว"
+            message = f"บันทึกสำเร็จ: {stats['rows']} แถว ({stats['rows_per_sec']:,.0f} แถว/วินาที)"
+            if stats['mode'] != 'replace':
+                message += f" รวมทั้งหมด {stats['total_rows']} แถว"
+            if stats.get('updated'):
+                message += f" (อัปเดต {stats['updated']} แถว)"
+            return True, message
         
         except Exception as e:
             return False, f"เกิดข้อผิดพลาด: {str(e)}"
     
-    def get_image_list(self) -> List[str]:
+    def get_image_list(self, label: Optional[str] = None, offset: int = 0,
+                       limit: Optional[int] = None) -> List[str]:
         """
-        ดึงรายชื่อไฟล์ภาพทั้งหมด
+        ดึงรายชื่อไฟล์ภาพ (จาก catalog แบ่งหน้าได้)
+
+        Args:
+            label: เฉพาะ label นี้ (None = ทั้งหมด)
+            offset: ข้ามกี่รายการ
+            limit: จำนวนสูงสุด (None = ทั้งหมด)
 
         Returns:
             รายชื่อไฟล์ภาพ
         """
-        valid_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.gif'}
-        images = [f.name for f in self.images_dir.iterdir() 
-                 if f.suffix.lower() in valid_extensions]
-        return sorted(images)
+        self.image_catalog.rescan()
+        return self.image_catalog.list_names(label=label, offset=offset, limit=limit)
+    
+    def count_images(self, label: Optional[str] = None) -> int:
+        """
+        นับจำนวนไฟล์ภาพ (จาก catalog)
+
+        Args:
+            label: นับเฉพาะ label นี้ (None = ทั้งหมด)
+
+        Returns:
+            จำนวนไฟล์ภาพ
+        """
+        self.image_catalog.rescan()
+        return self.image_catalog.count(label=label)
     
     def get_data_info(self) -> Tuple[int, int]:
         """
@@ -105,19 +271,41 @@ class DataLoader:
         Returns:
             (จำนวนแถว, จำนวนคอลัมน์)
         """
-        if not self.data_file.exists():
+        meta = self.get_data_meta()
+        if meta is None:
             return 0, 0
         
+        return meta['rows'], len(meta['columns'])
+    
+    def get_data_meta(self) -> Optional[dict]:
+        """
+        ดึง metadata ของไฟล์ข้อมูล (จำนวนแถว, schema, dtypes, ขนาด, hash, ค่าว่าง)
+        อ่านจากไฟล์ .meta.json โดยไม่ต้องโหลดข้อมูล
+
+        Returns:
+            dict metadata หรือ None ถ้าไม่พบไฟล์
+        """
+        if not self.data_file.exists():
+            return None
+        
+        meta = read_meta(self.data_file)
+        if meta is not None:
+            return meta
+        
+        # ไม่มี metadata หรือไฟล์ถูกแก้ไขจากภายนอก: สร้างใหม่หนึ่งครั้ง
         try:
-            df = pd.read_csv(self.data_file)
-            return len(df), len(df.columns)
+            df = load_dataset(self.data_file)
+            return write_meta(self.data_file, **describe_frame(df))
         except:
-            return 0, 0
+            return None
     
-    def load_data(self) -> pd.DataFrame:
+    def load_data(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
         """
         โหลดไฟล์ข้อมูล
 
+        Args:
+            columns: โหลดเฉพาะคอลัมน์ที่ระบุ (None = ทุกคอลัมน์)
+
         Returns:
             DataFrame หรือ None ถ้าไม่พบไฟล์
         """
@@ -125,6 +313,29 @@ class DataLoader:
             return None
         
         try:
-            return pd.read_csv(self.data_file)
+            return load_dataset(self.data_file, columns=columns)
         except:
             return None
+    
+    def export_data_csv(self, target_path: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        ส่งออกไฟล์ข้อมูลเป็น CSV
+
+        Args:
+            target_path: ที่อยู่ไฟล์ปลายทาง (None = data/exports/uploaded_data.csv)
+
+        Returns:
+            (สำเร็จ, ข้อความ)
+        """
+        try:
+            if not self.data_file.exists():
+                return False, "ไฟล์ข้อมูลยังไม่ได้อัปโหลด"
+            
+            target = Path(target_path) if target_path else self.exports_dir / LEGACY_CSV_NAME
+            compact_journal(self.data_file)
+            rows = export_csv(self.data_file, target)
+            
+            return True, f"ส่งออกสำเร็จ: {rows} แถว → {target}"
+        
+        except Exception as e:
+            return False, f"เกิดข้อผิดพลาด: {str(e)}"
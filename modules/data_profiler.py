@@ -0,0 +1,426 @@
+"""
+โมดูลสำหรับสร้างโปรไฟล์ข้อมูล (ค่าว่าง แถวซ้ำ ประเภทข้อมูล สถิติ จำนวนค่าไม่ซ้ำ ค่าที่พบบ่อย)
+คำนวณทุกอย่างในรอบเดียวแบบ vectorized
+"""
+
+import datetime
+import tempfile
+import warnings
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+from modules.row_hash_index import RowHashIndex, hash_rows
+
+
+class DataProfile:
+    """ผลการสร้างโปรไฟล์ข้อมูล"""
+
+    def __init__(self, rows: int, columns: List[str], dtypes: Dict[str, str],
+                 null_counts: Dict[str, int], duplicate_rows: int,
+                 numeric_stats: Dict[str, Dict[str, float]], cardinality: Dict[str, int],
+                 top_values: Dict[str, List], memory_bytes: int):
+        """
+        Args:
+            rows: จำนวนแถว
+            columns: รายชื่อคอลัมน์
+            dtypes: ประเภทข้อมูลของแต่ละคอลัมน์
+            null_counts: จำนวนค่าว่างของแต่ละคอลัมน์
+            duplicate_rows: จำนวนแถวซ้ำ (ไม่นับแถวแรก)
+            numeric_stats: คอลัมน์ตัวเลข -> dict (min, max, mean, std)
+            cardinality: จำนวนค่าไม่ซ้ำของแต่ละคอลัมน์
+            top_values: คอลัมน์ -> list ของ (ค่า, จำนวน) เรียงจากมากไปน้อย
+            memory_bytes: หน่วยความจำที่ DataFrame ใช้
+        """
+        self.rows = rows
+        self.columns = columns
+        self.dtypes = dtypes
+        self.null_counts = null_counts
+        self.duplicate_rows = duplicate_rows
+        self.numeric_stats = numeric_stats
+        self.cardinality = cardinality
+        self.top_values = top_values
+        self.memory_bytes = memory_bytes
+
+    @property
+    def missing(self) -> Dict[str, int]:
+        """เฉพาะคอลัมน์ที่มีค่าว่าง"""
+        return {col: count for col, count in self.null_counts.items() if count > 0}
+
+    def to_dict(self) -> Dict:
+        """แปลงเป็น dict (บันทึกเป็น JSON ได้)"""
+        return {
+            'rows': self.rows,
+            'columns': self.columns,
+            'dtypes': self.dtypes,
+            'null_counts': self.null_counts,
+            'duplicate_rows': self.duplicate_rows,
+            'numeric_stats': self.numeric_stats,
+            'cardinality': self.cardinality,
+            'top_values': self.top_values,
+            'memory_bytes': self.memory_bytes,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DataProfile":
+        """สร้างจาก dict ที่ได้จาก to_dict"""
+        return cls(**data)
+
+
+def _to_python(value):
+    """แปลงค่าเป็นชนิดของ Python ที่บันทึกเป็น JSON ได้ (วันที่/เวลาเป็นข้อความ ISO 8601)"""
+    if isinstance(value, (np.datetime64, np.timedelta64)):
+        value = pd.Timestamp(value) if isinstance(value, np.datetime64) else pd.Timedelta(value)
+    elif isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def profile_frame(df: pd.DataFrame, top_n: int = 5) -> DataProfile:
+    """
+    สร้างโปรไฟล์ของ DataFrame
+
+    Args:
+        df: DataFrame
+        top_n: จำนวนค่าที่พบบ่อยที่สุดที่เก็บต่อคอลัมน์
+
+    Returns:
+        DataProfile
+    """
+    columns = [str(col) for col in df.columns]
+    null_counts = {str(col): int(count) for col, count in df.isna().sum().items()}
+
+    # แถวซ้ำ: hash ต่อแถวแล้วนับ hash ที่ไม่ซ้ำ
+    duplicate_rows = 0
+    if len(df) and len(df.columns):
+        duplicate_rows = len(df) - len(np.unique(hash_rows(df)))
+
+    # สถิติคอลัมน์ตัวเลขทั้งหมดพร้อมกันเป็นเมทริกซ์เดียว
+    numeric_cols = [col for col in df.columns
+                    if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])]
+    numeric_stats = {}
+    if numeric_cols and len(df):
+        values = df[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        with np.errstate(all='ignore'), warnings.catch_warnings():
+            # คอลัมน์ที่ว่างทั้งหมดให้ผลเป็น NaN โดยไม่ต้องเตือน
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            mins = np.nanmin(values, axis=0)
+            maxs = np.nanmax(values, axis=0)
+            means = np.nanmean(values, axis=0)
+            stds = np.nanstd(values, axis=0, ddof=1)
+        for i, col in enumerate(numeric_cols):
+            numeric_stats[str(col)] = {
+                'min': float(mins[i]), 'max': float(maxs[i]),
+                'mean': float(means[i]), 'std': float(stds[i]),
+            }
+
+    # จำนวนค่าไม่ซ้ำและค่าที่พบบ่อย: factorize ครั้งเดียวต่อคอลัมน์
+    cardinality = {}
+    top_values = {}
+    for i, col in enumerate(df.columns):
+        codes, uniques = pd.factorize(df.iloc[:, i], use_na_sentinel=True)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        cardinality[str(col)] = int(len(uniques))
+        if len(counts):
+            order = np.argsort(-counts, kind='stable')[:top_n]
+            top_values[str(col)] = [[_to_python(uniques[j]), int(counts[j])] for j in order]
+        else:
+            top_values[str(col)] = []
+
+    return DataProfile(
+        rows=len(df),
+        columns=columns,
+        dtypes={str(col): str(dtype) for col, dtype in df.dtypes.items()},
+        null_counts=null_counts,
+        duplicate_rows=int(duplicate_rows),
+        numeric_stats=numeric_stats,
+        cardinality=cardinality,
+        top_values=top_values,
+        memory_bytes=int(df.memory_usage(deep=True).sum()),
+    )
+
+
+def format_profile(profile: Optional[DataProfile]) -> str:
+    """
+    สร้างข้อความสรุปจากโปรไฟล์สำหรับแสดงผล
+
+    Args:
+        profile: DataProfile หรือ None
+
+    Returns:
+        ข้อความสรุป
+    """
+    if profile is None:
+        return "ไม่มีข้อมูล"
+
+    summary = f"📊 สรุปข้อมูล:\n"
+    summary += f"├─ จำนวนแถว: {profile.rows}\n"
+    summary += f"├─ จำนวนคอลัมน์: {len(profile.columns)}\n"
+    summary += f"├─ คอลัมน์: {', '.join(profile.columns)}\n"
+    summary += f"├─ หน่วยความจำ: {profile.memory_bytes / (1024 * 1024):.1f} MB\n"
+
+    # ค่าว่าง
+    missing = profile.missing
+    if missing:
+        summary += f"├─ ⚠️ ค่าว่าง:\n"
+        for col, count in missing.items():
+            summary += f"│  ├─ {col}: {count}\n"
+
+    # แถวซ้ำ
+    if profile.duplicate_rows > 0:
+        summary += f"├─ ⚠️ แถวซ้ำ: {profile.duplicate_rows}\n"
+
+    # รายละเอียดคอลัมน์
+    summary += f"├─ 📋 รายละเอียดคอลัมน์:\n"
+    for col in profile.columns:
+        summary += f"│  ├─ {col} ({profile.dtypes[col]}, ค่าไม่ซ้ำ {profile.cardinality[col]})\n"
+        stats = profile.numeric_stats.get(col)
+        if stats is not None:
+            summary += (f"│  │  └─ min {stats['min']:g} / max {stats['max']:g} / "
+                        f"mean {stats['mean']:g} / std {stats['std']:g}\n")
+        elif profile.top_values.get(col):
+            top = ", ".join(f"{value} ({count})" for value, count in profile.top_values[col][:3])
+            summary += f"│  │  └─ พบบ่อย: {top}\n"
+
+    summary += f"└─ ✅ ข้อมูลพร้อม"
+    return summary
+
+
+# ============ โปรไฟล์แบบ streaming (ทีละ chunk) ============
+
+# จำนวน hash ที่เก็บต่อคอลัมน์สำหรับประมาณจำนวนค่าไม่ซ้ำ (KMV sketch)
+DISTINCT_SKETCH_SIZE = 4096
+# จำนวนค่าที่ติดตามต่อคอลัมน์สำหรับค่าที่พบบ่อย (Misra-Gries: ค่าที่พบเกิน N/(k+1) ครั้งไม่หลุด)
+TOP_VALUE_CANDIDATES = 256
+# hash ต่อแถวเขียนลงดิสก์แยก 2**bit ส่วนตาม bit บนสุด: นับแถวซ้ำทีละส่วน
+HASH_PARTITION_BITS = 6
+
+
+def _value_kind(dtype) -> str:
+    """กลุ่มประเภทข้อมูลสำหรับตรวจว่าคอลัมน์มีประเภทขัดแย้งกันระหว่าง chunk หรือไม่"""
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'bool'
+    if pd.api.types.is_numeric_dtype(dtype):
+        return 'numeric'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'datetime'
+    return 'text'
+
+
+class _ColumnState:
+    """สถิติสะสมของหนึ่งคอลัมน์"""
+
+    def __init__(self):
+        self.nulls = 0
+        self.kinds: Dict[str, int] = {}
+        self.dtypes: Dict[str, int] = {}
+        # สถิติตัวเลข (รวมแบบ Chan et al. ได้ทีละ chunk)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        # hash ที่เล็กที่สุด k ค่า (ประมาณจำนวนค่าไม่ซ้ำ)
+        self.min_hashes = np.empty(0, dtype=np.uint64)
+        # ค่าที่พบบ่อย: ค่า -> จำนวน (ขอบล่าง ต่ำกว่าจริงไม่เกิน top_error)
+        self.top_error = 0
+        self.top = pd.Series(dtype='int64')
+
+
+class ProfileAccumulator:
+    """
+    สะสมโปรไฟล์ข้อมูลทีละ chunk โดยใช้หน่วยความจำจำกัด
+    ค่าว่าง ประเภทข้อมูล และสถิติตัวเลขเป็นค่าจริง จำนวนค่าไม่ซ้ำและค่าที่พบบ่อยเป็นค่าประมาณ
+    แถวซ้ำ: ใช้ RowHashIndex ที่บันทึกไว้ถ้า version ตรง (ไม่ต้อง hash ใหม่)
+    ไม่เช่นนั้น hash 64 บิตของแต่ละแถวจะเขียนลงไฟล์ชั่วคราวแยกตาม bit บนสุด
+    แล้วนับแถวซ้ำทีละส่วน (ใช้หน่วยความจำประมาณ 8 ไบต์ x จำนวนแถว / 2**HASH_PARTITION_BITS)
+    """
+
+    def __init__(self, top_n: int = 5, row_index: Optional[RowHashIndex] = None,
+                 spill_dir: Optional[str] = None):
+        """
+        Args:
+            top_n: จำนวนค่าที่พบบ่อยที่สุดที่รายงานต่อคอลัมน์
+            row_index: RowHashIndex ที่โหลดแล้ว (ใช้นับแถวซ้ำโดยไม่ hash ใหม่)
+                       หรือที่ยังว่าง (สร้างจาก hash ที่สะสมเมื่อเรียก row_index) None = สร้างใหม่
+            spill_dir: โฟลเดอร์สำหรับไฟล์ hash ชั่วคราว (None = โฟลเดอร์ชั่วคราวของระบบ)
+        """
+        self.top_n = top_n
+        self.rows = 0
+        self.chunks = 0
+        self.memory_bytes = 0
+        self.columns: List[str] = []
+        self._states: Dict[str, _ColumnState] = {}
+        self._row_index = row_index if row_index is not None else RowHashIndex(Path('.'))
+        # index ที่โหลดแล้วมี version: นับแถวซ้ำจาก index นั้นเลย
+        self._reuse_index = self._row_index.version is not None
+        self._spill_dir = spill_dir
+        self._spill: Optional[tempfile.TemporaryDirectory] = None
+        self._index_current = True
+
+    @property
+    def row_index(self) -> RowHashIndex:
+        """index ของ hash ต่อแถวที่สะสม (สร้างจากไฟล์ hash ทีละส่วน มีขนาดเท่าจำนวน hash ไม่ซ้ำ)"""
+        if not self._index_current:
+            hashes, counts = [], []
+            for part in self._partitions():
+                values, part_counts = np.unique(part, return_counts=True)
+                hashes.append(values)
+                counts.append(part_counts)
+            # ส่วนแบ่งตาม bit บนสุด ต่อกันตามลำดับส่วนจึงเรียงแล้ว
+            self._row_index.set_counts(np.concatenate(hashes), np.concatenate(counts))
+            self._index_current = True
+        return self._row_index
+
+    @property
+    def duplicate_rows(self) -> int:
+        """จำนวนแถวซ้ำ (ไม่นับแถวแรกของแต่ละค่า)"""
+        if self._reuse_index or self._index_current:
+            return self._row_index.duplicate_count
+        return sum(len(part) - len(np.unique(part)) for part in self._partitions())
+
+    def close(self) -> None:
+        """ลบไฟล์ hash ชั่วคราว"""
+        if self._spill is not None:
+            self._spill.cleanup()
+            self._spill = None
+
+    def _partition_path(self, part: int) -> Path:
+        return Path(self._spill.name) / f"{part:03d}.bin"
+
+    def _partitions(self):
+        """hash ของแต่ละส่วนที่มีข้อมูล (อ่านทีละส่วน)"""
+        if self._spill is None:
+            return
+        for part in range(1 << HASH_PARTITION_BITS):
+            path = self._partition_path(part)
+            if path.exists():
+                yield np.fromfile(path, dtype=np.uint64)
+
+    def _spill_hashes(self, hashes: np.ndarray) -> None:
+        """เขียน hash ต่อแถวต่อท้ายไฟล์ของแต่ละส่วน"""
+        if len(hashes) == 0:
+            return
+        if self._spill is None:
+            self._spill = tempfile.TemporaryDirectory(prefix="profile-", dir=self._spill_dir)
+        parts = (hashes >> np.uint64(64 - HASH_PARTITION_BITS)).astype(np.intp)
+        order = np.argsort(parts, kind='stable')
+        ends = np.cumsum(np.bincount(parts, minlength=1 << HASH_PARTITION_BITS))
+        start = 0
+        for part, end in enumerate(ends):
+            if end > start:
+                with open(self._partition_path(part), 'ab') as f:
+                    f.write(hashes[order[start:end]].tobytes())
+            start = end
+        self._index_current = False
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """เพิ่ม chunk ข้อมูล"""
+        self.rows += len(chunk)
+        self.chunks += 1
+        self.memory_bytes = max(self.memory_bytes, int(chunk.memory_usage(deep=True).sum()))
+        if not self._reuse_index:
+            self._spill_hashes(hash_rows(chunk))
+
+        null_counts = chunk.isna().sum()
+        for i, col in enumerate(chunk.columns):
+            name = str(col)
+            state = self._states.get(name)
+            if state is None:
+                state = self._states[name] = _ColumnState()
+                self.columns.append(name)
+            series = chunk.iloc[:, i]
+            state.nulls += int(null_counts.iloc[i])
+
+            kind = _value_kind(series.dtype)
+            if null_counts.iloc[i] < len(series):
+                # chunk ที่ว่างทั้งหมดไม่บอกประเภทข้อมูล
+                state.kinds[kind] = state.kinds.get(kind, 0) + 1
+                state.dtypes[str(series.dtype)] = state.dtypes.get(str(series.dtype), 0) + 1
+
+            if kind == 'numeric':
+                self._update_numeric(state, series)
+            self._update_distinct(state, series)
+            self._update_top(state, series)
+
+    @staticmethod
+    def _update_numeric(state: _ColumnState, series: pd.Series) -> None:
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        count = len(values)
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        total = state.count + count
+        delta = mean - state.mean
+        state.mean += delta * count / total
+        state.m2 += m2 + delta * delta * state.count * count / total
+        state.count = total
+        state.min = min(state.min, float(values.min()))
+        state.max = max(state.max, float(values.max()))
+
+    @staticmethod
+    def _update_distinct(state: _ColumnState, series: pd.Series) -> None:
+        values = series.dropna()
+        if len(values) == 0:
+            return
+        hashes = hash_rows(values.to_frame())
+        merged = np.unique(np.concatenate([state.min_hashes, hashes]))
+        state.min_hashes = merged[:DISTINCT_SKETCH_SIZE]
+
+    @staticmethod
+    def _update_top(state: _ColumnState, series: pd.Series) -> None:
+        counts = series.value_counts(dropna=True)
+        counts = counts[counts > 0]
+        if len(counts) == 0:
+            return
+        counts.index = counts.index.astype(object)
+        merged = state.top.add(counts, fill_value=0) if len(state.top) else counts
+        if len(merged) > TOP_VALUE_CANDIDATES:
+            # รวม summary แบบ Misra-Gries: ลบจำนวนลำดับที่ k+1 ออกจากทุกค่า แล้วเก็บค่าที่ยังเป็นบวก
+            # จำนวนที่รายงานเป็นขอบล่าง (ต่ำกว่าจริงรวมไม่เกิน top_error ≤ N/(k+1))
+            cut = merged.nlargest(TOP_VALUE_CANDIDATES + 1).iloc[-1]
+            merged = merged[merged > cut] - cut
+            state.top_error += int(cut)
+        state.top = merged.sort_values(ascending=False, kind='stable').astype('int64')
+
+    @staticmethod
+    def _estimate_distinct(state: _ColumnState) -> int:
+        hashes = state.min_hashes
+        if len(hashes) < DISTINCT_SKETCH_SIZE:
+            return int(len(hashes))
+        fraction = (float(hashes[-1]) + 1.0) / 2.0 ** 64
+        return int(round((DISTINCT_SKETCH_SIZE - 1) / fraction))
+
+    def dtype_conflicts(self) -> Dict[str, List[str]]:
+        """คอลัมน์ที่ chunk ต่างกันอ่านได้เป็นประเภทข้อมูลคนละกลุ่ม (เช่น ตัวเลขปนข้อความ)"""
+        return {col: sorted(state.kinds) for col, state in self._states.items() if len(state.kinds) > 1}
+
+    def result(self) -> DataProfile:
+        """สร้าง DataProfile จากข้อมูลที่สะสม"""
+        numeric_stats = {}
+        top_values = {}
+        for col, state in self._states.items():
+            if state.count:
+                std = float(np.sqrt(state.m2 / (state.count - 1))) if state.count > 1 else float('nan')
+                numeric_stats[col] = {'min': state.min, 'max': state.max, 'mean': state.mean, 'std': std}
+            top = state.top[:self.top_n]
+            top_values[col] = [[_to_python(value), int(count)] for value, count in top.items()]
+
+        return DataProfile(
+            rows=self.rows,
+            columns=list(self.columns),
+            dtypes={col: "/".join(sorted(state.dtypes)) or 'object' for col, state in self._states.items()},
+            null_counts={col: state.nulls for col, state in self._states.items()},
+            duplicate_rows=self.duplicate_rows,
+            numeric_stats=numeric_stats,
+            cardinality={col: self._estimate_distinct(state) for col, state in self._states.items()},
+            top_values=top_values,
+            memory_bytes=self.memory_bytes,
+        )
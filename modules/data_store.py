@@ -0,0 +1,627 @@
+"""
+โมดูลสำหรับอ่านและเขียนไฟล์ข้อมูลหลัก (Parquet แบบคอลัมน์ หรือ CSV)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+import pandas as pd
+
+from modules.dtype_optimizer import infer_schema
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+PARQUET_SUFFIXES = {'.parquet', '.pq'}
+LEGACY_CSV_NAME = "uploaded_data.csv"
+META_SUFFIX = ".meta.json"
+DELTAS_SUFFIX = ".deltas"
+MANIFEST_NAME = "manifest.json"
+JOURNAL_SUFFIX = ".journal"
+
+
+def default_data_file(data_dir: str = "data") -> Path:
+    """
+    ที่อยู่ไฟล์ข้อมูลหลัก (ใช้ Parquet ถ้าติดตั้ง pyarrow ไม่งั้นใช้ CSV)
+
+    Args:
+        data_dir: ที่อยู่โฟลเดอร์เก็บข้อมูล
+
+    Returns:
+        Path ของไฟล์ข้อมูลหลัก
+    """
+    name = "uploaded_data.parquet" if PARQUET_AVAILABLE else LEGACY_CSV_NAME
+    return Path(data_dir) / name
+
+
+def is_parquet(path) -> bool:
+    """ตรวจสอบว่าไฟล์เป็น Parquet หรือไม่ (ดูจากนามสกุล)"""
+    return Path(path).suffix.lower() in PARQUET_SUFFIXES
+
+
+def _require_parquet():
+    if not PARQUET_AVAILABLE:
+        raise ImportError("ต้องติดตั้ง pyarrow: pip install pyarrow")
+
+
+def read_table(path, columns: Optional[List[str]] = None,
+               memory_map: bool = True) -> pd.DataFrame:
+    """
+    อ่านไฟล์ข้อมูลเป็น DataFrame (รวม segment ที่ต่อท้ายไว้ ถ้ามี)
+
+    Args:
+        path: ที่อยู่ไฟล์ (.parquet หรือ .csv)
+        columns: อ่านเฉพาะคอลัมน์ที่ระบุ (None = ทุกคอลัมน์)
+        memory_map: ใช้ memory-map ตอนอ่าน Parquet
+
+    Returns:
+        DataFrame
+    """
+    path = Path(path)
+    if not is_parquet(path):
+        return pd.read_csv(path, usecols=columns)
+
+    _require_parquet()
+    manifest = read_manifest(path)
+    if not manifest['segments']:
+        return pq.read_table(path, columns=columns, memory_map=memory_map).to_pandas()
+
+    key = manifest['key']
+    read_columns_ = columns
+    if columns is not None and key is not None and key not in columns:
+        read_columns_ = list(columns) + [key]
+
+    frames = [pq.read_table(path, columns=read_columns_, memory_map=memory_map).to_pandas()]
+    for segment in manifest['segments']:
+        frames.append(pq.read_table(deltas_dir(path) / segment, columns=read_columns_,
+                                    memory_map=memory_map).to_pandas())
+    df = pd.concat(frames, ignore_index=True)
+
+    # โหมด upsert: แถวล่าสุดของแต่ละคีย์เป็นค่าปัจจุบัน
+    if key is not None:
+        df = df.drop_duplicates(subset=[key], keep='last').reset_index(drop=True)
+        if columns is not None and key not in columns:
+            df = df[list(columns)]
+    return df
+
+
+def iter_batches(path, batch_rows: int = 100_000,
+                 columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    อ่านไฟล์ข้อมูลทีละ batch (ใช้หน่วยความจำคงที่ ไม่ต้องโหลดทั้งไฟล์)
+    ได้ผลเหมือน read_table ต่อกันทุก batch
+
+    Args:
+        path: ที่อยู่ไฟล์ (.parquet หรือ .csv)
+        batch_rows: จำนวนแถวต่อ batch
+        columns: อ่านเฉพาะคอลัมน์ที่ระบุ (None = ทุกคอลัมน์)
+
+    Yields:
+        DataFrame ของแต่ละ batch
+    """
+    path = Path(path)
+    if not is_parquet(path):
+        with pd.read_csv(path, usecols=columns, chunksize=batch_rows) as reader:
+            yield from reader
+        return
+
+    _require_parquet()
+    manifest = read_manifest(path)
+    files = [path] + [deltas_dir(path) / segment for segment in manifest['segments']]
+
+    # โหมด upsert: อ่านเฉพาะคอลัมน์คีย์ก่อน เพื่อหาแถวล่าสุดของแต่ละคีย์
+    keep_masks = None
+    key = manifest['key']
+    if key is not None and manifest['segments']:
+        keys = [pq.read_table(file, columns=[key]).column(0).to_pandas() for file in files]
+        latest = ~pd.concat(keys, ignore_index=True).duplicated(keep='last').to_numpy()
+        offsets = np.cumsum([0] + [len(k) for k in keys])
+        keep_masks = [latest[offsets[i]:offsets[i + 1]] for i in range(len(files))]
+        del keys, latest
+
+    for i, file in enumerate(files):
+        position = 0
+        parquet_file = pq.ParquetFile(file, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=columns):
+            df = batch.to_pandas()
+            if keep_masks is not None:
+                df = df[keep_masks[i][position:position + len(df)]]
+            position += batch.num_rows
+            if len(df):
+                yield df.reset_index(drop=True)
+
+
+def deltas_dir(path) -> Path:
+    """ที่อยู่โฟลเดอร์ segment ที่ต่อท้ายไฟล์ข้อมูลหลัก"""
+    path = Path(path)
+    return path.with_name(path.name + DELTAS_SUFFIX)
+
+
+def read_manifest(path) -> Dict:
+    """
+    อ่านรายการ segment ที่ต่อท้ายไฟล์ข้อมูลหลัก
+
+    Returns:
+        dict (key: คอลัมน์คีย์ของ upsert หรือ None, segments: รายชื่อไฟล์ segment ตามลำดับ,
+              hashes: hash ของแต่ละ segment, base: (ขนาด, mtime_ns) ของไฟล์หลักที่ segment ต่อท้าย)
+    """
+    empty = {'key': None, 'segments': [], 'hashes': [], 'base': None}
+    try:
+        with open(deltas_dir(path) / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return empty
+
+    # ไฟล์หลักถูกเขียนใหม่แล้วแต่ยังลบ segment ไม่ทัน (เช่น โปรแกรมปิดกลางคัน): segment เป็นของเก่า
+    if manifest.get('base') is not None and manifest['base'] != _base_stamp(path):
+        return empty
+
+    return {
+        'key': manifest.get('key'),
+        'segments': list(manifest.get('segments', [])),
+        'hashes': list(manifest.get('hashes', [])),
+        'base': manifest.get('base'),
+    }
+
+
+def _base_stamp(path) -> Optional[List[int]]:
+    """(ขนาด, mtime_ns) ของไฟล์หลัก ใช้ผูก segment กับไฟล์หลักที่ต่อท้าย"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def write_manifest(path, manifest: Dict) -> None:
+    """บันทึกรายการ segment (แทนที่ไฟล์แบบ atomic)"""
+    directory = deltas_dir(path)
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp_path = directory / (MANIFEST_NAME + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, directory / MANIFEST_NAME)
+
+
+def add_segment(path, segment_file, key: Optional[str] = None) -> str:
+    """
+    ย้ายไฟล์ Parquet ที่เขียนเสร็จแล้วเข้าเป็น segment ใหม่ของไฟล์ข้อมูลหลัก
+
+    Args:
+        path: ที่อยู่ไฟล์ข้อมูลหลัก
+        segment_file: ไฟล์ Parquet ของแถวใหม่
+        key: คอลัมน์คีย์ (โหมด upsert) หรือ None (โหมดต่อท้าย)
+
+    Returns:
+        ชื่อ segment
+    """
+    manifest = read_manifest(path)
+    directory = deltas_dir(path)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    name = f"delta-{len(manifest['segments']) + 1:05d}.parquet"
+    os.replace(segment_file, directory / name)
+
+    manifest['segments'].append(name)
+    manifest['hashes'].append(file_hash(directory / name))
+    manifest['base'] = _base_stamp(path)
+    if key is not None:
+        manifest['key'] = key
+    write_manifest(path, manifest)
+    return name
+
+
+def remove_segments(path) -> None:
+    """ลบ segment ทั้งหมด (หลังเขียนไฟล์ข้อมูลหลักใหม่ทั้งไฟล์)"""
+    shutil.rmtree(deltas_dir(path), ignore_errors=True)
+
+
+# ============ journal การแก้ไขรายแถว ============
+
+def journal_path(path) -> Path:
+    """ที่อยู่ไฟล์ journal ของการแก้ไขรายแถวที่ยังไม่รวมเข้าไฟล์หลัก"""
+    path = Path(path)
+    return path.with_name(path.name + JOURNAL_SUFFIX)
+
+
+def _journal_size(path) -> int:
+    try:
+        return os.stat(journal_path(path)).st_size
+    except OSError:
+        return 0
+
+
+def _journal_stamp(path) -> List:
+    """ผูก journal กับไฟล์หลักและ segment ที่มีอยู่ตอนเริ่ม journal"""
+    return [_base_stamp(path), len(read_manifest(path)['segments'])]
+
+
+def read_journal(path, offset: int = 0) -> List[Dict]:
+    """
+    อ่านรายการแก้ไขใน journal ตามลำดับ
+
+    Args:
+        path: ที่อยู่ไฟล์ข้อมูล
+        offset: อ่านเฉพาะรายการหลังตำแหน่ง byte นี้ (journal_bytes จาก metadata ที่เคยอ่าน)
+
+    Returns:
+        list ของรายการแก้ไข (ว่างถ้าไม่มี journal หรือ journal เป็นของไฟล์หลักชุดก่อน)
+    """
+    try:
+        with open(journal_path(path), 'rb') as f:
+            header_line = f.readline()
+            if offset > f.tell():
+                f.seek(offset)
+            lines = f.read().decode('utf-8').split('\n')
+    except (OSError, UnicodeDecodeError):
+        return []
+
+    try:
+        header = json.loads(header_line)
+    except ValueError:
+        return []
+    # ไฟล์หลักถูกเขียนใหม่แล้วแต่ยังลบ journal ไม่ทัน: journal เป็นของเก่า
+    if header.get('base') != _journal_stamp(path):
+        return []
+
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            # บรรทัดสุดท้ายที่เขียนไม่จบ (โปรแกรมปิดกลางคัน)
+            break
+    return entries
+
+
+def append_journal(path, entries: List[Dict], **fields) -> Optional[Dict]:
+    """
+    ต่อท้ายรายการแก้ไขลง journal (fsync ก่อนคืนค่า) แล้วปรับ metadata
+    ไม่ต้องเขียนไฟล์หลักใหม่: I/O ขึ้นกับขนาดรายการแก้ไข ไม่ใช่ขนาดข้อมูล
+
+    Args:
+        path: ที่อยู่ไฟล์ข้อมูล
+        entries: รายการแก้ไข (dict ที่แปลงเป็น JSON ได้)
+        **fields: ค่าใน metadata ที่เปลี่ยนตามข้อมูล (เช่น rows, columns)
+
+    Returns:
+        dict metadata ใหม่ หรือ None ถ้า metadata ไม่ตรงกับไฟล์ (ต้องเขียนทั้งไฟล์แทน)
+    """
+    meta = read_meta(path)
+    if meta is None:
+        return None
+
+    lines = [json.dumps(entry, ensure_ascii=False, default=_json_default) for entry in entries]
+    existing = meta.get('journal_ops', 0)
+    if existing == 0:
+        lines.insert(0, json.dumps({'base': _journal_stamp(path)}))
+
+    encoded = ''.join(line + '\n' for line in lines).encode('utf-8')
+    with open(journal_path(path), 'wb' if existing == 0 else 'ab') as f:
+        f.write(encoded)
+        f.flush()
+        os.fsync(f.fileno())
+
+    digest = hashlib.blake2b(meta['content_hash'].encode('ascii'), digest_size=16)
+    digest.update(encoded)
+    meta.update(fields)
+    meta.update(
+        content_hash=digest.hexdigest(),
+        journal_ops=existing + len(entries),
+        journal_bytes=_journal_size(path),
+        version=int(meta.get('version', 0)) + 1,
+        updated_at=datetime.now().isoformat(timespec='seconds'),
+    )
+    _write_meta_file(path, meta)
+    return meta
+
+
+def remove_journal(path) -> None:
+    """ลบ journal (หลังเขียนไฟล์ข้อมูลหลักใหม่ทั้งไฟล์)"""
+    try:
+        journal_path(path).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _json_default(value):
+    """แปลงค่า numpy / pandas สำหรับบันทึกเป็น JSON"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return str(value)
+
+
+def dataset_signature(path) -> Optional[tuple]:
+    """
+    ลายเซ็นของไฟล์ข้อมูลหลักรวม segment และ journal (ใช้ตรวจว่าข้อมูลเปลี่ยนหรือไม่)
+
+    Returns:
+        (mtime_ns, ขนาด, mtime_ns ของ manifest, ขนาด journal) หรือ None ถ้าไม่พบไฟล์
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    try:
+        manifest_mtime = os.stat(deltas_dir(path) / MANIFEST_NAME).st_mtime_ns
+    except OSError:
+        manifest_mtime = None
+    return stat.st_mtime_ns, stat.st_size, manifest_mtime, _journal_size(path)
+
+
+def read_columns(path) -> List[str]:
+    """
+    อ่านเฉพาะชื่อคอลัมน์ โดยไม่โหลดข้อมูล
+
+    Args:
+        path: ที่อยู่ไฟล์
+
+    Returns:
+        รายชื่อคอลัมน์
+    """
+    path = Path(path)
+    if is_parquet(path):
+        _require_parquet()
+        return list(pq.read_schema(path).names)
+
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def _to_arrow(df: pd.DataFrame) -> "pa.Table":
+    """แปลง DataFrame เป็น Arrow Table (คอลัมน์ object ที่มีหลายชนิดปนกันจะถูกแปลงเป็นข้อความ)"""
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        df = df.copy()
+        for col in df.columns:
+            if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith('mixed'):
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def write_table(df: pd.DataFrame, path) -> None:
+    """
+    เขียน DataFrame ลงไฟล์ตามนามสกุล พร้อมไฟล์ metadata (.meta.json)
+    segment และ journal ที่ต่อท้ายไว้จะถูกลบ เพราะไฟล์ใหม่มีข้อมูลครบแล้ว
+
+    เขียนลงไฟล์ชั่วคราวก่อนแล้วแทนที่ไฟล์เดิม (ถ้าเขียนไม่สำเร็จ ไฟล์เดิมยังอยู่ครบ)
+
+    Args:
+        df: DataFrame ที่ต้องการบันทึก
+        path: ที่อยู่ไฟล์ปลายทาง (.parquet หรือ .csv)
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        if is_parquet(path):
+            _require_parquet()
+            pq.write_table(_to_arrow(df), tmp_path)
+        else:
+            df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    if is_parquet(path):
+        # ไฟล์หลักมีข้อมูลครบแล้ว (compaction)
+        remove_segments(path)
+    remove_journal(path)
+
+    write_meta(path, **describe_frame(df), schema=infer_schema(df))
+
+
+def meta_path(path) -> Path:
+    """ที่อยู่ไฟล์ metadata ของไฟล์ข้อมูล"""
+    path = Path(path)
+    return path.with_name(path.name + META_SUFFIX)
+
+
+def file_hash(path, block_size: int = 1 << 20) -> str:
+    """
+    คำนวณ hash ของเนื้อหาไฟล์ (BLAKE2b) แบบอ่านทีละ block
+
+    Args:
+        path: ที่อยู่ไฟล์
+        block_size: ขนาด block ที่อ่านต่อครั้ง
+
+    Returns:
+        hash แบบ hex
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def describe_frame(df: pd.DataFrame) -> Dict:
+    """
+    สรุปโครงสร้างของ DataFrame สำหรับเขียนลง metadata
+
+    Returns:
+        dict ที่ใช้เป็น argument ของ write_meta
+    """
+    return {
+        'rows': len(df),
+        'columns': [str(col) for col in df.columns],
+        'dtypes': {str(col): str(dtype) for col, dtype in df.dtypes.items()},
+        'null_counts': {str(col): int(count) for col, count in df.isna().sum().items()},
+    }
+
+
+def write_meta(path, rows: int, columns: List[str], dtypes: Dict[str, str],
+               null_counts: Dict[str, int], **extra) -> Dict:
+    """
+    เขียนไฟล์ metadata ข้างไฟล์ข้อมูล (ต้องเรียกหลังเขียนไฟล์ข้อมูลเสร็จ)
+
+    Args:
+        path: ที่อยู่ไฟล์ข้อมูล
+        rows: จำนวนแถว
+        columns: รายชื่อคอลัมน์
+        dtypes: ประเภทข้อมูลของแต่ละคอลัมน์
+        null_counts: จำนวนค่าว่างของแต่ละคอลัมน์
+        **extra: ค่าเพิ่มเติม (เช่น duplicate_rows)
+
+    Returns:
+        dict metadata ที่บันทึก
+    """
+    path = Path(path)
+    stat = os.stat(path)
+    previous = _read_meta_file(path) or {}
+    manifest = read_manifest(path)
+
+    # ไฟล์หลักไม่เปลี่ยน (ต่อท้ายเป็น segment): ไม่ต้อง hash ไฟล์หลักใหม่
+    if previous.get('bytes') == stat.st_size and previous.get('mtime_ns') == stat.st_mtime_ns \
+            and previous.get('base_hash'):
+        base_hash = previous['base_hash']
+    else:
+        base_hash = file_hash(path)
+    content_hash = base_hash
+    if manifest['hashes']:
+        digest = hashlib.blake2b(base_hash.encode('ascii'), digest_size=16)
+        for segment_hash in manifest['hashes']:
+            digest.update(segment_hash.encode('ascii'))
+        content_hash = digest.hexdigest()
+
+    meta = {
+        'rows': int(rows),
+        'columns': list(columns),
+        'dtypes': dict(dtypes),
+        'null_counts': dict(null_counts),
+        'bytes': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'base_hash': base_hash,
+        'content_hash': content_hash,
+        'format': 'parquet' if is_parquet(path) else 'csv',
+        'segments': len(manifest['segments']),
+        'upsert_key': manifest['key'],
+        # เพิ่มทุกครั้งที่ข้อมูลเปลี่ยน ใช้ตรวจว่า index ที่สร้างไว้ยังตรงกับข้อมูลหรือไม่
+        'version': int(previous.get('version', 0)) + 1,
+        'updated_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    meta.update(extra)
+    _write_meta_file(path, meta)
+    return meta
+
+
+def _write_meta_file(path, meta: Dict) -> None:
+    tmp_path = meta_path(path).with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, meta_path(path))
+
+
+def _read_meta_file(path) -> Optional[Dict]:
+    try:
+        with open(meta_path(path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_meta(path) -> Optional[Dict]:
+    """
+    อ่านไฟล์ metadata (อ่านเฉพาะไฟล์ .meta.json ไม่อ่านข้อมูล)
+
+    Args:
+        path: ที่อยู่ไฟล์ข้อมูล
+
+    Returns:
+        dict metadata หรือ None ถ้าไม่มี/ไม่ตรงกับไฟล์ข้อมูลปัจจุบัน
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    meta = _read_meta_file(path)
+    if meta is None:
+        return None
+
+    # ไฟล์ข้อมูลถูกแก้ไขโดยไม่ผ่าน write_table
+    if meta.get('bytes') != stat.st_size or meta.get('mtime_ns') != stat.st_mtime_ns:
+        return None
+    if meta.get('segments', 0) != len(read_manifest(path)['segments']):
+        return None
+    # journal ถูกต่อท้ายแต่ยังปรับ metadata ไม่ทัน
+    if meta.get('journal_bytes', 0) != _journal_size(path):
+        return None
+
+    return meta
+
+
+def update_meta(path, **fields) -> Optional[Dict]:
+    """
+    เพิ่มค่าลงไฟล์ metadata เดิมโดยไม่เปลี่ยน version (ใช้กับค่าที่คำนวณจากข้อมูลชุดเดิม)
+
+    Args:
+        path: ที่อยู่ไฟล์ข้อมูล
+        **fields: ค่าที่ต้องการบันทึก (เช่น schema)
+
+    Returns:
+        dict metadata ที่บันทึก หรือ None ถ้า metadata ไม่ตรงกับไฟล์ข้อมูล
+    """
+    meta = read_meta(path)
+    if meta is None:
+        return None
+    meta.update(fields)
+    _write_meta_file(path, meta)
+    return meta
+
+
+def remove_meta(path) -> None:
+    """ลบไฟล์ metadata ของไฟล์ข้อมูล (ถ้ามี)"""
+    try:
+        meta_path(path).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def export_csv(source, target, chunk_rows: int = 100_000) -> int:
+    """
+    ส่งออกไฟล์ข้อมูลเป็น CSV ทีละ batch
+
+    Args:
+        source: ที่อยู่ไฟล์ข้อมูลหลัก
+        target: ที่อยู่ไฟล์ CSV ปลายทาง
+        chunk_rows: จำนวนแถวต่อ batch
+
+    Returns:
+        จำนวนแถวที่ส่งออก
+    """
+    source = Path(source)
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    if not is_parquet(source) or read_manifest(source)['segments']:
+        df = read_table(source)
+        df.to_csv(target, index=False)
+        return len(df)
+
+    _require_parquet()
+    rows = 0
+    parquet_file = pq.ParquetFile(source, memory_map=True)
+    with open(target, 'w', newline='', encoding='utf-8') as f:
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+            chunk = batch.to_pandas()
+            chunk.to_csv(f, index=False, header=(rows == 0))
+            rows += len(chunk)
+
+    if rows == 0:
+        parquet_file.schema_arrow.empty_table().to_pandas().to_csv(target, index=False)
+
+    return rows
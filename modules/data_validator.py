@@ -2,21 +2,44 @@
 โมดูลสำหรับตรวจสอบและทำความสะอาดข้อมูล
 """
 
+import time
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple, Optional
 from pathlib import Path
 
+from modules.cleaning_plan import CleaningPlan, format_report
+from modules.data_profiler import DataProfile, ProfileAccumulator, profile_frame, format_profile
+from modules.data_store import default_data_file, read_meta, iter_batches
+from modules.dataset_cache import compact_journal, load_dataset, save_dataset
+from modules.outlier_detector import OutlierAccumulator, detect_outliers, format_outliers
+from modules.report_cache import ReportCache, chunk_key
+from modules.row_hash_index import RowHashIndex, hash_rows
+from modules.validation_rules import RuleSet, default_rules_file, format_rule_results
+
+
+# จำนวนแถวต่อ chunk ของผลตรวจตามกฎที่แคชไว้ (ข้อมูลเปลี่ยนแล้วตรวจใหม่เฉพาะ chunk ที่เปลี่ยน)
+REPORT_CHUNK_ROWS = 250_000
+
 
 class DataValidator:
     """คลาสสำหรับตรวจสอบคุณภาพข้อมูล"""
     
-    def __init__(self, data_file: str = "data/uploaded_data.csv"):
+    def __init__(self, data_file: Optional[str] = None):
         """
         Args:
             data_file: ที่อยู่ไฟล์ข้อมูล
         """
-        self.data_file = Path(data_file)
+        self.data_file = Path(data_file) if data_file else default_data_file("data")
         self.df = None
+        # โปรไฟล์ของ self.df ล่าสุด (ใช้ซ้ำจนกว่า self.df จะเปลี่ยนเป็นอ็อบเจกต์ใหม่)
+        self._profile = None
+        self._profile_df = None
+        # สถิติการตรวจสอบแบบ streaming ครั้งล่าสุด
+        self.last_stream_stats = None
+        # แคชรายงานบนดิสก์ (ตาม hash เนื้อหาข้อมูล) และสถิติการใช้แคชครั้งล่าสุด
+        self.report_cache = ReportCache(self.data_file)
+        self.last_cache_stats = None
     
     def load_data(self) -> Tuple[bool, str]:
         """
@@ -29,12 +52,125 @@ class DataValidator:
             if not self.data_file.exists():
                 return False, "ไฟล์ข้อมูลยังไม่ได้อัปโหลด"
             
-            self.df = pd.read_csv(self.data_file)
+            self.df = load_dataset(self.data_file)
             return True, f"โหลดสำเร็จ: {len(self.df)} แถว"
         
         except Exception as e:
             return False, f"เกิดข้อผิดพลาด: {str(e)}"
     
+    def get_profile(self) -> Optional[DataProfile]:
+        """
+        ดึงโปรไฟล์ข้อมูล (ค่าว่าง แถวซ้ำ ประเภทข้อมูล สถิติ จำนวนค่าไม่ซ้ำ ค่าที่พบบ่อย)
+        คำนวณครั้งเดียวต่อ DataFrame: DataFrame จากแคชเป็นอ็อบเจกต์เดิมจนกว่าไฟล์จะเปลี่ยน
+
+        Returns:
+            DataProfile หรือ None ถ้ายังไม่โหลดข้อมูล
+        """
+        if self.df is None:
+            return None
+        
+        if self._profile_df is not self.df:
+            self._profile = profile_frame(self.df)
+            self._profile_df = self.df
+        return self._profile
+    
+    def _report_key(self, *parts) -> Tuple[Optional[Dict], Optional[str]]:
+        """metadata ปัจจุบันและคีย์แคชรายงาน (None ถ้าไม่มี hash เนื้อหา)"""
+        meta = read_meta(self.data_file)
+        if meta is None or not meta.get('content_hash'):
+            return meta, None
+        return meta, ReportCache.make_key(meta['content_hash'], *parts)
+    
+    def check_data(self) -> Tuple[bool, str]:
+        """
+        ตรวจสอบข้อมูลและสรุปผล (ใช้ผลจากแคชถ้าข้อมูลไม่เปลี่ยนตั้งแต่ตรวจครั้งก่อน ไม่ต้องโหลดไฟล์)
+
+        Returns:
+            (สำเร็จ, ข้อความสรุป)
+        """
+        try:
+            if not self.data_file.exists():
+                return False, "ไฟล์ข้อมูลยังไม่ได้อัปโหลด"
+            
+            meta, key = self._report_key('summary')
+            cached = self.report_cache.get('summary', key) if key else None
+            if cached is not None:
+                self.last_cache_stats = {'cached_report': True}
+                return True, format_profile(DataProfile.from_dict(cached)) + "\n⚡ ใช้ผลจากแคช (ข้อมูลไม่เปลี่ยน)"
+            
+            success, message = self.load_data()
+            if not success:
+                return False, message
+            
+            profile = self.get_profile()
+            # บันทึกเฉพาะเมื่อไฟล์ไม่เปลี่ยนระหว่างตรวจ
+            if key and read_meta(self.data_file) == meta:
+                self.report_cache.put('summary', key, profile.to_dict(), replace=True)
+            self.last_cache_stats = {'cached_report': False}
+            return True, format_profile(profile)
+        
+        except Exception as e:
+            return False, f"เกิดข้อผิดพลาด: {str(e)}"
+    
+    def validate_streaming(self, chunk_rows: int = 100_000,
+                           progress_callback: Optional[Callable[[Dict], None]] = None) -> Tuple[bool, str]:
+        """
+        ตรวจสอบข้อมูลทีละ chunk โดยไม่โหลดทั้งไฟล์ (สำหรับไฟล์ที่ใหญ่กว่าหน่วยความจำ)
+        ให้สรุปแบบเดียวกับ get_summary พร้อมคอลัมน์ที่ประเภทข้อมูลขัดแย้งกันและความเร็ว (chunk/วินาที)
+
+        Args:
+            chunk_rows: จำนวนแถวต่อ chunk
+            progress_callback: ฟังก์ชันรับ dict ความคืบหน้า (chunks, rows, seconds, chunks_per_sec, rows_per_sec)
+
+        Returns:
+            (สำเร็จ, ข้อความสรุป)
+        """
+        try:
+            if not self.data_file.exists():
+                return False, "ไฟล์ข้อมูลยังไม่ได้อัปโหลด"
+            
+            # อ่านไฟล์โดยตรงทีละ chunk: รวมการแก้ไขที่ค้างใน journal เข้าไฟล์ก่อน
+            compact_journal(self.data_file)
+            meta = read_meta(self.data_file)
+            # index แถวซ้ำที่บันทึกไว้และยังตรงกับข้อมูล: นับแถวซ้ำจาก index ไม่ต้อง hash ใหม่
+            row_index = RowHashIndex(self.data_file)
+            if meta is not None:
+                row_index.load(meta['version'])
+            accumulator = ProfileAccumulator(row_index=row_index)
+            stats = {'chunks': 0, 'rows': 0, 'seconds': 0.0, 'chunks_per_sec': 0.0, 'rows_per_sec': 0.0}
+            started = time.perf_counter()
+            
+            for chunk in iter_batches(self.data_file, batch_rows=chunk_rows):
+                accumulator.update(chunk)
+                elapsed = time.perf_counter() - started
+                stats.update(chunks=accumulator.chunks, rows=accumulator.rows, seconds=elapsed,
+                             chunks_per_sec=accumulator.chunks / elapsed if elapsed > 0 else 0.0,
+                             rows_per_sec=accumulator.rows / elapsed if elapsed > 0 else 0.0)
+                if progress_callback is not None:
+                    progress_callback(dict(stats))
+            
+            # index แถวซ้ำที่ได้ระหว่างทางใช้ต่อกับ check_duplicates ได้
+            if meta is not None and row_index.version is None and read_meta(self.data_file) == meta:
+                accumulator.row_index.save(meta['version'])
+            profile = accumulator.result()
+            accumulator.close()
+            
+            self.last_stream_stats = stats
+            summary = format_profile(profile)
+            
+            conflicts = accumulator.dtype_conflicts()
+            if conflicts:
+                summary += "\n⚠️ ประเภทข้อมูลไม่ตรงกันระหว่าง chunk:\n"
+                for col, kinds in conflicts.items():
+                    summary += f"├─ {col}: {', '.join(kinds)}\n"
+            
+            summary += (f"\n⏱️ {stats['chunks']} chunk ใน {stats['seconds']:.2f} วินาที "
+                        f"({stats['chunks_per_sec']:,.1f} chunk/วินาที, {stats['rows_per_sec']:,.0f} แถว/วินาที)")
+            return True, summary
+        
+        except Exception as e:
+            return False, f"เกิดข้อผิดพลาด: {str(e)}"
+    
     def check_missing_values(self) -> Dict[str, int]:
         """
         ตรวจสอบค่าว่าง
@@ -45,20 +181,193 @@ class DataValidator:
         if self.df is None:
             return {}
         
-        missing = self.df.isnull().sum()
-        return missing[missing > 0].to_dict()
+        return self.get_profile().missing
+    
+    def check_outliers(self, columns: Optional[List[str]] = None, method: str = 'iqr',
+                       threshold: Optional[float] = None, streaming: bool = False,
+                       chunk_rows: int = 100_000) -> Tuple[bool, str, Optional[Dict[str, Dict]]]:
+        """
+        ตรวจค่าผิดปกติของคอลัมน์ตัวเลข (z-score / IQR / MAD)
+
+        Args:
+            columns: คอลัมน์ที่ตรวจ (None = ทุกคอลัมน์ตัวเลข)
+            method: zscore / iqr / mad
+            threshold: จำนวนเท่าของส่วนเบี่ยงเบน (None = ค่าเริ่มต้นของวิธี)
+            streaming: อ่านไฟล์ทีละ chunk สองรอบ ใช้ quantile sketch แทนการโหลดทั้งไฟล์
+            chunk_rows: จำนวนแถวต่อ chunk (โหมด streaming)
+
+        Returns:
+            (สำเร็จ, ข้อความสรุป, dict คอลัมน์ -> ผล)
+        """
+        try:
+            if streaming:
+                if not self.data_file.exists():
+                    return False, "ไฟล์ข้อมูลยังไม่ได้อัปโหลด", None
+                compact_journal(self.data_file)
+                accumulator = OutlierAccumulator(columns, method, threshold)
+                for chunk in iter_batches(self.data_file, batch_rows=chunk_rows, columns=columns):
+                    accumulator.update(chunk)
+                for chunk in iter_batches(self.data_file, batch_rows=chunk_rows, columns=accumulator.columns):
+                    accumulator.count(chunk)
+                results = accumulator.result()
+            else:
+                if self.df is None:
+                    return False, "ไม่มีข้อมูล", None
+                results = detect_outliers(self.df, columns, method, threshold)
+            
+            return True, format_outliers(results, method, streaming=streaming), results
+        
+        except Exception as e:
+            return False, f"เกิดข้อผิดพลาด: {str(e)}", None
+    
+    def _parse_subset(self, subset: Optional[List[str]]) -> Optional[List[str]]:
+        """ตรวจสอบรายชื่อคอลัมน์คีย์ (None/ว่าง = ทั้งแถว)"""
+        if not subset:
+            return None
+        missing = [col for col in subset if col not in self.df.columns]
+        if missing:
+            raise ValueError(f"ไม่พบคอลัมน์: {', '.join(missing)}")
+        return list(subset)
+    
+    def validate_rules(self, rules: Optional[RuleSet] = None,
+                       max_workers: Optional[int] = None) -> Tuple[bool, str, Optional[List[Dict]]]:
+        """
+        ตรวจข้อมูลตามกฎ (ช่วงค่า, regex, ค่าที่อนุญาต, เทียบข้ามคอลัมน์) แบบขนาน
+        ผลถูกแคชตาม hash เนื้อหาข้อมูล + version ของชุดกฎ: ข้อมูลไม่เปลี่ยนได้ผลทันที
+        ข้อมูลที่เปลี่ยนตรวจใหม่เฉพาะ chunk ที่เนื้อหาเปลี่ยน
+
+        Args:
+            rules: ชุดกฎ (None = โหลดจาก validation_rules.json ในโฟลเดอร์ข้อมูล)
+            max_workers: จำนวน process (None = ตามจำนวน CPU)
+
+        Returns:
+            (สำเร็จ, ข้อความสรุป, list ผลของแต่ละกฎ)
+        """
+        try:
+            if not self.data_file.exists():
+                return False, "ไฟล์ข้อมูลยังไม่ได้อัปโหลด", None
+            
+            if rules is None:
+                rules_file = default_rules_file(self.data_file)
+                if not rules_file.exists():
+                    return False, f"ยังไม่มีไฟล์กฎ: {rules_file}", None
+                rules = RuleSet.load(rules_file)
+            
+            meta, key = self._report_key('rules', rules.version)
+            cached = self.report_cache.get('rules', key) if key else None
+            if cached is not None:
+                self.last_cache_stats = {'cached_report': True}
+                return True, format_rule_results(cached) + "\n⚡ ใช้ผลจากแคช (ข้อมูลและกฎไม่เปลี่ยน)", cached
+            
+            # โหลดใหม่ให้ตรงกับไฟล์ (ใช้ DataFrame จากแคชถ้าไฟล์ไม่เปลี่ยน)
+            success, message = self.load_data()
+            if not success:
+                return False, message, None
+            
+            results, reused, chunks = self._evaluate_chunks(rules, max_workers)
+            if key and read_meta(self.data_file) == meta:
+                self.report_cache.put('rules', key, results, replace=True)
+            self.last_cache_stats = {'cached_report': False, 'chunks': chunks, 'reused_chunks': reused}
+            
+            message = format_rule_results(results)
+            if reused:
+                message += f"\n♻️ ใช้ผลเดิม {reused}/{chunks} chunk (ตรวจใหม่เฉพาะส่วนที่เปลี่ยน)"
+            return True, message, results
+        
+        except Exception as e:
+            return False, f"เกิดข้อผิดพลาด: {str(e)}", None
     
-    def check_duplicates(self) -> int:
+    def _evaluate_chunks(self, rules: RuleSet, max_workers: Optional[int],
+                         sample_size: int = 10) -> Tuple[List[Dict], int, int]:
+        """
+        ประเมินกฎทีละ chunk โดยใช้ผลของ chunk ที่เนื้อหาเหมือนเดิมจากแคช แล้วรวมผล
+
+        Returns:
+            (ผลของแต่ละกฎ, จำนวน chunk ที่ใช้ผลเดิม, จำนวน chunk ทั้งหมด)
+        """
+        # ประเมินกับ 0 แถวเพื่อตรวจคอลัมน์และได้ผลเริ่มต้น (violations = 0)
+        results = rules.evaluate(self.df.iloc[:0], sample_size=0)
+        used_keys = []
+        reused = 0
+        for start in range(0, len(self.df), REPORT_CHUNK_ROWS):
+            chunk = self.df.iloc[start:start + REPORT_CHUNK_ROWS]
+            key = ReportCache.make_key(chunk_key(chunk), rules.version)
+            used_keys.append(key)
+            
+            chunk_results = self.report_cache.get('rulechunk', key)
+            if chunk_results is None:
+                chunk_results = rules.evaluate(chunk, sample_size=sample_size, max_workers=max_workers)
+                self.report_cache.put('rulechunk', key, chunk_results)
+            else:
+                reused += 1
+            
+            for total, result in zip(results, chunk_results):
+                total['violations'] += result['violations']
+                room = sample_size - len(total['sample_rows'])
+                total['sample_rows'].extend(start + row for row in result['sample_rows'][:room])
+        
+        # เก็บเฉพาะ chunk ของข้อมูลปัจจุบัน
+        self.report_cache.prune('rulechunk', used_keys)
+        return results, reused, len(used_keys)
+    
+    def get_hash_index(self, subset: Optional[List[str]] = None) -> RowHashIndex:
+        """
+        ดึง index ของ hash ต่อแถวที่บันทึกไว้ (สร้างและบันทึกครั้งแรก แล้วใช้ซ้ำจนกว่าไฟล์จะเปลี่ยน)
+        index ถูกปรับต่อเนื่องเมื่อนำเข้าแบบต่อท้าย/upsert
+
+        Args:
+            subset: คอลัมน์ที่ใช้เป็นคีย์ (None = ทั้งแถว)
+
+        Returns:
+            RowHashIndex
+        """
+        subset = self._parse_subset(subset)
+        index = RowHashIndex(self.data_file, subset)
+        meta = read_meta(self.data_file)
+        if meta is not None and index.load(meta['version']):
+            return index
+        
+        index.build(self.df)
+        if meta is not None:
+            index.save(meta['version'])
+        return index
+    
+    def check_duplicates(self, subset: Optional[List[str]] = None) -> int:
         """
         ตรวจสอบแถวซ้ำ
 
+        Args:
+            subset: ตรวจซ้ำเฉพาะคอลัมน์เหล่านี้ เช่น ['barcode'] (None = ทั้งแถว)
+
         Returns:
             จำนวนแถวซ้ำ
         """
         if self.df is None:
             return 0
         
-        return self.df.duplicated().sum()
+        if subset is None and self._profile_df is self.df:
+            return self._profile.duplicate_rows
+        return self.get_hash_index(subset).duplicate_count
+    
+    def find_existing_rows(self, new_df: pd.DataFrame,
+                           subset: Optional[List[str]] = None) -> pd.Series:
+        """
+        ตรวจว่าแถวของข้อมูลใหม่มีอยู่แล้วในข้อมูลเดิมหรือไม่ (ค้นใน index ไม่ต้องเทียบทั้งตาราง)
+
+        Args:
+            new_df: ข้อมูลใหม่
+            subset: คอลัมน์ที่ใช้เป็นคีย์ (None = ทั้งแถว)
+
+        Returns:
+            Series bool ตาม index ของ new_df (True = มีอยู่แล้ว)
+        """
+        if self.df is None:
+            return pd.Series(False, index=new_df.index)
+        
+        index = self.get_hash_index(subset)
+        columns = index.columns or list(self.df.columns)
+        hashes = hash_rows(new_df.reindex(columns=columns))
+        return pd.Series(index.contains(hashes), index=new_df.index)
     
     def check_data_types(self) -> Dict[str, str]:
         """
@@ -70,7 +379,7 @@ class DataValidator:
         if self.df is None:
             return {}
         
-        return self.df.dtypes.to_dict()
+        return self.get_profile().dtypes
     
     def get_summary(self) -> str:
         """
@@ -79,29 +388,37 @@ class DataValidator:
         Returns:
             ข้อความสรุป
         """
+        return format_profile(self.get_profile())
+    
+    def apply_plan(self, plan: CleaningPlan, dry_run: bool = False) -> Tuple[bool, str]:
+        """
+        ทำแผนทำความสะอาดทุกขั้นตอนในรอบเดียว แล้วบันทึกไฟล์ครั้งเดียว (เขียนไฟล์ชั่วคราวแล้วแทนที่)
+
+        Args:
+            plan: CleaningPlan
+            dry_run: ประเมินจำนวนแถว/ค่าที่ได้รับผลกระทบโดยไม่แก้ไขข้อมูล
+
+        Returns:
+            (สำเร็จ, ข้อความสรุป)
+        """
         if self.df is None:
-            return "ไม่มีข้อมูล"
-        
-        summary = f"📊 สรุปข้อมูล:\n"
-        summary += f"├─ จำนวนแถว: {len(self.df)}\n"
-        summary += f"├─ จำนวนคอลัมน์: {len(self.df.columns)}\n"
-        summary += f"├─ คอลัมน์: {', '.join(self.df.columns)}\n"
-        
-        # ค่าว่าง
-        missing = self.check_missing_values()
-        if missing:
-            summary += f"├─ ⚠️ ค่าว่าง:\n"
-            for col, count in missing.items():
-                summary += f"│  ├─ {col}: {count}\n"
-        
-        # แถวซ้ำ
-        duplicates = self.check_duplicates()
-        if duplicates > 0:
-            summary += f"├─ ⚠️ แถวซ้ำ: {duplicates}\n"
+            return False, "ไม่มีข้อมูล"
+        if len(plan) == 0:
+            return False, "แผนทำความสะอาดว่าง"
         
-        summary += f"└─ ✅ ข้อมูลพร้อม"
+        try:
+            if dry_run:
+                return True, format_report(plan.dry_run(self.df), dry_run=True)
+            
+            self.df, report = plan.apply(self.df)
+            
+            # บันทึกไฟล์
+            save_dataset(self.df, self.data_file)
+            
+            return True, format_report(report)
         
-        return summary
+        except Exception as e:
+            return False, f"เกิดข้อผิดพลาด: {str(e)}"
     
     def remove_missing_values(self) -> Tuple[bool, str]:
         """
@@ -114,22 +431,22 @@ class DataValidator:
             return False, "ไม่มีข้อมูล"
         
         try:
-            original_len = len(self.df)
-            self.df = self.df.dropna()
-            new_len = len(self.df)
-            removed = original_len - new_len
+            self.df, report = CleaningPlan().dropna().apply(self.df)
             
             # บันทึกไฟล์
-            self.df.to_csv(self.data_file, index=False)
+            save_dataset(self.df, self.data_file)
             
-            return True, f"ลบแถวที่มีค่าว่าง {removed} แถว"
+            return True, f"ลบแถวที่มีค่าว่าง {report['rows_removed']} แถว"
         
         except Exception as e:
             return False, f"เกิดข้อผิดพลาด: {str(e)}"
     
-    def remove_duplicates(self) -> Tuple[bool, str]:
+    def remove_duplicates(self, subset: Optional[List[str]] = None) -> Tuple[bool, str]:
         """
-        ลบแถวซ้ำ
+        ลบแถวซ้ำ (เก็บแถวแรก)
+
+        Args:
+            subset: ตรวจซ้ำเฉพาะคอลัมน์เหล่านี้ เช่น ['barcode'] (None = ทั้งแถว)
 
         Returns:
             (สำเร็จ, ข้อความ)
@@ -138,13 +455,28 @@ class DataValidator:
             return False, "ไม่มีข้อมูล"
         
         try:
+            subset = self._parse_subset(subset)
+            if self.check_duplicates(subset) == 0:
+                return True, "ไม่มีแถวซ้ำ"
+            
+            # hash ซ้ำเป็นเพียงแถวที่อาจซ้ำ: ยืนยันด้วยการเทียบค่าจริงเฉพาะแถวเหล่านั้น
+            hashes = hash_rows(self.df, subset)
+            candidates = pd.Series(hashes).duplicated(keep=False).to_numpy()
+            keep = np.ones(len(self.df), dtype=bool)
+            keep[candidates] = ~self.df[candidates].duplicated(subset=subset).to_numpy()
             original_len = len(self.df)
-            self.df = self.df.drop_duplicates()
-            new_len = len(self.df)
-            removed = original_len - new_len
+            self.df = self.df[keep].reset_index(drop=True)
+            removed = original_len - len(self.df)
             
             # บันทึกไฟล์
-            self.df.to_csv(self.data_file, index=False)
+            save_dataset(self.df, self.data_file)
+            
+            # hash ที่เหลือไม่ซ้ำแล้ว: บันทึก index ใหม่ได้ทันที
+            meta = read_meta(self.data_file)
+            if meta is not None:
+                index = RowHashIndex(self.data_file, subset)
+                index.add(hashes[keep])
+                index.save(meta['version'])
             
             return True, f"ลบแถวซ้ำ {removed} แถว"
         
@@ -0,0 +1,241 @@
+"""
+โมดูลแคช DataFrame ที่ใช้ร่วมกันทั้งโปรเซส (DataLoader, DataValidator, ProductManager)
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+
+from modules.data_store import (
+    read_table, write_table, read_meta, update_meta, dataset_signature, read_journal, append_journal,
+    describe_frame
+)
+from modules.dtype_optimizer import infer_schema, apply_schema
+from modules.file_lock import dataset_lock
+from modules.mutation_journal import JOURNAL_COMPACT_OPS, describe_entries, replay
+
+
+class DatasetCache:
+    """
+    แคช DataFrame ตามที่อยู่ไฟล์ โดยผูกกับลายเซ็นไฟล์ (mtime, ขนาด, content hash)
+
+    DataFrame ที่ได้จากแคชเป็นอ็อบเจกต์เดียวกันสำหรับทุกโมดูล
+    ผู้ใช้ห้ามแก้ไขแบบ in-place (ให้ copy ก่อนแก้ไข)
+    """
+
+    def __init__(self, max_entries: int = 4):
+        """
+        Args:
+            max_entries: จำนวนไฟล์สูงสุดที่เก็บในแคช
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Tuple, pd.DataFrame]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(path) -> str:
+        return str(Path(path).resolve())
+
+    @staticmethod
+    def signature(path) -> Optional[Tuple]:
+        """
+        ลายเซ็นของไฟล์สำหรับตรวจว่าไฟล์เปลี่ยนหรือไม่
+
+        Returns:
+            (mtime_ns, ขนาด, mtime_ns ของ manifest segment, ขนาด journal, content hash จาก metadata)
+            หรือ None ถ้าไม่พบไฟล์
+        """
+        file_signature = dataset_signature(path)
+        if file_signature is None:
+            return None
+        meta = read_meta(path)
+        return file_signature + (meta['content_hash'] if meta else None,)
+
+    def get(self, path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        ดึง DataFrame จากแคช (อ่านไฟล์ใหม่เมื่อไฟล์เปลี่ยน)
+
+        Args:
+            path: ที่อยู่ไฟล์ข้อมูล
+            columns: เลือกเฉพาะคอลัมน์ (None = ทุกคอลัมน์)
+
+        Returns:
+            DataFrame ที่ใช้ร่วมกัน (ถ้าระบุ columns จะได้สำเนาเฉพาะคอลัมน์)
+        """
+        key = self._key(path)
+        with self._lock:
+            signature = self.signature(path)
+            entry = self._entries.get(key)
+            if entry is not None and signature is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                df = entry[1]
+                return df[columns] if columns else df
+
+            self.misses += 1
+            if columns and entry is None:
+                # โหลดเฉพาะคอลัมน์โดยไม่เก็บในแคช
+                return read_optimized(path, columns=columns)
+
+            df = read_optimized(path)
+            self._store(key, signature, df)
+            return df[columns] if columns else df
+
+    def put(self, path, df: pd.DataFrame) -> None:
+        """
+        เก็บ DataFrame ที่เพิ่งเขียนลงไฟล์เข้าแคช
+
+        Args:
+            path: ที่อยู่ไฟล์ข้อมูล
+            df: DataFrame ที่ตรงกับเนื้อหาไฟล์
+        """
+        with self._lock:
+            signature = self.signature(path)
+            if signature is None:
+                self._entries.pop(self._key(path), None)
+                return
+            self._store(self._key(path), signature, df)
+
+    def _store(self, key: str, signature: Tuple, df: pd.DataFrame) -> None:
+        self._entries[key] = (signature, df)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def is_shared(self, df: pd.DataFrame) -> bool:
+        """ตรวจสอบว่า DataFrame นี้เป็นอ็อบเจกต์ที่อยู่ในแคชหรือไม่"""
+        with self._lock:
+            return any(entry[1] is df for entry in self._entries.values())
+
+    def invalidate(self, path=None) -> None:
+        """
+        ล้างแคช
+
+        Args:
+            path: ล้างเฉพาะไฟล์นี้ (None = ล้างทั้งหมด)
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self._key(path), None)
+
+    def stats(self) -> Dict[str, int]:
+        """สถิติการใช้แคช"""
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+def read_optimized(path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    อ่านไฟล์ข้อมูลแล้วแปลงประเภทข้อมูลตาม schema ที่บันทึกใน metadata
+    ถ้ายังไม่มี schema จะหาจากข้อมูลที่อ่าน (ทุกคอลัมน์) แล้วบันทึกไว้ใช้ครั้งถัดไป
+    การแก้ไขรายแถวที่ค้างใน journal จะถูกทำต่อจากข้อมูลในไฟล์
+
+    Args:
+        path: ที่อยู่ไฟล์ข้อมูล
+        columns: เลือกเฉพาะคอลัมน์ (None = ทุกคอลัมน์)
+
+    Returns:
+        DataFrame ที่ลดขนาดประเภทข้อมูลแล้ว
+    """
+    entries = read_journal(path)
+    if entries and columns:
+        # การแก้ไขใน journal อ้างอิงทั้งแถว: อ่านทุกคอลัมน์แล้วค่อยเลือก
+        return read_optimized(path)[list(columns)]
+
+    df = read_table(path, columns=columns)
+    meta = read_meta(path)
+    schema = meta.get('schema') if meta else None
+    if schema is None:
+        if columns:
+            return df
+        schema = infer_schema(df)
+        update_meta(path, schema=schema)
+    df = apply_schema(df, schema)
+    return replay(df, entries) if entries else df
+
+
+# แคชที่ใช้ร่วมกันทั้งโปรเซส
+dataset_cache = DatasetCache()
+
+
+def load_dataset(path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    โหลดไฟล์ข้อมูลผ่านแคชร่วม
+
+    Args:
+        path: ที่อยู่ไฟล์ข้อมูล
+        columns: เลือกเฉพาะคอลัมน์ (None = ทุกคอลัมน์)
+
+    Returns:
+        DataFrame (ห้ามแก้ไขแบบ in-place)
+    """
+    return dataset_cache.get(path, columns=columns)
+
+
+def save_dataset(df: pd.DataFrame, path) -> None:
+    """
+    บันทึก DataFrame ลงไฟล์และอัปเดตแคชร่วมให้ตรงกับไฟล์ใหม่
+
+    Args:
+        df: DataFrame ที่ต้องการบันทึก
+        path: ที่อยู่ไฟล์ข้อมูล
+    """
+    with dataset_lock(path):
+        try:
+            write_table(df, path)
+        except Exception:
+            dataset_cache.invalidate(path)
+            raise
+        dataset_cache.put(path, df)
+
+
+def journal_dataset(df: pd.DataFrame, path, entries: List[Dict]) -> None:
+    """
+    บันทึกการแก้ไขรายแถวลง journal แทนการเขียนทั้งไฟล์ และอัปเดตแคชร่วม
+    รวม journal เข้าไฟล์หลักเมื่อมีรายการครบ JOURNAL_COMPACT_OPS
+    (หรือเขียนทั้งไฟล์ถ้ายังไม่มีไฟล์ / metadata ไม่ตรงกับไฟล์)
+
+    Args:
+        df: DataFrame หลังแก้ไข (ตรงกับไฟล์ + journal)
+        path: ที่อยู่ไฟล์ข้อมูล
+        entries: รายการแก้ไขจาก mutation_journal
+    """
+    with dataset_lock(path):
+        if len(entries) >= JOURNAL_COMPACT_OPS:
+            # ชุดใหญ่: เขียนทั้งไฟล์ครั้งเดียวเลย ไม่ต้องต่อ journal แล้วรวมซ้ำ
+            save_dataset(df, path)
+            return
+
+        try:
+            meta = read_meta(path)
+            # ปรับจำนวนแถว / ค่าว่างจากรายการแก้ไข ไม่ต้องนับใหม่ทั้ง DataFrame ทุกครั้งที่แก้ไข
+            fields = describe_entries(meta, df, entries) if meta is not None else None
+            meta = append_journal(path, entries, **(fields or describe_frame(df)))
+        except Exception:
+            dataset_cache.invalidate(path)
+            raise
+
+        if meta is None or meta['journal_ops'] >= JOURNAL_COMPACT_OPS:
+            save_dataset(df, path)
+        else:
+            dataset_cache.put(path, df)
+
+
+def compact_journal(path) -> bool:
+    """
+    รวมการแก้ไขที่ค้างใน journal เข้าไฟล์หลัก (ใช้ก่อนอ่านไฟล์โดยตรงทีละ chunk หรือต่อท้ายข้อมูล)
+
+    Returns:
+        True ถ้ามีการรวม
+    """
+    with dataset_lock(path):
+        if not read_journal(path):
+            return False
+        save_dataset(load_dataset(path), path)
+        return True
@@ -0,0 +1,172 @@
+"""
+โมดูลสำหรับลดขนาดประเภทข้อมูล (downcast ตัวเลข / แปลงข้อความที่ซ้ำกันมากเป็น category)
+"""
+
+from typing import Dict
+import numpy as np
+import pandas as pd
+
+
+# ข้อความที่มีจำนวนค่าไม่ซ้ำไม่เกินสัดส่วนนี้ของจำนวนแถวจะถูกแปลงเป็น category
+CATEGORY_RATIO = 0.5
+# จำนวนค่าไม่ซ้ำสูงสุดของคอลัมน์ category
+MAX_CATEGORIES = 10_000
+
+_INTEGER_TYPES = ('uint8', 'int8', 'uint16', 'int16', 'uint32', 'int32', 'int64')
+
+
+def _smallest_integer(series: pd.Series) -> str:
+    """ประเภทจำนวนเต็มที่เล็กที่สุดที่เก็บค่าทั้งหมดได้"""
+    if len(series) == 0:
+        return str(series.dtype)
+    low, high = series.min(), series.max()
+    for dtype in _INTEGER_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return str(series.dtype)
+
+
+def _smallest_float(series: pd.Series) -> str:
+    """float32 ถ้าแปลงแล้วค่าไม่เปลี่ยน ไม่เช่นนั้นคงเดิม"""
+    values = series.to_numpy()
+    if values.dtype == np.float64 and np.array_equal(values.astype(np.float32), values, equal_nan=True):
+        return 'float32'
+    return str(series.dtype)
+
+
+def infer_schema(df: pd.DataFrame, category_ratio: float = CATEGORY_RATIO,
+                 max_categories: int = MAX_CATEGORIES) -> Dict[str, str]:
+    """
+    หาประเภทข้อมูลที่เล็กที่สุดที่ปลอดภัยของแต่ละคอลัมน์
+
+    Args:
+        df: DataFrame
+        category_ratio: สัดส่วนค่าไม่ซ้ำสูงสุดต่อจำนวนแถวสำหรับ category
+        max_categories: จำนวนค่าไม่ซ้ำสูงสุดสำหรับ category
+
+    Returns:
+        dict ชื่อคอลัมน์ -> ประเภทข้อมูล (เช่น 'int16', 'float32', 'category')
+    """
+    schema = {}
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            dtype = 'bool'
+        elif pd.api.types.is_integer_dtype(series):
+            dtype = _smallest_integer(series)
+        elif pd.api.types.is_float_dtype(series):
+            dtype = _smallest_float(series)
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            dtype = 'category'
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            unique = series.nunique(dropna=True)
+            is_text = pd.api.types.infer_dtype(series, skipna=True) == 'string'
+            if is_text and unique <= max_categories and unique <= category_ratio * max(1, len(series)):
+                dtype = 'category'
+            else:
+                dtype = str(series.dtype)
+        else:
+            dtype = str(series.dtype)
+        schema[str(col)] = dtype
+    return schema
+
+
+def apply_schema(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    """
+    แปลงประเภทข้อมูลตาม schema (คอลัมน์ที่แปลงไม่ได้จะคงประเภทเดิม)
+
+    Args:
+        df: DataFrame
+        schema: dict ชื่อคอลัมน์ -> ประเภทข้อมูล
+
+    Returns:
+        DataFrame ใหม่ (หรือ df เดิมถ้าไม่มีคอลัมน์ที่ต้องแปลง)
+    """
+    converted = {}
+    for col in df.columns:
+        dtype = schema.get(str(col))
+        if dtype is None or str(df[col].dtype) == dtype:
+            continue
+        try:
+            converted[col] = df[col].astype(dtype)
+        except (TypeError, ValueError, OverflowError):
+            continue
+
+    if not converted:
+        return df
+    result = df.copy(deep=False)
+    for col, series in converted.items():
+        result[col] = series
+    return result
+
+
+def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """ลดขนาดประเภทข้อมูลของ DataFrame (infer_schema + apply_schema)"""
+    return apply_schema(df, infer_schema(df))
+
+
+def _widened_dtype(dtype: np.dtype, value) -> np.dtype:
+    """
+    ประเภทข้อมูลตัวเลขที่เก็บค่าใหม่ได้ตรงทุกหลัก
+    (ค่าที่พอดีกับประเภทเดิมคงประเภทเดิม ไม่พอดีขยายเป็น int64 / float64 ไม่ใช่ประเภทเล็กที่สุดของค่า)
+    """
+    if isinstance(value, (int, np.integer)):
+        if dtype.kind in 'iu':
+            info = np.iinfo(dtype)
+            if info.min <= value <= info.max:
+                return dtype
+            if -2 ** 63 <= value < 2 ** 63:
+                return np.dtype(np.int64)
+            if 0 <= value < 2 ** 64:
+                return np.dtype(np.uint64)
+            return np.dtype(object)
+        return dtype if float(dtype.type(value)) == value else np.dtype(np.float64)
+
+    value = float(value)
+    if dtype.kind == 'f':
+        # เทียบเป็น float ของ Python (numpy 2 เทียบ float32 กับ float ในความละเอียด float32)
+        return dtype if value != value or float(dtype.type(value)) == value else np.dtype(np.float64)
+    if value.is_integer():
+        info = np.iinfo(dtype)
+        if info.min <= value <= info.max:
+            return dtype
+    return np.dtype(np.float64)
+
+
+def _nullable_dtype(dtype: np.dtype) -> str:
+    """ชื่อประเภทแบบ nullable ของ pandas ที่ตรงกับ numpy dtype (เช่น int64 -> Int64)"""
+    if dtype.kind == 'u':
+        return 'UInt' + dtype.name[4:]
+    return dtype.name.capitalize()
+
+
+def set_value(df: pd.DataFrame, index, column, value) -> None:
+    """
+    กำหนดค่าหนึ่งช่องแบบ in-place โดยขยายประเภทข้อมูลของคอลัมน์ก่อนถ้าจำเป็น
+    (เพิ่ม category ใหม่ หรือขยายตัวเลขที่ downcast ไว้ให้เก็บค่าใหม่ได้ตรงทุกหลัก)
+
+    Args:
+        df: DataFrame ที่จะแก้ไข
+        index: index ของแถว
+        column: ชื่อคอลัมน์
+        value: ค่าใหม่
+    """
+    if column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            if not pd.isna(value) and value not in series.cat.categories:
+                df[column] = series.cat.add_categories([value])
+        elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            # คอลัมน์ nullable (Int64 / Float32 ฯลฯ) เก็บค่าว่างได้อยู่แล้ว
+            nullable = isinstance(series.dtype, pd.api.extensions.ExtensionDtype)
+            current = series.dtype.numpy_dtype if nullable else series.dtype
+            if pd.isna(value):
+                target = current if nullable else np.result_type(current, np.float64)
+            elif isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_)):
+                target = _widened_dtype(current, value)
+            else:
+                target = np.dtype(object)
+            if target != current:
+                df[column] = series.astype(_nullable_dtype(target) if nullable and target != object else target)
+    df.at[index, column] = value
@@ -0,0 +1,130 @@
+"""
+โมดูลสำหรับล็อกไฟล์ข้อมูลข้ามโปรเซส (หลายเครื่องสแกน / หลายโปรแกรมใช้ไฟล์ข้อมูลเดียวกัน)
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    # Windows
+    import msvcrt
+    FCNTL_AVAILABLE = False
+
+
+LOCK_SUFFIX = ".lock"
+# เวลารอล็อกสูงสุด (วินาที)
+DEFAULT_LOCK_TIMEOUT = 30.0
+_POLL_INTERVAL = 0.002
+_MAX_POLL_INTERVAL = 0.05
+
+
+class FileLock:
+    """
+    ล็อกแบบ exclusive ข้ามโปรเซสด้วยไฟล์ล็อก
+    เรียกซ้อนกันได้ใน thread เดียวกัน (ล็อกไฟล์จริงครั้งแรก และปลดเมื่อออกจากชั้นนอกสุด)
+    """
+
+    def __init__(self, lock_file, timeout: float = DEFAULT_LOCK_TIMEOUT):
+        """
+        Args:
+            lock_file: ที่อยู่ไฟล์ล็อก
+            timeout: เวลารอล็อกสูงสุด (วินาที)
+        """
+        self.lock_file = Path(lock_file)
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+
+    def acquire(self, timeout: Optional[float] = None) -> None:
+        """
+        รอจนได้ล็อก
+
+        Raises:
+            TimeoutError: รอนานเกิน timeout
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        if not self._lock.acquire(timeout=timeout):
+            raise TimeoutError(f"รอล็อกไฟล์นานเกินไป: {self.lock_file}")
+        try:
+            if self._depth == 0:
+                self._fd = self._lock_file(deadline)
+            self._depth += 1
+        except BaseException:
+            self._lock.release()
+            raise
+
+    def release(self) -> None:
+        """ปลดล็อก"""
+        self._depth -= 1
+        try:
+            if self._depth == 0:
+                fd, self._fd = self._fd, None
+                try:
+                    if FCNTL_AVAILABLE:
+                        fcntl.flock(fd, fcntl.LOCK_UN)
+                    else:
+                        os.lseek(fd, 0, os.SEEK_SET)
+                        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+                finally:
+                    os.close(fd)
+        finally:
+            self._lock.release()
+
+    def _lock_file(self, deadline: float) -> int:
+        self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o666)
+        interval = _POLL_INTERVAL
+        while True:
+            try:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                return fd
+            except OSError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise TimeoutError(f"รอล็อกไฟล์นานเกินไป: {self.lock_file}")
+                time.sleep(interval)
+                interval = min(interval * 2, _MAX_POLL_INTERVAL)
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+
+_locks: Dict[str, FileLock] = {}
+_locks_guard = threading.Lock()
+
+
+def dataset_lock(path) -> FileLock:
+    """
+    ล็อกของไฟล์ข้อมูล (<ไฟล์ข้อมูล>.lock)
+    ใช้อ็อบเจกต์เดียวกันทั้งโปรเซสสำหรับไฟล์เดียวกัน เพื่อให้ฟังก์ชันที่ล็อกอยู่เรียกกันเองได้
+
+    Args:
+        path: ที่อยู่ไฟล์ข้อมูล
+
+    Returns:
+        FileLock
+    """
+    path = Path(path)
+    key = str(path.resolve())
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = FileLock(path.with_name(path.name + LOCK_SUFFIX))
+            _locks[key] = lock
+        return lock
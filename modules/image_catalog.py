@@ -0,0 +1,385 @@
+"""
+โมดูลสำหรับ catalog ไฟล์ภาพ (SQLite) แทนการวนอ่านโฟลเดอร์ทุกครั้ง
+"""
+
+import hashlib
+import os
+import sqlite3
+import struct
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from modules.image_importer import IMAGE_EXTENSIONS
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    name TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    format TEXT,
+    label TEXT,
+    ingested_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_images_hash ON images(hash);
+CREATE INDEX IF NOT EXISTS idx_images_label ON images(label);
+CREATE TABLE IF NOT EXISTS sources (
+    key TEXT PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS perceptual_hashes (
+    hash TEXT PRIMARY KEY,
+    ahash INTEGER NOT NULL,
+    dhash INTEGER NOT NULL,
+    phash INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+# จำนวนพารามิเตอร์สูงสุดต่อคำสั่ง IN (...)
+_MAX_IN_PARAMS = 500
+
+
+def _to_signed(value: int) -> int:
+    """แปลง hash 64 บิตเป็นจำนวนเต็มมีเครื่องหมาย (ชนิด INTEGER ของ SQLite)"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def read_image_info(path) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+    """
+    อ่านรูปแบบและขนาดภาพจาก header ของไฟล์ (ไม่ต้อง decode ภาพ)
+
+    Args:
+        path: ที่อยู่ไฟล์ภาพ
+
+    Returns:
+        (รูปแบบ, กว้าง, สูง) หรือ None ในตำแหน่งที่อ่านไม่ได้
+    """
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(32)
+            if head.startswith(b'\x89PNG\r\n\x1a\n') and len(head) >= 24:
+                width, height = struct.unpack('>II', head[16:24])
+                return 'PNG', width, height
+            if head[:6] in (b'GIF87a', b'GIF89a'):
+                width, height = struct.unpack('<HH', head[6:10])
+                return 'GIF', width, height
+            if head.startswith(b'BM') and len(head) >= 26:
+                width, height = struct.unpack('<ii', head[18:26])
+                return 'BMP', width, abs(height)
+            if head.startswith(b'\xff\xd8'):
+                return ('JPEG',) + _read_jpeg_size(f)
+    except (OSError, struct.error, IndexError):
+        pass
+    return None, None, None
+
+
+def _read_jpeg_size(f) -> Tuple[Optional[int], Optional[int]]:
+    """หาขนาดภาพ JPEG จาก marker SOF"""
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None, None
+        code = marker[1]
+        while code == 0xFF:
+            code = f.read(1)[0]
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        length = struct.unpack('>H', f.read(2))[0]
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack('>xHH', f.read(5))
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def hash_file(path, block_size: int = 1 << 20) -> str:
+    """คำนวณ hash ของเนื้อหาไฟล์ (BLAKE2b แบบเดียวกับ ImageImporter)"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ImageCatalog:
+    """คลาสสำหรับ catalog ไฟล์ภาพ (path, hash, ขนาด, มิติภาพ, รูปแบบ, label, เวลานำเข้า)"""
+
+    def __init__(self, images_dir: str, db_path: Optional[str] = None):
+        """
+        Args:
+            images_dir: ที่อยู่โฟลเดอร์เก็บภาพ
+            db_path: ที่อยู่ไฟล์ฐานข้อมูล (None = <โฟลเดอร์ข้อมูล>/image_catalog.db)
+        """
+        self.images_dir = Path(images_dir)
+        self.db_path = Path(db_path) if db_path else self.images_dir.parent / "image_catalog.db"
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        """ปิดการเชื่อมต่อฐานข้อมูล"""
+        with self._lock:
+            self._conn.close()
+
+    # ============ บันทึก ============
+
+    def add_images(self, records: Iterable[Dict]) -> None:
+        """
+        เพิ่ม/อัปเดตข้อมูลภาพหลายรายการในครั้งเดียว
+
+        Args:
+            records: dict ที่มี name, hash และ (ถ้ามี) label
+                     ขนาด มิติภาพ และรูปแบบจะอ่านจากไฟล์ที่จัดเก็บ
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        rows = []
+        for record in records:
+            path = self.images_dir / record['name']
+            stat = path.stat()
+            image_format, width, height = read_image_info(path)
+            rows.append((record['name'], record['hash'], stat.st_size, stat.st_mtime_ns,
+                         width, height, image_format, record.get('label'), now))
+
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO images (name, hash, size, mtime_ns, width, height, format, label, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET hash=excluded.hash, size=excluded.size, "
+                "mtime_ns=excluded.mtime_ns, width=excluded.width, height=excluded.height, "
+                "format=excluded.format, label=COALESCE(excluded.label, images.label)",
+                rows
+            )
+            self._conn.commit()
+
+    def add_sources(self, sources: Dict[str, str]) -> None:
+        """
+        บันทึกคีย์ไฟล์ต้นฉบับที่นำเข้าแล้ว
+
+        Args:
+            sources: dict คีย์ไฟล์ต้นฉบับ -> hash
+        """
+        if not sources:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sources (key, hash) VALUES (?, ?)", list(sources.items())
+            )
+            self._conn.commit()
+
+    def set_label(self, names: List[str], label: Optional[str]) -> None:
+        """กำหนด label ให้ภาพตามชื่อไฟล์"""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE images SET label = ? WHERE name = ?", [(label, name) for name in names]
+            )
+            self._conn.commit()
+
+    def add_perceptual_hashes(self, records: Dict[str, Dict[str, int]]) -> None:
+        """
+        บันทึก perceptual hash ของภาพ
+
+        Args:
+            records: dict hash เนื้อหา -> dict (ahash, dhash, phash)
+        """
+        if not records:
+            return
+        rows = [(content_hash, _to_signed(hashes['ahash']), _to_signed(hashes['dhash']),
+                 _to_signed(hashes['phash']))
+                for content_hash, hashes in records.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO perceptual_hashes (hash, ahash, dhash, phash) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    # ============ อ่าน ============
+
+    def load_hashes(self) -> Dict[str, str]:
+        """dict hash -> ชื่อไฟล์ที่จัดเก็บ"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT hash, name FROM images"))
+
+    def load_sources(self) -> Dict[str, str]:
+        """dict คีย์ไฟล์ต้นฉบับ -> hash"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT key, hash FROM sources"))
+
+    def count(self, label: Optional[str] = None) -> int:
+        """
+        นับจำนวนภาพ
+
+        Args:
+            label: นับเฉพาะ label นี้ (None = ทั้งหมด)
+        """
+        with self._lock:
+            if label is None:
+                return self._conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM images WHERE label = ?", (label,)
+            ).fetchone()[0]
+
+    def list_names(self, label: Optional[str] = None, offset: int = 0,
+                   limit: Optional[int] = None) -> List[str]:
+        """
+        ดึงรายชื่อไฟล์ภาพเรียงตามชื่อ (แบ่งหน้าได้)
+
+        Args:
+            label: เฉพาะ label นี้ (None = ทั้งหมด)
+            offset: ข้ามกี่รายการ
+            limit: จำนวนสูงสุด (None = ทั้งหมด)
+        """
+        query = "SELECT name FROM images"
+        params: list = []
+        if label is not None:
+            query += " WHERE label = ?"
+            params.append(label)
+        query += " ORDER BY name LIMIT ? OFFSET ?"
+        params.extend([-1 if limit is None else limit, offset])
+        with self._lock:
+            return [row[0] for row in self._conn.execute(query, params)]
+
+    def get_images(self, label: Optional[str] = None, offset: int = 0,
+                   limit: Optional[int] = None) -> List[Dict]:
+        """ดึงข้อมูลภาพแบบเต็ม (แบ่งหน้าได้)"""
+        query = ("SELECT name, hash, size, mtime_ns, width, height, format, label, ingested_at "
+                 "FROM images")
+        params: list = []
+        if label is not None:
+            query += " WHERE label = ?"
+            params.append(label)
+        query += " ORDER BY name LIMIT ? OFFSET ?"
+        params.extend([-1 if limit is None else limit, offset])
+        columns = ['name', 'hash', 'size', 'mtime_ns', 'width', 'height', 'format', 'label', 'ingested_at']
+        with self._lock:
+            return [dict(zip(columns, row)) for row in self._conn.execute(query, params)]
+
+    def get_images_by_names(self, names: List[str]) -> List[Dict]:
+        """ดึงข้อมูลภาพตามชื่อไฟล์ (name, hash, label) ค้นด้วย primary key ครั้งละไม่เกิน 500 ชื่อ"""
+        wanted = list(dict.fromkeys(names))
+        rows = []
+        with self._lock:
+            for start in range(0, len(wanted), _MAX_IN_PARAMS):
+                part = wanted[start:start + _MAX_IN_PARAMS]
+                rows.extend(self._conn.execute(
+                    f"SELECT name, hash, label FROM images WHERE name IN ({', '.join('?' * len(part))})",
+                    part).fetchall())
+        # เรียงตามชื่อไฟล์ เช่นเดียวกับ get_images
+        rows.sort()
+        return [{'name': name, 'hash': content_hash, 'label': label} for name, content_hash, label in rows]
+
+    def load_perceptual_hashes(self, hashes: Optional[List[str]] = None) -> Dict[str, Dict[str, int]]:
+        """
+        dict hash เนื้อหา -> dict (ahash, dhash, phash)
+
+        Args:
+            hashes: เฉพาะ hash เนื้อหาเหล่านี้ (None = ทั้งหมด)
+        """
+        query = "SELECT hash, ahash, dhash, phash FROM perceptual_hashes"
+        with self._lock:
+            if hashes is None:
+                rows = self._conn.execute(query).fetchall()
+            else:
+                wanted = list(dict.fromkeys(hashes))
+                rows = []
+                for start in range(0, len(wanted), _MAX_IN_PARAMS):
+                    part = wanted[start:start + _MAX_IN_PARAMS]
+                    rows.extend(self._conn.execute(
+                        f"{query} WHERE hash IN ({', '.join('?' * len(part))})", part).fetchall())
+        return {
+            content_hash: {'ahash': _to_unsigned(a), 'dhash': _to_unsigned(d), 'phash': _to_unsigned(p)}
+            for content_hash, a, d, p in rows
+        }
+
+    def label_counts(self) -> Dict[Optional[str], int]:
+        """จำนวนภาพแยกตาม label"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT label, COUNT(*) FROM images GROUP BY label"))
+
+    # ============ ตรวจสอบกับดิสก์ ============
+
+    def rescan(self, force: bool = False) -> Dict[str, int]:
+        """
+        ปรับ catalog ให้ตรงกับไฟล์ในโฟลเดอร์ (ข้ามถ้า mtime ของโฟลเดอร์ไม่เปลี่ยน)
+
+        Args:
+            force: สแกนแม้ mtime ของโฟลเดอร์ไม่เปลี่ยน
+
+        Returns:
+            dict (added, updated, removed, scanned)
+        """
+        result = {'added': 0, 'updated': 0, 'removed': 0, 'scanned': 0}
+        if not self.images_dir.exists():
+            return result
+
+        dir_mtime = str(self.images_dir.stat().st_mtime_ns)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM state WHERE key = 'dir_mtime_ns'").fetchone()
+        if not force and row is not None and row[0] == dir_mtime:
+            return result
+
+        with self._lock:
+            known = {name: (size, mtime_ns, content_hash) for name, size, mtime_ns, content_hash
+                     in self._conn.execute("SELECT name, size, mtime_ns, hash FROM images")}
+
+        changed = []
+        on_disk = set()
+        with os.scandir(self.images_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.is_file():
+                    continue
+                if Path(entry.name).suffix.lower() not in IMAGE_EXTENSIONS:
+                    continue
+                result['scanned'] += 1
+                on_disk.add(entry.name)
+                stat = entry.stat()
+                previous = known.get(entry.name)
+                if previous is not None and previous[:2] == (stat.st_size, stat.st_mtime_ns):
+                    continue
+                changed.append({'name': entry.name, 'hash': hash_file(entry.path)})
+                result['added' if previous is None else 'updated'] += 1
+
+        removed = [name for name in known if name not in on_disk]
+        result['removed'] = len(removed)
+
+        # hash เนื้อหาเดิมของภาพที่ถูกลบ/เปลี่ยน อาจไม่มีภาพใดอ้างถึงแล้ว
+        stale = [known[name][2] for name in removed]
+        stale.extend(known[record['name']][2] for record in changed if record['name'] in known)
+
+        self.add_images(changed)
+        with self._lock:
+            self._conn.executemany("DELETE FROM images WHERE name = ?", [(name,) for name in removed])
+            self._prune_perceptual_hashes(stale)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO state (key, value) VALUES ('dir_mtime_ns', ?)", (dir_mtime,)
+            )
+            self._conn.commit()
+
+        return result
+
+    def _prune_perceptual_hashes(self, hashes: List[str]) -> None:
+        """ลบ perceptual hash ของ hash เนื้อหาที่ไม่มีภาพใดอ้างถึงแล้ว (ต้องถือ lock และ commit เอง)"""
+        self._conn.executemany(
+            "DELETE FROM perceptual_hashes WHERE hash = ? "
+            "AND NOT EXISTS (SELECT 1 FROM images WHERE images.hash = perceptual_hashes.hash)",
+            [(content_hash,) for content_hash in set(hashes)]
+        )
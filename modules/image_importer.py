@@ -0,0 +1,285 @@
+"""
+โมดูลสำหรับนำเข้าไฟล์ภาพจำนวนมากแบบขนาน และจัดเก็บตาม hash ของเนื้อหา
+"""
+
+import glob
+import hashlib
+import os
+import tarfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif'}
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+COPY_BLOCK_SIZE = 1 << 20
+
+
+def is_image_name(name: str) -> bool:
+    """ตรวจสอบว่าชื่อไฟล์เป็นไฟล์ภาพที่รองรับหรือไม่"""
+    return Path(name).suffix.lower() in IMAGE_EXTENSIONS
+
+
+def is_archive_name(name: str) -> bool:
+    """ตรวจสอบว่าชื่อไฟล์เป็นไฟล์บีบอัดที่รองรับหรือไม่"""
+    return name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+class ImageImporter:
+    """คลาสสำหรับนำเข้าไฟล์ภาพแบบ content-addressed (ชื่อไฟล์ = hash ของเนื้อหา)"""
+
+    def __init__(self, images_dir: str, catalog=None, max_workers: Optional[int] = None):
+        """
+        Args:
+            images_dir: ที่อยู่โฟลเดอร์เก็บภาพ
+            catalog: ImageCatalog สำหรับบันทึกข้อมูลภาพ (None = ไม่บันทึก)
+            max_workers: จำนวน thread สำหรับคัดลอก (None = ตามจำนวน CPU)
+        """
+        self.images_dir = Path(images_dir)
+        self.images_dir.mkdir(parents=True, exist_ok=True)
+        self.catalog = catalog
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        self._lock = threading.Lock()
+        # sources: คีย์ไฟล์ต้นฉบับ (path, ขนาด, mtime) -> hash
+        # hashes: hash -> ชื่อไฟล์ที่จัดเก็บ
+        self._sources: Dict[str, str] = {}
+        self._hashes: Dict[str, str] = {}
+        # รายการที่ยังไม่ได้บันทึกลง catalog
+        self._pending_sources: Dict[str, str] = {}
+        self._pending_images: List[Dict] = []
+        self._load_index()
+    
+    def _load_index(self) -> None:
+        if self.catalog is not None:
+            self._sources = self.catalog.load_sources()
+            self._hashes = self.catalog.load_hashes()
+    
+    def save_index(self, label: Optional[str] = None) -> None:
+        """
+        บันทึกไฟล์ที่นำเข้าใหม่ลง catalog
+
+        Args:
+            label: label ของภาพที่นำเข้าครั้งนี้
+        """
+        with self._lock:
+            sources, self._pending_sources = self._pending_sources, {}
+            images, self._pending_images = self._pending_images, []
+        if self.catalog is None:
+            return
+        self.catalog.add_images(dict(image, label=label) for image in images)
+        self.catalog.add_sources(sources)
+    
+    @staticmethod
+    def _source_key(path: str, size: int, mtime_ns: int) -> str:
+        return f"{path}|{size}|{mtime_ns}"
+
+    def stored_name(self, content_hash: str, suffix: str) -> str:
+        """ชื่อไฟล์ที่จัดเก็บสำหรับ hash ที่กำหนด"""
+        return f"{content_hash}{suffix.lower()}"
+
+    def _store_stream(self, stream, suffix: str) -> Tuple[str, str, bool, int]:
+        """
+        คัดลอกจาก stream ไปยังไฟล์ชั่วคราวพร้อมคำนวณ hash (อ่านครั้งเดียว)
+
+        Returns:
+            (hash, ชื่อไฟล์ที่จัดเก็บ, เป็นไฟล์ใหม่หรือไม่, จำนวนไบต์)
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        tmp_path = self.images_dir / f".{uuid.uuid4().hex}.part"
+        size = 0
+        try:
+            with open(tmp_path, 'wb') as out:
+                for block in iter(lambda: stream.read(COPY_BLOCK_SIZE), b''):
+                    digest.update(block)
+                    out.write(block)
+                    size += len(block)
+
+            content_hash = digest.hexdigest()
+            with self._lock:
+                name = self._hashes.get(content_hash)
+                if name is None and (self.images_dir / self.stored_name(content_hash, suffix)).exists():
+                    # มีไฟล์อยู่แล้วแต่ยังไม่อยู่ใน index (เช่น เพิ่มโดย rescan)
+                    name = self.stored_name(content_hash, suffix)
+                    self._hashes[content_hash] = name
+                is_new = name is None or not (self.images_dir / name).exists()
+                if is_new:
+                    name = self.stored_name(content_hash, suffix)
+                    os.replace(tmp_path, self.images_dir / name)
+                    self._hashes[content_hash] = name
+                    self._pending_images.append({'name': name, 'hash': content_hash})
+            return content_hash, name, is_new, size
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def import_file(self, source: Path) -> Dict:
+        """
+        นำเข้าไฟล์ภาพหนึ่งไฟล์
+
+        Args:
+            source: ที่อยู่ไฟล์ภาพ
+
+        Returns:
+            dict ผลลัพธ์ (hash, name, status: imported/duplicate/known, bytes)
+        """
+        stat = source.stat()
+        key = self._source_key(str(source.resolve()), stat.st_size, stat.st_mtime_ns)
+
+        # ไฟล์ต้นฉบับเดิมที่เคยนำเข้าแล้ว: ไม่ต้องอ่านซ้ำ
+        with self._lock:
+            known_hash = self._sources.get(key)
+            known_name = self._hashes.get(known_hash) if known_hash else None
+        if known_name and (self.images_dir / known_name).exists():
+            return {'hash': known_hash, 'name': known_name, 'status': 'known', 'bytes': 0}
+
+        with open(source, 'rb') as stream:
+            content_hash, name, is_new, size = self._store_stream(stream, source.suffix)
+
+        with self._lock:
+            self._sources[key] = content_hash
+            self._pending_sources[key] = content_hash
+        return {'hash': content_hash, 'name': name,
+                'status': 'imported' if is_new else 'duplicate', 'bytes': size}
+
+    def import_archive(self, archive: Path) -> List[Dict]:
+        """
+        นำเข้าไฟล์ภาพทั้งหมดในไฟล์บีบอัด (.zip, .tar, .tar.gz)
+
+        Args:
+            archive: ที่อยู่ไฟล์บีบอัด
+
+        Returns:
+            list ผลลัพธ์ของแต่ละไฟล์ภาพ
+        """
+        archive_stat = archive.stat()
+        archive_path = str(archive.resolve())
+        results = []
+
+        def handle_member(member_name: str, member_size: int, open_member):
+            key = self._source_key(f"{archive_path}!{member_name}", member_size, archive_stat.st_mtime_ns)
+            with self._lock:
+                known_hash = self._sources.get(key)
+                known_name = self._hashes.get(known_hash) if known_hash else None
+            if known_name and (self.images_dir / known_name).exists():
+                results.append({'hash': known_hash, 'name': known_name, 'status': 'known', 'bytes': 0})
+                return
+
+            with open_member() as stream:
+                content_hash, name, is_new, size = self._store_stream(stream, Path(member_name).suffix)
+            with self._lock:
+                self._sources[key] = content_hash
+                self._pending_sources[key] = content_hash
+            results.append({'hash': content_hash, 'name': name,
+                            'status': 'imported' if is_new else 'duplicate', 'bytes': size})
+
+        if archive.name.lower().endswith('.zip'):
+            with zipfile.ZipFile(archive) as zf:
+                for info in zf.infolist():
+                    if not info.is_dir() and is_image_name(info.filename):
+                        handle_member(info.filename, info.file_size, lambda info=info: zf.open(info))
+        else:
+            with tarfile.open(archive) as tf:
+                for member in tf:
+                    if member.isfile() and is_image_name(member.name):
+                        handle_member(member.name, member.size, lambda member=member: tf.extractfile(member))
+
+        return results
+
+    def expand_sources(self, sources: Iterable[str]) -> Tuple[List[Path], List[Path]]:
+        """
+        แปลงรายการโฟลเดอร์ / glob / ไฟล์ เป็นรายการไฟล์ภาพและไฟล์บีบอัด
+
+        Returns:
+            (ไฟล์ภาพ, ไฟล์บีบอัด)
+        """
+        files, archives = [], []
+
+        def add(path: Path):
+            if is_image_name(path.name):
+                files.append(path)
+            elif is_archive_name(path.name):
+                archives.append(path)
+
+        for source in sources:
+            source = str(source)
+            if any(ch in source for ch in '*?['):
+                for match in glob.iglob(source, recursive=True):
+                    if os.path.isfile(match):
+                        add(Path(match))
+            elif os.path.isdir(source):
+                for root, _, names in os.walk(source):
+                    for name in names:
+                        add(Path(root) / name)
+            elif os.path.isfile(source):
+                add(Path(source))
+
+        return files, archives
+
+    def import_sources(self, sources: Iterable[str], label: Optional[str] = None,
+                       progress_callback: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        นำเข้าไฟล์ภาพจากโฟลเดอร์ glob หรือไฟล์บีบอัด แบบขนานด้วย thread pool
+
+        Args:
+            sources: รายการโฟลเดอร์ / glob pattern / ไฟล์ภาพ / ไฟล์บีบอัด
+            label: label ของภาพที่นำเข้า (เช่น ประเภทเนื้อ)
+            progress_callback: ฟังก์ชันรับ dict สถิติ (เรียกจาก thread ที่เรียกฟังก์ชันนี้)
+
+        Returns:
+            dict สถิติ (files, imported, duplicates, known, errors, bytes, seconds, files_per_sec, mb_per_sec)
+        """
+        files, archives = self.expand_sources(sources)
+        stats = {
+            'files': 0, 'imported': 0, 'duplicates': 0, 'known': 0, 'errors': [],
+            'bytes': 0, 'seconds': 0.0, 'files_per_sec': 0.0, 'mb_per_sec': 0.0,
+            'names': [],
+        }
+        started = time.perf_counter()
+
+        def record(result: Dict):
+            stats['files'] += 1
+            stats['bytes'] += result['bytes']
+            stats['names'].append(result['name'])
+            if result['status'] == 'imported':
+                stats['imported'] += 1
+            elif result['status'] == 'duplicate':
+                stats['duplicates'] += 1
+            else:
+                stats['known'] += 1
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.import_file, path): path for path in files}
+            futures.update({pool.submit(self.import_archive, path): path for path in archives})
+
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    stats['errors'].append(f"{futures[future].name}: {str(e)}")
+                    continue
+
+                for item in (result if isinstance(result, list) else [result]):
+                    record(item)
+
+                elapsed = time.perf_counter() - started
+                stats['seconds'] = elapsed
+                stats['files_per_sec'] = stats['files'] / elapsed if elapsed > 0 else 0.0
+                stats['mb_per_sec'] = stats['bytes'] / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+                if progress_callback is not None:
+                    progress_callback(dict(stats, total=len(files) + len(archives)))
+
+        self.save_index(label)
+        if label is not None and self.catalog is not None:
+            # ภาพซ้ำที่มีอยู่แล้วก็ได้ label นี้ด้วย
+            self.catalog.set_label(stats['names'], label)
+
+        elapsed = time.perf_counter() - started
+        stats['seconds'] = elapsed
+        stats['files_per_sec'] = stats['files'] / elapsed if elapsed > 0 else 0.0
+        stats['mb_per_sec'] = stats['bytes'] / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+        return stats
@@ -0,0 +1,271 @@
+"""
+โมดูลสำหรับหาภาพที่เกือบซ้ำกัน (ถ่ายซ้ำ / บันทึกใหม่ด้วยการบีบอัดต่างกัน)
+ด้วย perceptual hash (aHash / dHash / pHash) และ BK-tree
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+
+HASH_KINDS = ('ahash', 'dhash', 'phash')
+# ระยะ Hamming เริ่มต้น (จาก 64 บิต) ที่ถือว่าเป็นภาพเดียวกัน
+DEFAULT_MAX_DISTANCE = 8
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """เมทริกซ์ DCT-II ขนาด size x size"""
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size))
+    matrix[0] *= 1 / np.sqrt(2)
+    return matrix * np.sqrt(2 / size)
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    value = 0
+    for bit in bits.ravel():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def compute_hashes(path) -> Dict[str, int]:
+    """
+    คำนวณ perceptual hash 64 บิตของภาพ
+
+    Args:
+        path: ที่อยู่ไฟล์ภาพ
+
+    Returns:
+        dict (ahash, dhash, phash) -> จำนวนเต็ม 64 บิต
+    """
+    with Image.open(path) as image:
+        gray = image.convert('L')
+        small = np.asarray(gray.resize((8, 8), Image.BILINEAR), dtype=np.float32)
+        wide = np.asarray(gray.resize((9, 8), Image.BILINEAR), dtype=np.float32)
+        large = np.asarray(gray.resize((32, 32), Image.BILINEAR), dtype=np.float64)
+
+    # pHash: ความถี่ต่ำ 8x8 ของ DCT เทียบกับค่ามัธยฐาน
+    dct = (_DCT_32 @ large @ _DCT_32.T)[:8, :8]
+    return {
+        'ahash': _bits_to_int(small > small.mean()),
+        'dhash': _bits_to_int(wide[:, 1:] > wide[:, :-1]),
+        'phash': _bits_to_int(dct > np.median(dct.ravel()[1:])),
+    }
+
+
+def hamming(a: int, b: int) -> int:
+    """ระยะ Hamming ระหว่าง hash สองค่า"""
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """BK-tree สำหรับค้นหา hash ที่อยู่ในระยะ Hamming ที่กำหนด โดยไม่ต้องเทียบทุกค่า"""
+
+    def __init__(self):
+        # node: [hash, รายการ item, dict ระยะ -> node ลูก]
+        self._root = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item) -> None:
+        """เพิ่ม hash พร้อม item (hash ซ้ำจะเก็บรวมใน node เดียวกัน)"""
+        self._size += 1
+        if self._root is None:
+            self._root = [value, [item], {}]
+            return
+
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def remove(self, value: int, item) -> bool:
+        """
+        ลบ item ของ hash นี้ (node ว่างยังคงอยู่เพื่อเป็นทางผ่านไปยัง node ลูก)
+
+        Returns:
+            True ถ้าพบและลบ item
+        """
+        node = self._root
+        while node is not None:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                if item not in node[1]:
+                    return False
+                node[1].remove(item)
+                self._size -= 1
+                return True
+            node = node[2].get(distance)
+        return False
+
+    def query(self, value: int, max_distance: int) -> List[Tuple[object, int]]:
+        """
+        ค้นหา item ที่ hash อยู่ในระยะไม่เกิน max_distance
+
+        Returns:
+            list ของ (item, ระยะ)
+        """
+        if self._root is None:
+            return []
+        results = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                results.extend((item, distance) for item in node[1])
+            # อสมการสามเหลี่ยม: ลูกที่อยู่ในช่วงนี้เท่านั้นที่อาจมีค่าที่ต้องการ
+            low, high = distance - max_distance, distance + max_distance
+            stack.extend(child for d, child in node[2].items() if low <= d <= high)
+        return results
+
+
+class ImageSimilarityIndex:
+    """คลาสสำหรับ index perceptual hash ของภาพใน catalog (บันทึกใน catalog อัปเดตเฉพาะภาพใหม่)"""
+
+    def __init__(self, catalog, kind: str = 'phash', max_workers: Optional[int] = None):
+        """
+        Args:
+            catalog: ImageCatalog
+            kind: ชนิด hash ที่ใช้ค้นหา (ahash / dhash / phash)
+            max_workers: จำนวน thread สำหรับคำนวณ hash
+        """
+        if not PIL_AVAILABLE:
+            raise ImportError("ต้องติดตั้ง Pillow: pip install pillow")
+        if kind not in HASH_KINDS:
+            raise ValueError(f"ชนิด hash ไม่รองรับ: {kind}")
+
+        self.catalog = catalog
+        self.kind = kind
+        self.max_workers = max_workers
+        self._tree: Optional[BKTree] = None
+        # hash เนื้อหา -> ค่า hash ที่อยู่ใน BK-tree (ใช้ตอนลบออกจาก tree)
+        self._indexed: Dict[str, int] = {}
+
+    def _safe_hashes(self, name: str) -> Optional[Dict[str, int]]:
+        try:
+            return compute_hashes(self.catalog.images_dir / name)
+        except Exception:
+            return None
+
+    def update(self, names: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        คำนวณ hash ของภาพที่ยังไม่มี (แบบขนาน) แล้วบันทึกลง catalog และ BK-tree
+
+        Args:
+            names: เฉพาะภาพเหล่านี้ (None = ทุกภาพใน catalog)
+
+        Returns:
+            dict (computed, failed)
+        """
+        images = self.catalog.get_images() if names is None else self.catalog.get_images_by_names(list(names))
+        # ค้นเฉพาะ hash ของภาพที่ขอ ไม่โหลดทั้งตาราง
+        known = self.catalog.load_perceptual_hashes([image['hash'] for image in images])
+        pending = {}
+        for image in images:
+            if image['hash'] not in known and image['hash'] not in pending:
+                pending[image['hash']] = image['name']
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            computed = list(pool.map(self._safe_hashes, pending.values()))
+
+        records = {content_hash: hashes for content_hash, hashes in zip(pending, computed) if hashes is not None}
+        self.catalog.add_perceptual_hashes(records)
+
+        if self._tree is not None:
+            for content_hash, hashes in records.items():
+                self._add_to_tree(content_hash, hashes)
+
+        return {'computed': len(records), 'failed': len(pending) - len(records)}
+
+    def _add_to_tree(self, content_hash: str, hashes: Dict[str, int]) -> None:
+        if content_hash not in self._indexed:
+            self._tree.add(hashes[self.kind], content_hash)
+            self._indexed[content_hash] = hashes[self.kind]
+
+    def _drop_from_tree(self, hashes: Iterable[str]) -> None:
+        """ลบ hash เนื้อหาที่ catalog ลบไปแล้วออกจาก BK-tree"""
+        for content_hash in hashes:
+            value = self._indexed.pop(content_hash, None)
+            if value is not None and self._tree is not None:
+                self._tree.remove(value, content_hash)
+
+    def _query_live(self, value: int, max_distance: int) -> List[Tuple[str, int]]:
+        """ค้น BK-tree แล้วตัดผลที่ catalog ลบไปแล้ว (เช่น rescan จากอีก process) ออกจาก tree ด้วย"""
+        found = self._ensure_tree().query(value, max_distance)
+        live = self.catalog.load_perceptual_hashes([other for other, _ in found])
+        self._drop_from_tree(other for other, _ in found if other not in live)
+        return [(other, distance) for other, distance in found if other in live]
+
+    def _ensure_tree(self) -> BKTree:
+        if self._tree is None:
+            self._tree = BKTree()
+            for content_hash, hashes in self.catalog.load_perceptual_hashes().items():
+                self._add_to_tree(content_hash, hashes)
+        return self._tree
+
+    def find_similar(self, content_hash: str, max_distance: int = DEFAULT_MAX_DISTANCE) -> List[Tuple[str, int]]:
+        """
+        หาภาพที่คล้ายกับภาพ (ตาม hash เนื้อหา) ในระยะที่กำหนด
+
+        Returns:
+            list ของ (hash เนื้อหา, ระยะ) ไม่รวมภาพตัวเอง
+        """
+        hashes = self.catalog.load_perceptual_hashes([content_hash]).get(content_hash)
+        if hashes is None:
+            return []
+        return [(other, distance) for other, distance in self._query_live(hashes[self.kind], max_distance)
+                if other != content_hash]
+
+    def near_duplicate_groups(self, max_distance: int = DEFAULT_MAX_DISTANCE) -> List[List[str]]:
+        """
+        จัดกลุ่มภาพที่เกือบซ้ำกัน (ระยะ Hamming ไม่เกิน max_distance)
+
+        Returns:
+            list ของกลุ่มชื่อไฟล์ภาพ (เฉพาะกลุ่มที่มีมากกว่า 1 ภาพ)
+        """
+        self.update()
+        tree = self._ensure_tree()
+        hashes = self.catalog.load_perceptual_hashes()
+        self._drop_from_tree([content_hash for content_hash in self._indexed if content_hash not in hashes])
+
+        # union-find ของ hash เนื้อหาที่อยู่ใกล้กัน
+        parent = {content_hash: content_hash for content_hash in hashes}
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for content_hash, values in hashes.items():
+            for other, _ in tree.query(values[self.kind], max_distance):
+                if other in parent:
+                    parent[find(other)] = find(content_hash)
+
+        names_by_hash: Dict[str, List[str]] = {}
+        for image in self.catalog.get_images():
+            names_by_hash.setdefault(image['hash'], []).append(image['name'])
+
+        groups: Dict[str, List[str]] = {}
+        for content_hash in hashes:
+            groups.setdefault(find(content_hash), []).extend(names_by_hash.get(content_hash, []))
+        return [sorted(names) for names in groups.values() if len(names) > 1]
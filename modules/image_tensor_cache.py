@@ -0,0 +1,326 @@
+"""
+โมดูลสำหรับแคชภาพที่ decode/resize/normalize แล้ว เป็น shard แบบ memory-map สำหรับเทรน
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+
+INDEX_VERSION = 1
+# shard ที่มีแถวถูกลบเกินสัดส่วนนี้: คัดลอกเฉพาะแถวที่เหลือเป็นไฟล์ใหม่
+SHARD_COMPACT_RATIO = 0.5
+
+
+def decode_image(path, image_size: Tuple[int, int], dtype: str = 'float16') -> np.ndarray:
+    """
+    decode และ resize ภาพเป็น array (สูง, กว้าง, 3) ค่าอยู่ในช่วง [0, 1]
+
+    Args:
+        path: ที่อยู่ไฟล์ภาพ
+        image_size: (สูง, กว้าง)
+        dtype: ประเภทข้อมูลของผลลัพธ์
+
+    Returns:
+        numpy array
+    """
+    height, width = image_size
+    with Image.open(path) as image:
+        image = image.convert('RGB').resize((width, height), Image.BILINEAR)
+        array = np.asarray(image, dtype=np.float32)
+    return (array / 255.0).astype(dtype)
+
+
+class ImageTensorCache:
+    """คลาสสำหรับแคชภาพเป็น shard (.npy) ขนาดคงที่ อ่านแบบ memory-map ได้โดยไม่ต้อง decode ซ้ำ"""
+
+    def __init__(self, catalog, cache_dir: str = "data/cache/tensors",
+                 image_size: Tuple[int, int] = (128, 128), shard_size: int = 1024,
+                 dtype: str = 'float16'):
+        """
+        Args:
+            catalog: ImageCatalog ที่เป็นแหล่งรายการภาพและ label
+            cache_dir: ที่อยู่โฟลเดอร์เก็บ shard
+            image_size: ขนาดภาพหลัง resize (สูง, กว้าง)
+            shard_size: จำนวนภาพสูงสุดต่อ shard
+            dtype: ประเภทข้อมูลที่จัดเก็บ (float16 / float32)
+        """
+        if not PIL_AVAILABLE:
+            raise ImportError("ต้องติดตั้ง Pillow: pip install pillow")
+
+        self.catalog = catalog
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.image_size = tuple(image_size)
+        self.shard_size = shard_size
+        self.dtype = dtype
+        self.index_file = self.cache_dir / "index.json"
+        self.index = self._load_index()
+        self._shards: Dict[int, np.ndarray] = {}
+
+    # ============ index ============
+
+    def _empty_index(self) -> Dict:
+        return {
+            'version': INDEX_VERSION,
+            'image_size': list(self.image_size),
+            'dtype': self.dtype,
+            'labels': [],
+            'shards': [],
+            'hashes': {},
+            # hash เนื้อหา -> ชื่อไฟล์ของภาพที่ decode ไม่ได้ (ไม่ลองใหม่จนกว่าเนื้อหาจะเปลี่ยน)
+            'failed': {},
+        }
+
+    def _load_index(self) -> Dict:
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return self._empty_index()
+
+        # ตั้งค่าไม่ตรงกับแคชเดิม: เริ่มใหม่
+        if (index.get('version') != INDEX_VERSION or tuple(index.get('image_size', ())) != self.image_size
+                or index.get('dtype') != self.dtype):
+            self._remove_shards(index)
+            return self._empty_index()
+        index.setdefault('failed', {})
+        return index
+
+    def _save_index(self) -> None:
+        tmp_path = self.index_file.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_file)
+
+    def _remove_shards(self, index: Dict) -> None:
+        self._shards = {}
+        for shard in index.get('shards', []):
+            for key in ('file', 'labels_file'):
+                try:
+                    (self.cache_dir / shard[key]).unlink()
+                except FileNotFoundError:
+                    pass
+
+    def _label_id(self, label: Optional[str]) -> int:
+        if label is None:
+            return -1
+        labels = self.index['labels']
+        if label not in labels:
+            labels.append(label)
+        return labels.index(label)
+
+    # ============ สร้างแคช ============
+
+    def build(self, max_workers: Optional[int] = None,
+              progress_callback: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        สร้าง/อัปเดตแคช: decode เฉพาะภาพที่ยังไม่อยู่ในแคชและยังไม่เคย decode ไม่สำเร็จ
+        ภาพที่ถูกลบออกจาก catalog จะถูกทำเครื่องหมายลบใน shard (ไม่สร้างแคชใหม่ทั้งหมด)
+
+        Args:
+            max_workers: จำนวน thread สำหรับ decode
+            progress_callback: ฟังก์ชันรับ dict ความคืบหน้า
+
+        Returns:
+            dict (added, removed, total, shards, failed, skipped)
+        """
+        self.catalog.rescan()
+        images = self.catalog.get_images()
+        current = {image['hash']: image for image in images}
+
+        removed = self._remove_missing(current)
+        self._sync_labels(current)
+
+        failed = self.index['failed']
+        pending = [image for content_hash, image in current.items()
+                   if content_hash not in self.index['hashes'] and content_hash not in failed]
+        stats = {'added': 0, 'removed': removed, 'total': len(self.index['hashes']),
+                 'shards': len(self.index['shards']), 'failed': 0, 'skipped': len(failed)}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for start in range(0, len(pending), self.shard_size):
+                batch = pending[start:start + self.shard_size]
+                paths = [self.catalog.images_dir / image['name'] for image in batch]
+                arrays = list(pool.map(self._safe_decode, paths))
+                self._write_shard([(image, array) for image, array in zip(batch, arrays) if array is not None])
+                failed.update((image['hash'], image['name']) for image, array in zip(batch, arrays) if array is None)
+
+                stats['failed'] += sum(array is None for array in arrays)
+                stats['added'] += sum(array is not None for array in arrays)
+                stats['total'] = len(self.index['hashes'])
+                stats['shards'] = len(self.index['shards'])
+                if progress_callback is not None:
+                    progress_callback(dict(stats, pending=len(pending)))
+
+        self._save_index()
+        return stats
+
+    def _remove_missing(self, current: Dict[str, Dict]) -> int:
+        """ทำเครื่องหมายลบภาพที่ไม่อยู่ใน catalog แล้ว และคัดลอก shard ที่มีแถวถูกลบมากเป็นไฟล์ใหม่"""
+        gone = [content_hash for content_hash in self.index['hashes'] if content_hash not in current]
+        touched = set()
+        for content_hash in gone:
+            shard_id, offset = self.index['hashes'].pop(content_hash)
+            self.index['shards'][shard_id].setdefault('removed', []).append(offset)
+            touched.add(shard_id)
+        for content_hash in [h for h in self.index['failed'] if h not in current]:
+            del self.index['failed'][content_hash]
+
+        for shard_id in touched:
+            info = self.index['shards'][shard_id]
+            if len(info['removed']) > info['count'] * SHARD_COMPACT_RATIO:
+                self._compact_shard(shard_id)
+        return len(gone)
+
+    def _compact_shard(self, shard_id: int) -> None:
+        """เขียน shard ใหม่เฉพาะแถวที่ยังไม่ถูกลบ แล้วปรับตำแหน่งใน index"""
+        info = self.index['shards'][shard_id]
+        keep = self._live_rows(shard_id)
+        data = np.load(self.cache_dir / info['file'], mmap_mode='r')
+        labels = np.load(self.cache_dir / info['labels_file'])
+        self._shards.pop(shard_id, None)
+
+        generation = info.get('generation', 0) + 1
+        file_name = f"shard-{shard_id:05d}.{generation}.npy"
+        labels_name = f"shard-{shard_id:05d}.{generation}.labels.npy"
+        compacted = np.lib.format.open_memmap(self.cache_dir / file_name, mode='w+',
+                                              dtype=self.dtype, shape=(len(keep),) + data.shape[1:])
+        compacted[:] = data[keep]
+        compacted.flush()
+        del compacted, data
+        np.save(self.cache_dir / labels_name, labels[keep])
+
+        new_offset = {int(old): new for new, old in enumerate(keep)}
+        for location in self.index['hashes'].values():
+            if location[0] == shard_id:
+                location[1] = new_offset[location[1]]
+        for key in ('file', 'labels_file'):
+            (self.cache_dir / info[key]).unlink(missing_ok=True)
+        self.index['shards'][shard_id] = {'file': file_name, 'labels_file': labels_name,
+                                          'count': len(keep), 'generation': generation}
+
+    def _live_rows(self, shard_id: int) -> np.ndarray:
+        """ตำแหน่งแถวใน shard ที่ยังไม่ถูกลบ"""
+        info = self.index['shards'][shard_id]
+        live = np.ones(info['count'], dtype=bool)
+        live[info.get('removed', [])] = False
+        return np.flatnonzero(live)
+
+    def _safe_decode(self, path) -> Optional[np.ndarray]:
+        try:
+            return decode_image(path, self.image_size, self.dtype)
+        except Exception:
+            return None
+
+    def _write_shard(self, items: List[Tuple[Dict, np.ndarray]]) -> None:
+        if not items:
+            return
+
+        shard_id = len(self.index['shards'])
+        file_name = f"shard-{shard_id:05d}.npy"
+        labels_name = f"shard-{shard_id:05d}.labels.npy"
+        height, width = self.image_size
+
+        data = np.lib.format.open_memmap(self.cache_dir / file_name, mode='w+',
+                                         dtype=self.dtype, shape=(len(items), height, width, 3))
+        labels = np.empty(len(items), dtype=np.int32)
+        for offset, (image, array) in enumerate(items):
+            data[offset] = array
+            labels[offset] = self._label_id(image.get('label'))
+            self.index['hashes'][image['hash']] = [shard_id, offset]
+        data.flush()
+        del data
+        np.save(self.cache_dir / labels_name, labels)
+
+        self.index['shards'].append({'file': file_name, 'labels_file': labels_name, 'count': len(items)})
+
+    def _sync_labels(self, current: Dict[str, Dict]) -> None:
+        """อัปเดต label ในแคชให้ตรงกับ catalog (ไม่ต้อง decode ภาพใหม่)"""
+        loaded: Dict[int, np.ndarray] = {}
+        dirty = set()
+        for content_hash, (shard_id, offset) in self.index['hashes'].items():
+            label_id = self._label_id(current[content_hash].get('label'))
+            if shard_id not in loaded:
+                loaded[shard_id] = np.load(self.cache_dir / self.index['shards'][shard_id]['labels_file'])
+            if loaded[shard_id][offset] != label_id:
+                loaded[shard_id][offset] = label_id
+                dirty.add(shard_id)
+
+        for shard_id in dirty:
+            np.save(self.cache_dir / self.index['shards'][shard_id]['labels_file'], loaded[shard_id])
+
+    # ============ อ่านแคช ============
+
+    def __len__(self) -> int:
+        return len(self.index['hashes'])
+
+    @property
+    def labels(self) -> List[str]:
+        """รายชื่อ label ตามลำดับ id"""
+        return list(self.index['labels'])
+
+    def shard(self, shard_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        เปิด shard แบบ memory-map (อ่านอย่างเดียว) รวมแถวที่ถูกทำเครื่องหมายลบแล้ว
+
+        Returns:
+            (ภาพ (N, สูง, กว้าง, 3), label id (N,))
+        """
+        if shard_id not in self._shards:
+            info = self.index['shards'][shard_id]
+            self._shards[shard_id] = np.load(self.cache_dir / info['file'], mmap_mode='r')
+        labels = np.load(self.cache_dir / self.index['shards'][shard_id]['labels_file'])
+        return self._shards[shard_id], labels
+
+    def iter_batches(self, batch_size: int = 32, shuffle: bool = False,
+                     seed: Optional[int] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        วนอ่าน batch จากแคช ข้ามแถวที่ถูกลบ
+        (ถ้าไม่ shuffle และ shard ไม่มีแถวที่ถูกลบ จะเป็น view ของ memory-map ไม่มีการ copy)
+
+        Args:
+            batch_size: ขนาด batch
+            shuffle: สลับลำดับ shard และลำดับภาพใน shard
+            seed: seed สำหรับการสลับ
+
+        Yields:
+            (ภาพ, label id)
+        """
+        rng = np.random.default_rng(seed)
+        shard_ids = list(range(len(self.index['shards'])))
+        if shuffle:
+            rng.shuffle(shard_ids)
+
+        for shard_id in shard_ids:
+            data, labels = self.shard(shard_id)
+            if shuffle:
+                order = rng.permutation(self._live_rows(shard_id))
+                for start in range(0, len(order), batch_size):
+                    rows = np.sort(order[start:start + batch_size])
+                    yield data[rows], labels[rows]
+            elif self.index['shards'][shard_id].get('removed'):
+                live = self._live_rows(shard_id)
+                for start in range(0, len(live), batch_size):
+                    rows = live[start:start + batch_size]
+                    yield data[rows], labels[rows]
+            else:
+                for start in range(0, len(data), batch_size):
+                    yield data[start:start + batch_size], labels[start:start + batch_size]
+
+    def get(self, content_hash: str) -> Optional[np.ndarray]:
+        """ดึงภาพตาม hash (view ของ memory-map) หรือ None ถ้าไม่อยู่ในแคช"""
+        location = self.index['hashes'].get(content_hash)
+        if location is None:
+            return None
+        data, _ = self.shard(location[0])
+        return data[location[1]]
@@ -2,19 +2,38 @@
 โมดูลสำหรับเทรนโมเดล Machine Learning
 """
 
+import importlib.util
 import os
+import threading
 import numpy as np
 import pandas as pd
 from pathlib import Path
 from typing import Tuple, Optional
 
-try:
-    import tensorflow as tf
-    from tensorflow import keras
-    layers = keras.layers
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
+# ตรวจว่าติดตั้ง TensorFlow หรือไม่โดยยังไม่ import (import ใช้เวลาหลายวินาที)
+TF_AVAILABLE = importlib.util.find_spec("tensorflow") is not None
+
+tf = None
+keras = None
+layers = None
+_tf_lock = threading.Lock()
+
+
+def load_tensorflow():
+    """
+    import TensorFlow เมื่อต้องใช้ครั้งแรก (ถ้าโหลดเบื้องหลังไว้แล้วจะคืนทันที)
+
+    Returns:
+        โมดูล tensorflow
+    """
+    global tf, keras, layers
+    with _tf_lock:
+        if tf is None:
+            import tensorflow
+            keras = tensorflow.keras
+            layers = keras.layers
+            tf = tensorflow
+    return tf
 
 
 class ModelTrainer:
@@ -62,7 +81,7 @@ class ModelTrainer:
                 return False, "ไม่มีคอลัมน์ตัวเลข", None
             
             # แปลง y เป็นตัวเลข (ถ้าเป็น categorical)
-            if y.dtype == 'object':
+            if y.dtype == 'object' or isinstance(y.dtype, pd.CategoricalDtype):
                 y = pd.factorize(y)[0]
             
             # แบ่งข้อมูล train/test
@@ -99,6 +118,7 @@ class ModelTrainer:
             input_dim: จำนวน input features
             num_classes: จำนวน output classes (ถ้าเป็น classification)
         """
+        load_tensorflow()
         self.model = keras.Sequential([
             layers.Dense(128, activation='relu', input_dim=input_dim),
             layers.Dropout(0.2),
@@ -175,6 +195,7 @@ class ModelTrainer:
             self.model.save(str(h5_path))
             
             # บันทึก TFLite
+            load_tensorflow()
             converter = tf.lite.TFLiteConverter.from_keras_model(self.model)
             converter.optimizations = [tf.lite.Optimize.DEFAULT]
             tflite_model = converter.convert()
@@ -0,0 +1,180 @@
+"""
+โมดูลสำหรับ journal การแก้ไขรายแถว (เพิ่ม / แก้ไข / ลบ) แบบต่อท้ายไฟล์
+แทนการเขียนไฟล์ข้อมูลใหม่ทั้งไฟล์ทุกครั้งที่แก้ไขหนึ่งแถว
+"""
+
+import datetime
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+from modules.dtype_optimizer import set_value
+
+
+# จำนวนรายการใน journal ที่จะรวมเข้าไฟล์หลัก (เขียนไฟล์ใหม่ทั้งไฟล์หนึ่งครั้ง)
+JOURNAL_COMPACT_OPS = 500
+
+
+def _is_missing(value) -> bool:
+    if value is None or value is pd.NA or value is pd.NaT:
+        return True
+    return isinstance(value, (float, np.floating, np.datetime64, np.timedelta64)) and bool(pd.isna(value))
+
+
+def encode_value(value):
+    """
+    แปลงค่าเป็นรูปแบบที่บันทึกใน journal ได้โดยไม่เสียชนิดข้อมูล
+    วันที่/เวลาเก็บเป็น {"$ts": ISO 8601, "tz": เขตเวลา} และช่วงเวลาเป็น {"$td": นาโนวินาที}
+    """
+    if _is_missing(value):
+        return None
+    if isinstance(value, (datetime.datetime, np.datetime64)):
+        timestamp = pd.Timestamp(value)
+        encoded = {'$ts': timestamp.isoformat()}
+        if timestamp.tz is not None:
+            encoded['tz'] = str(timestamp.tz)
+        return encoded
+    if isinstance(value, (datetime.timedelta, np.timedelta64)):
+        return {'$td': int(pd.Timedelta(value).value)}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def decode_value(value):
+    """แปลงค่าจาก journal กลับเป็นชนิดเดิม (ตรงข้ามกับ encode_value)"""
+    if isinstance(value, dict):
+        if '$ts' in value:
+            timestamp = pd.Timestamp(value['$ts'])
+            return timestamp.tz_convert(value['tz']) if value.get('tz') else timestamp
+        if '$td' in value:
+            return pd.Timedelta(value['$td'], unit='ns')
+    return value
+
+
+def _encode_row(row: Dict) -> Dict:
+    return {key: encode_value(value) for key, value in row.items()}
+
+
+def _decode_row(row: Dict) -> Dict:
+    return {key: decode_value(value) for key, value in row.items()}
+
+
+def add_entry(row: Dict) -> Dict:
+    """รายการเพิ่มแถวท้ายตาราง"""
+    return {'op': 'add', 'row': _encode_row(row)}
+
+
+def update_entry(index: int, values: Dict, old: Optional[Dict] = None) -> Dict:
+    """
+    รายการแก้ไขค่าของแถวที่ตำแหน่ง index
+
+    Args:
+        old: ค่าเดิมของคอลัมน์ที่แก้ไข (ใช้ปรับจำนวนค่าว่างใน metadata โดยไม่ต้องนับใหม่ทั้งตาราง)
+    """
+    entry = {'op': 'update', 'index': int(index), 'values': _encode_row(values)}
+    if old is not None:
+        entry['old'] = _encode_row(old)
+    return entry
+
+
+def delete_entry(index: int, old: Optional[Dict] = None) -> Dict:
+    """
+    รายการลบแถวที่ตำแหน่ง index
+
+    Args:
+        old: ค่าเดิมของทั้งแถว (ใช้ปรับจำนวนค่าว่างใน metadata)
+    """
+    entry = {'op': 'delete', 'index': int(index)}
+    if old is not None:
+        entry['old'] = _encode_row(old)
+    return entry
+
+
+def describe_entries(meta: Dict, df: pd.DataFrame, entries: List[Dict]) -> Optional[Dict]:
+    """
+    ปรับจำนวนแถว / ค่าว่างใน metadata ตามรายการแก้ไข แทนการนับใหม่ทั้ง DataFrame
+
+    Args:
+        meta: metadata ก่อนแก้ไข
+        df: DataFrame หลังแก้ไข (ใช้เฉพาะชื่อคอลัมน์และประเภทข้อมูล)
+        entries: รายการแก้ไข
+
+    Returns:
+        dict สำหรับ metadata (rows, columns, dtypes, null_counts)
+        หรือ None ถ้ารายการไม่มีค่าเดิมพอจะคำนวณ (ต้องนับใหม่ทั้ง DataFrame)
+    """
+    rows = int(meta['rows'])
+    null_counts = {str(col): int(count) for col, count in meta['null_counts'].items()}
+
+    def column_nulls(col: str) -> int:
+        # คอลัมน์ใหม่: แถวที่มีอยู่ก่อนเป็นค่าว่างทั้งหมด
+        return null_counts.setdefault(col, rows)
+
+    for entry in entries:
+        op = entry.get('op')
+        if op == 'add':
+            row = {str(key): value for key, value in entry['row'].items()}
+            for col in set(null_counts) | set(row):
+                null_counts[col] = column_nulls(col) + _is_missing(row.get(col))
+            rows += 1
+        elif op == 'update':
+            if 'old' not in entry:
+                return None
+            for key, value in entry['values'].items():
+                col = str(key)
+                null_counts[col] = (column_nulls(col) + _is_missing(value)
+                                    - _is_missing(entry['old'].get(key)))
+        elif op == 'delete':
+            if 'old' not in entry:
+                return None
+            old = {str(key): value for key, value in entry['old'].items()}
+            for col in null_counts:
+                null_counts[col] -= _is_missing(old.get(col))
+            rows -= 1
+
+    columns = [str(col) for col in df.columns]
+    if rows != len(df) or set(null_counts) - set(columns):
+        return None
+    return {
+        'rows': rows,
+        'columns': columns,
+        'dtypes': {str(col): str(dtype) for col, dtype in df.dtypes.items()},
+        'null_counts': {col: null_counts.get(col, rows) for col in columns},
+    }
+
+
+def replay(df: pd.DataFrame, entries: List[Dict]) -> pd.DataFrame:
+    """
+    ทำรายการแก้ไขใน journal ตามลำดับกับ DataFrame ที่อ่านจากไฟล์หลัก
+
+    Args:
+        df: DataFrame จากไฟล์หลัก (ถูกแก้ไข in-place ได้)
+        entries: รายการจาก read_journal
+
+    Returns:
+        DataFrame หลังแก้ไข
+    """
+    pending_rows: List[Dict] = []
+
+    def flush(frame: pd.DataFrame) -> pd.DataFrame:
+        # รวมการเพิ่มแถวที่ต่อเนื่องกันเป็น concat ครั้งเดียว
+        if pending_rows:
+            frame = pd.concat([frame, pd.DataFrame(pending_rows)], ignore_index=True)
+            pending_rows.clear()
+        return frame
+
+    for entry in entries:
+        op = entry.get('op')
+        if op == 'add':
+            pending_rows.append(_decode_row(entry['row']))
+            continue
+
+        df = flush(df)
+        if op == 'update':
+            for key, value in _decode_row(entry['values']).items():
+                set_value(df, entry['index'], key, value)
+        elif op == 'delete':
+            df = df.drop(entry['index']).reset_index(drop=True)
+
+    return flush(df)
@@ -0,0 +1,328 @@
+"""
+โมดูลสำหรับตรวจหาค่าผิดปกติในคอลัมน์ตัวเลข (z-score, IQR, MAD)
+แบบในหน่วยความจำ หรือแบบ streaming ทีละ chunk ด้วย KLL quantile sketch ที่รวมกันได้
+"""
+
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+# วิธีตรวจ -> ค่า threshold เริ่มต้น
+OUTLIER_METHODS = {'zscore': 3.0, 'iqr': 1.5, 'mad': 3.5}
+# ปรับ MAD ให้เทียบเท่าส่วนเบี่ยงเบนมาตรฐานของการแจกแจงปกติ
+MAD_SCALE = 1.4826
+# ขนาด sketch (k = 200 คลาดเคลื่อนของอันดับราว 1%)
+SKETCH_SIZE = 200
+_MIN_LEVEL_CAPACITY = 8
+
+
+def numeric_columns(df: pd.DataFrame) -> List[str]:
+    """คอลัมน์ตัวเลข (ไม่รวม bool)"""
+    return [col for col in df.columns
+            if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])]
+
+
+def _to_float(series: pd.Series) -> np.ndarray:
+    """ค่าของคอลัมน์เป็น float64 ไม่รวมค่าว่าง"""
+    values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    return values[~np.isnan(values)]
+
+
+def _check_method(method: str, threshold: Optional[float]) -> float:
+    if method not in OUTLIER_METHODS:
+        raise ValueError(f"วิธีตรวจไม่รองรับ: {method} (ต้องเป็น {', '.join(OUTLIER_METHODS)})")
+    return OUTLIER_METHODS[method] if threshold is None else float(threshold)
+
+
+def _bounds(method: str, threshold: float, stats: Dict[str, float]) -> Tuple[float, float]:
+    """ช่วงค่าปกติ [lower, upper] จากสถิติของคอลัมน์"""
+    if method == 'zscore':
+        return stats['mean'] - threshold * stats['std'], stats['mean'] + threshold * stats['std']
+    if method == 'iqr':
+        iqr = stats['q3'] - stats['q1']
+        return stats['q1'] - threshold * iqr, stats['q3'] + threshold * iqr
+    spread = threshold * MAD_SCALE * stats['mad']
+    return stats['median'] - spread, stats['median'] + spread
+
+
+def outlier_bounds(values: np.ndarray, method: str = 'iqr',
+                   threshold: Optional[float] = None) -> Optional[Tuple[float, float]]:
+    """
+    คำนวณช่วงค่าปกติจากข้อมูลในหน่วยความจำ (ใช้ partition ไม่ต้องเรียงทั้งหมด)
+
+    Args:
+        values: ค่าตัวเลข (ค่าว่างถูกข้าม)
+        method: zscore / iqr / mad
+        threshold: จำนวนเท่าของส่วนเบี่ยงเบน (None = ค่าเริ่มต้นของวิธี)
+
+    Returns:
+        (lower, upper) หรือ None ถ้าไม่มีค่า
+    """
+    threshold = _check_method(method, threshold)
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+
+    if method == 'zscore':
+        stats = {'mean': float(values.mean()), 'std': float(values.std())}
+    elif method == 'iqr':
+        q1, q3 = np.quantile(values, [0.25, 0.75])
+        stats = {'q1': float(q1), 'q3': float(q3)}
+    else:
+        median = float(np.median(values))
+        stats = {'median': median, 'mad': float(np.median(np.abs(values - median)))}
+    return _bounds(method, threshold, stats)
+
+
+def detect_outliers(df: pd.DataFrame, columns: Optional[List[str]] = None, method: str = 'iqr',
+                    threshold: Optional[float] = None) -> Dict[str, Dict]:
+    """
+    ตรวจค่าผิดปกติของคอลัมน์ตัวเลขใน DataFrame
+
+    Args:
+        df: DataFrame
+        columns: คอลัมน์ที่ตรวจ (None = ทุกคอลัมน์ตัวเลข)
+        method: zscore / iqr / mad
+        threshold: จำนวนเท่าของส่วนเบี่ยงเบน (None = ค่าเริ่มต้นของวิธี)
+
+    Returns:
+        dict คอลัมน์ -> dict (lower, upper, outliers, count)
+    """
+    _check_method(method, threshold)
+    results = {}
+    for col in columns or numeric_columns(df):
+        if col not in df.columns:
+            raise ValueError(f"ไม่พบคอลัมน์: {col}")
+        values = _to_float(df[col])
+        bounds = outlier_bounds(values, method, threshold)
+        if bounds is None:
+            continue
+        outliers = int(np.count_nonzero((values < bounds[0]) | (values > bounds[1])))
+        results[col] = {'lower': bounds[0], 'upper': bounds[1], 'outliers': outliers, 'count': len(values)}
+    return results
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch: เก็บตัวอย่างแบบมีน้ำหนักเป็นชั้น ๆ ใช้หน่วยความจำคงที่
+    เพิ่มค่าทีละ chunk ได้ และรวม sketch จากหลายส่วนของข้อมูลได้ (merge)
+    """
+
+    def __init__(self, k: int = SKETCH_SIZE, seed: Optional[int] = 0):
+        """
+        Args:
+            k: ขนาดของชั้นบนสุด (มากขึ้น = แม่นขึ้น ใช้หน่วยความจำมากขึ้น)
+            seed: seed ของการสุ่มตอนบีบอัด
+        """
+        self.k = k
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        # ชั้นที่ h เก็บค่าที่มีน้ำหนัก 2^h
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(_MIN_LEVEL_CAPACITY, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        """บีบอัดชั้นที่เกินความจุ: เรียงแล้วเลื่อนค่าเว้นค่าขึ้นชั้นถัดไป (น้ำหนักเพิ่มเป็นสองเท่า)"""
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                leftover = items[:len(items) % 2]
+                items = items[len(items) % 2:]
+                promoted = items[int(self._rng.integers(2))::2]
+                self.levels[level] = leftover
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values: np.ndarray) -> None:
+        """เพิ่มค่าหลายค่าในครั้งเดียว (ค่าว่างถูกข้าม)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        """รวม sketch อื่นเข้ามา"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def weighted_items(self) -> Tuple[np.ndarray, np.ndarray]:
+        """ค่าที่เก็บไว้และน้ำหนักของแต่ละค่า"""
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        return items, weights
+
+    def quantile(self, q):
+        """
+        ประมาณค่า quantile
+
+        Args:
+            q: ค่าเดียวหรือ list ในช่วง [0, 1]
+
+        Returns:
+            float หรือ numpy array ตาม q
+        """
+        if self.count == 0:
+            raise ValueError("sketch ว่าง")
+        items, weights = self.weighted_items()
+        return _weighted_quantile(items, weights, q, self.min, self.max)
+
+
+def _weighted_quantile(items: np.ndarray, weights: np.ndarray, q, lowest: float, highest: float):
+    """quantile ของค่าที่มีน้ำหนัก (q = 0 / 1 ได้ค่าต่ำสุด / สูงสุดจริง)"""
+    order = np.argsort(items, kind='stable')
+    items, cumulative = items[order], np.cumsum(weights[order])
+    qs = np.atleast_1d(np.asarray(q, dtype=np.float64))
+    positions = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+    result = items[np.clip(positions, 0, len(items) - 1)]
+    result = np.where(qs <= 0, lowest, np.where(qs >= 1, highest, result))
+    return float(result[0]) if np.ndim(q) == 0 else result
+
+
+class _ColumnStats:
+    """สถิติของคอลัมน์ที่รวมกันได้: จำนวน ค่าเฉลี่ย ผลรวมกำลังสองของส่วนต่าง และ quantile sketch"""
+
+    def __init__(self, k: int):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sketch = KLLSketch(k)
+
+    def update(self, values: np.ndarray) -> None:
+        if len(values) == 0:
+            return
+        n, mean = len(values), float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        self._combine(n, mean, m2)
+        self.sketch.update(values)
+
+    def _combine(self, n: int, mean: float, m2: float) -> None:
+        # รวมแบบ Chan et al.
+        total = self.count + n
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+
+    def merge(self, other: "_ColumnStats") -> None:
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+            self.sketch.merge(other.sketch)
+
+    def stats(self) -> Dict[str, float]:
+        q1, median, q3 = self.sketch.quantile([0.25, 0.5, 0.75])
+        # MAD จากค่าที่มีน้ำหนักใน sketch เดิม (ไม่ต้องอ่านข้อมูลอีกรอบ)
+        items, weights = self.sketch.weighted_items()
+        deviations = np.abs(items - median)
+        mad = _weighted_quantile(deviations, weights, 0.5, 0.0, float(deviations.max()))
+        return {'mean': self.mean, 'std': float(np.sqrt(self.m2 / self.count)),
+                'q1': float(q1), 'median': float(median), 'q3': float(q3), 'mad': mad}
+
+
+class OutlierAccumulator:
+    """
+    ตรวจค่าผิดปกติทีละ chunk โดยไม่ต้องโหลดทั้งไฟล์หรือเรียงข้อมูลทั้งหมด
+
+    รอบแรก: update(chunk) ทุก chunk เพื่อสร้างสถิติ (รวมจากหลาย accumulator ได้ด้วย merge)
+    รอบสอง: count(chunk) ทุก chunk เพื่อนับค่าที่อยู่นอกช่วง แล้วเรียก result()
+    """
+
+    def __init__(self, columns: Optional[List[str]] = None, method: str = 'iqr',
+                 threshold: Optional[float] = None, k: int = SKETCH_SIZE):
+        """
+        Args:
+            columns: คอลัมน์ที่ตรวจ (None = ทุกคอลัมน์ตัวเลขของ chunk แรก)
+            method: zscore / iqr / mad
+            threshold: จำนวนเท่าของส่วนเบี่ยงเบน (None = ค่าเริ่มต้นของวิธี)
+            k: ขนาด sketch
+        """
+        self.method = method
+        self.threshold = _check_method(method, threshold)
+        self.columns = list(columns) if columns else None
+        self.k = k
+        self._stats: Dict[str, _ColumnStats] = {}
+        self._bounds: Optional[Dict[str, Tuple[float, float]]] = None
+        self._outliers: Dict[str, int] = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """รอบแรก: เพิ่มสถิติของ chunk"""
+        if self.columns is None:
+            self.columns = numeric_columns(chunk)
+        for col in self.columns:
+            if col not in chunk.columns:
+                raise ValueError(f"ไม่พบคอลัมน์: {col}")
+            self._stats.setdefault(col, _ColumnStats(self.k)).update(_to_float(chunk[col]))
+        self._bounds = None
+
+    def merge(self, other: "OutlierAccumulator") -> None:
+        """รวมสถิติรอบแรกของ accumulator อื่น (เช่น จาก segment ที่ต่อท้าย)"""
+        for col, stats in other._stats.items():
+            self._stats.setdefault(col, _ColumnStats(self.k)).merge(stats)
+        if self.columns is None:
+            self.columns = other.columns
+        self._bounds = None
+
+    def bounds(self) -> Dict[str, Tuple[float, float]]:
+        """ช่วงค่าปกติของแต่ละคอลัมน์"""
+        if self._bounds is None:
+            self._bounds = {col: _bounds(self.method, self.threshold, stats.stats())
+                            for col, stats in self._stats.items() if stats.count}
+        return self._bounds
+
+    def count(self, chunk: pd.DataFrame) -> None:
+        """รอบสอง: นับค่าที่อยู่นอกช่วงใน chunk"""
+        for col, (lower, upper) in self.bounds().items():
+            values = _to_float(chunk[col])
+            self._outliers[col] = self._outliers.get(col, 0) + int(
+                np.count_nonzero((values < lower) | (values > upper)))
+
+    def result(self) -> Dict[str, Dict]:
+        """ผลแบบเดียวกับ detect_outliers"""
+        return {col: {'lower': lower, 'upper': upper, 'outliers': self._outliers.get(col, 0),
+                      'count': self._stats[col].count}
+                for col, (lower, upper) in self.bounds().items()}
+
+
+def format_outliers(results: Dict[str, Dict], method: str, streaming: bool = False) -> str:
+    """
+    สร้างข้อความสรุปค่าผิดปกติ
+
+    Args:
+        results: ผลจาก detect_outliers หรือ OutlierAccumulator.result
+        method: วิธีที่ใช้
+        streaming: ตรวจแบบ streaming (ช่วงค่าเป็นค่าประมาณจาก sketch)
+
+    Returns:
+        ข้อความสรุป
+    """
+    total = sum(result['outliers'] for result in results.values())
+    text = f"📈 ค่าผิดปกติ ({method}{', ประมาณจาก sketch' if streaming else ''}):\n"
+    if not results:
+        return text + "└─ ไม่มีคอลัมน์ตัวเลข"
+    for col, result in results.items():
+        icon = "⚠️" if result['outliers'] else "✅"
+        text += (f"├─ {icon} {col}: {result['outliers']} ค่า จาก {result['count']} "
+                 f"(ช่วงปกติ {result['lower']:,.2f} ถึง {result['upper']:,.2f})\n")
+    text += "└─ ✅ ไม่พบค่าผิดปกติ" if total == 0 else f"└─ ⚠️ รวม {total} ค่า"
+    return text
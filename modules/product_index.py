@@ -0,0 +1,262 @@
+"""
+โมดูลสำหรับ index รองของสินค้า (ค้นหาชื่อขึ้นต้นด้วย / กรองประเภท / ช่วงค่าตัวเลข)
+เก็บในหน่วยความจำและปรับตามการเพิ่ม / แก้ไข / ลบ โดยไม่ต้องกรองทั้ง DataFrame
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+
+# เพิ่มแถวมากกว่านี้ในครั้งเดียว: สร้าง index ใหม่ทั้งหมดแทนการแทรกทีละแถว
+BULK_REBUILD_ROWS = 1000
+# อักขระที่มากกว่าอักขระทุกตัว ใช้หาขอบบนของช่วงคำขึ้นต้น
+_MAX_CHAR = '\U0010ffff'
+
+
+def _is_missing(value) -> bool:
+    return value is None or value is pd.NA or (isinstance(value, float) and value != value)
+
+
+def _text_key(value) -> Optional[str]:
+    return None if _is_missing(value) else str(value).casefold()
+
+
+def _number_key(value) -> Optional[float]:
+    if _is_missing(value) or isinstance(value, (str, bool)):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number
+
+
+def _shift_positions(positions: np.ndarray, removed: int) -> np.ndarray:
+    """ตำแหน่งหลังแถวที่ลบเลื่อนขึ้นหนึ่งตำแหน่ง"""
+    return positions - (positions > removed)
+
+
+class SortedIndex:
+    """ค่าที่เรียงลำดับพร้อมตำแหน่งแถว (ค้นหาช่วงด้วย binary search)"""
+
+    def __init__(self, keys: List, positions: Iterable[int]):
+        """
+        Args:
+            keys: ค่าของแต่ละแถว (ไม่รวมค่าว่าง)
+            positions: ตำแหน่งแถวของแต่ละค่า
+        """
+        positions = np.asarray(list(positions), dtype=np.int64)
+        # เรียงตามค่า และตามตำแหน่งแถวเมื่อค่าเท่ากัน
+        order = np.lexsort((positions, np.asarray(keys, dtype=str))) if keys else np.zeros(0, dtype=np.int64)
+        self.keys = [keys[i] for i in order]
+        self.positions = positions[order]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def insert(self, key, position: int) -> None:
+        if key is None:
+            return
+        at = bisect_right(self.keys, key)
+        self.keys.insert(at, key)
+        self.positions = np.insert(self.positions, at, position)
+
+    def remove(self, key, position: int) -> None:
+        if key is None:
+            return
+        low, high = bisect_left(self.keys, key), bisect_right(self.keys, key)
+        matches = np.flatnonzero(self.positions[low:high] == position)
+        if len(matches):
+            at = low + int(matches[0])
+            del self.keys[at]
+            self.positions = np.delete(self.positions, at)
+
+    def delete(self, key, position: int) -> None:
+        """ลบแถวออกจากตาราง (ลบค่า แล้วเลื่อนตำแหน่งแถวที่อยู่หลัง)"""
+        self.remove(key, position)
+        self.positions = _shift_positions(self.positions, position)
+
+    def prefix(self, prefix: str, limit: Optional[int] = None) -> List[int]:
+        """ตำแหน่งแถวที่ค่าขึ้นต้นด้วย prefix เรียงตามค่า"""
+        start = bisect_left(self.keys, prefix)
+        stop = bisect_left(self.keys, prefix + _MAX_CHAR, lo=start)
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return self.positions[start:stop].tolist()
+
+
+class NumericIndex:
+    """ค่าตัวเลขที่เรียงลำดับใน numpy array สำหรับค้นหาช่วงค่า"""
+
+    def __init__(self, values: pd.Series):
+        """
+        Args:
+            values: คอลัมน์ตัวเลข (ตำแหน่งแถวตามลำดับใน Series)
+        """
+        numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        positions = np.flatnonzero(~np.isnan(numbers))
+        order = np.argsort(numbers[positions], kind='stable')
+        self.keys = numbers[positions][order]
+        self.positions = positions[order].astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def insert(self, key, position: int) -> None:
+        if key is None:
+            return
+        at = int(np.searchsorted(self.keys, key, side='right'))
+        self.keys = np.insert(self.keys, at, key)
+        self.positions = np.insert(self.positions, at, position)
+
+    def remove(self, key, position: int) -> None:
+        if key is None:
+            return
+        low = int(np.searchsorted(self.keys, key, side='left'))
+        high = int(np.searchsorted(self.keys, key, side='right'))
+        matches = np.flatnonzero(self.positions[low:high] == position)
+        if len(matches):
+            at = low + int(matches[0])
+            self.keys = np.delete(self.keys, at)
+            self.positions = np.delete(self.positions, at)
+
+    def delete(self, key, position: int) -> None:
+        """ลบแถวออกจากตาราง (ลบค่า แล้วเลื่อนตำแหน่งแถวที่อยู่หลัง)"""
+        self.remove(key, position)
+        self.positions = _shift_positions(self.positions, position)
+
+    def between(self, low=None, high=None, limit: Optional[int] = None) -> List[int]:
+        """ตำแหน่งแถวที่ค่าอยู่ในช่วง [low, high] เรียงตามค่า"""
+        start = 0 if low is None else int(np.searchsorted(self.keys, low, side='left'))
+        stop = len(self.keys) if high is None else int(np.searchsorted(self.keys, high, side='right'))
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return self.positions[start:stop].tolist()
+
+
+class InvertedIndex:
+    """ค่าในคอลัมน์ -> ตำแหน่งแถวที่มีค่านั้น (เรียงตามตำแหน่ง)"""
+
+    def __init__(self, values: pd.Series):
+        """
+        Args:
+            values: คอลัมน์ที่ต้องการ index (เช่น ประเภทสินค้า)
+        """
+        codes, uniques = pd.factorize(values, sort=False)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        self.postings: Dict[str, np.ndarray] = {}
+        for i, value in enumerate(uniques):
+            key = _text_key(value)
+            postings = order[bounds[i]:bounds[i + 1]].astype(np.int64)
+            if key in self.postings:
+                # ค่าที่ต่างกันแค่ตัวพิมพ์เล็ก/ใหญ่ รวมเป็นคีย์เดียว
+                postings = np.sort(np.concatenate([self.postings[key], postings]))
+            self.postings[key] = postings
+
+    def insert(self, key, position: int) -> None:
+        if key is None:
+            return
+        postings = self.postings.get(key)
+        if postings is None:
+            self.postings[key] = np.array([position], dtype=np.int64)
+        else:
+            at = int(np.searchsorted(postings, position))
+            self.postings[key] = np.insert(postings, at, position)
+
+    def remove(self, key, position: int) -> None:
+        postings = self.postings.get(key)
+        if postings is None:
+            return
+        postings = postings[postings != position]
+        if len(postings):
+            self.postings[key] = postings
+        else:
+            del self.postings[key]
+
+    def delete(self, key, position: int) -> None:
+        """ลบแถวออกจากตาราง (ลบค่า แล้วเลื่อนตำแหน่งแถวที่อยู่หลัง)"""
+        self.remove(key, position)
+        for value, postings in self.postings.items():
+            self.postings[value] = _shift_positions(postings, position)
+
+    def get(self, key, limit: Optional[int] = None) -> List[int]:
+        """ตำแหน่งแถวที่มีค่านี้ เรียงตามตำแหน่ง"""
+        postings = self.postings.get(key)
+        if postings is None:
+            return []
+        return postings[:limit].tolist()
+
+    def counts(self) -> Dict[str, int]:
+        """จำนวนแถวของแต่ละค่า"""
+        return {value: len(postings) for value, postings in self.postings.items()}
+
+
+class ProductIndexes:
+    """รวม index รองของตารางสินค้า: ชื่อ (คำขึ้นต้น), ประเภท และคอลัมน์ตัวเลข (สร้างเมื่อค้นหาครั้งแรก)"""
+
+    def __init__(self, df: pd.DataFrame, name_column: str = 'name', category_column: str = 'type'):
+        """
+        Args:
+            df: DataFrame สินค้า
+            name_column: คอลัมน์ชื่อสินค้า
+            category_column: คอลัมน์ประเภทสินค้า
+        """
+        self.name_column = name_column
+        self.category_column = category_column
+        self.names: Optional[SortedIndex] = None
+        self.categories: Optional[InvertedIndex] = None
+        self.numbers: Dict[str, NumericIndex] = {}
+
+        if name_column in df.columns:
+            keys = [_text_key(value) for value in df[name_column].tolist()]
+            present = [i for i, key in enumerate(keys) if key is not None]
+            self.names = SortedIndex([keys[i] for i in present], present)
+        if category_column in df.columns:
+            self.categories = InvertedIndex(df[category_column])
+
+    def covers(self, row: Dict) -> bool:
+        """False ถ้าแถวมีคอลัมน์ชื่อ / ประเภทที่ยังไม่ได้ index (ต้องสร้าง index ใหม่)"""
+        return ((self.names is not None or self.name_column not in row) and
+                (self.categories is not None or self.category_column not in row))
+
+    def numeric(self, df: pd.DataFrame, column: str) -> NumericIndex:
+        """ดึง index ของคอลัมน์ตัวเลข (สร้างใหม่ถ้ายังไม่มี)"""
+        index = self.numbers.get(column)
+        if index is None:
+            if column not in df.columns:
+                raise KeyError(f"ไม่พบคอลัมน์: {column}")
+            if not pd.api.types.is_numeric_dtype(df[column]):
+                raise ValueError(f"คอลัมน์ {column} ไม่ใช่ตัวเลข")
+            index = NumericIndex(df[column])
+            self.numbers[column] = index
+        return index
+
+    def _indexes(self, row: Dict):
+        """(index, คีย์) ของแต่ละ index ที่เกี่ยวกับแถวนี้"""
+        if self.names is not None and self.name_column in row:
+            yield self.names, _text_key(row[self.name_column])
+        if self.categories is not None and self.category_column in row:
+            yield self.categories, _text_key(row[self.category_column])
+        for column, index in self.numbers.items():
+            if column in row:
+                yield index, _number_key(row[column])
+
+    def add(self, position: int, row: Dict) -> None:
+        """เพิ่มแถวใหม่ที่ตำแหน่ง position (ท้ายตาราง)"""
+        for index, key in self._indexes(row):
+            index.insert(key, position)
+
+    def update(self, position: int, old_row: Dict, new_values: Dict) -> None:
+        """แก้ไขค่าของแถว (old_row คือค่าเดิมของคอลัมน์ที่แก้ไข)"""
+        for index, key in self._indexes(old_row):
+            index.remove(key, position)
+        for index, key in self._indexes(new_values):
+            index.insert(key, position)
+
+    def delete(self, position: int, old_row: Dict) -> None:
+        """ลบแถวที่ตำแหน่ง position (old_row คือค่าเดิมของแถว)"""
+        for index, key in self._indexes(old_row):
+            index.delete(key, position)
@@ -2,21 +2,70 @@
 โมดูลสำหรับจัดการข้อมูลสินค้า
 """
 
+import math
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Iterable, Iterator, Optional
+
+from modules.data_store import dataset_signature, default_data_file, read_journal, read_meta
+from modules.dataset_cache import dataset_cache, load_dataset, journal_dataset
+from modules.dtype_optimizer import set_value
+from modules.file_lock import dataset_lock
+from modules.mutation_journal import add_entry, update_entry, delete_entry, replay
+from modules.product_index import BULK_REBUILD_ROWS, ProductIndexes
+
+# จำนวนสินค้าต่อหน้าเริ่มต้นของ get_products_page / iter_products
+DEFAULT_PAGE_SIZE = 1000
+# ผลลัพธ์ไม่เกินจำนวนนี้ดึงค่าทีละช่อง (เร็วกว่าเลือกแถวจากคอลัมน์ข้อความทั้งคอลัมน์)
+SMALL_RESULT_ROWS = 64
+
+
+def normalize_barcode(value) -> Optional[str]:
+    """
+    แปลงบาร์โค้ดเป็นคีย์ของ index (ข้อความ)
+    คอลัมน์ที่อ่านเป็นตัวเลข เช่น 8850001234567 หรือ 8850001234567.0 ได้คีย์เดียวกับ "8850001234567"
+    """
+    if value is None or value is pd.NA:
+        return None
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        if value.is_integer():
+            return str(int(value))
+    return str(value)
+
+
+class VersionConflict(Exception):
+    """ข้อมูลในไฟล์ถูกแก้ไขโดยโปรแกรมอื่นหลัง version ที่ผู้เรียกเห็น"""
 
 
 class ProductManager:
     """คลาสสำหรับจัดการข้อมูลสินค้า"""
     
-    def __init__(self, data_file: str = "data/uploaded_data.csv"):
+    def __init__(self, data_file: Optional[str] = None, name_column: str = 'name',
+                 category_column: str = 'type'):
         """
         Args:
             data_file: ที่อยู่ไฟล์ข้อมูลสินค้า
+            name_column: คอลัมน์ชื่อสินค้า (สำหรับค้นหาด้วยคำขึ้นต้น)
+            category_column: คอลัมน์ประเภทสินค้า (สำหรับกรองตามประเภท)
         """
-        self.data_file = Path(data_file)
+        self.data_file = Path(data_file) if data_file else default_data_file("data")
+        self.name_column = name_column
+        self.category_column = category_column
         self.df = None
+        # index บาร์โค้ด -> ตำแหน่งแถวแรก (สร้างเมื่อค้นหาครั้งแรก และปรับตามการเพิ่ม/แก้ไข/ลบ)
+        self._barcode_index = None
+        self._barcode_index_df = None
+        # index รอง ชื่อ / ประเภท / คอลัมน์ตัวเลข (สร้างเมื่อค้นหาครั้งแรกเช่นเดียวกัน)
+        self._indexes = None
+        self._indexes_df = None
+        # ล็อกไฟล์ข้อมูลข้ามโปรเซส (หลายเครื่องใช้ไฟล์เดียวกัน)
+        self._lock = dataset_lock(self.data_file)
+        # สถานะไฟล์ที่ self.df ตรงกับ (ลายเซ็นไฟล์, version, ตำแหน่งท้าย journal)
+        self._synced: Optional[Dict] = None
     
     def load_data(self) -> Tuple[bool, str]:
         """
@@ -29,12 +78,139 @@ class ProductManager:
             if not self.data_file.exists():
                 return False, "ไฟล์ไม่พบ"
             
-            self.df = pd.read_csv(self.data_file)
+            with self._lock:
+                self.df = load_dataset(self.data_file)
+                self._mark_synced()
             return True, f"โหลดสำเร็จ: {len(self.df)} สินค้า"
         
         except Exception as e:
             return False, f"เกิดข้อผิดพลาด: {str(e)}"
     
+    @property
+    def version(self) -> Optional[int]:
+        """version ของข้อมูลที่ self.df ตรงกับ (ใช้เป็น expected_version ตอนแก้ไข)"""
+        return self._synced['version'] if self._synced else None
+    
+    def _mark_synced(self) -> None:
+        """บันทึกสถานะไฟล์ปัจจุบัน (เรียกภายใต้ล็อก หลังโหลดหรือบันทึก)"""
+        meta = read_meta(self.data_file)
+        if meta is None:
+            self._synced = None
+            return
+        self._synced = {
+            'signature': dataset_signature(self.data_file),
+            'version': meta.get('version'),
+            'base': (meta.get('bytes'), meta.get('mtime_ns'), meta.get('segments', 0)),
+            'journal_ops': meta.get('journal_ops', 0),
+            'journal_bytes': meta.get('journal_bytes', 0),
+        }
+    
+    def has_changes(self) -> bool:
+        """ตรวจว่าไฟล์ข้อมูลถูกแก้ไขหลังโหลด/บันทึกครั้งล่าสุดหรือไม่ (ดูแค่ขนาด/เวลาไฟล์ ไม่อ่านข้อมูล)"""
+        return self._synced is None or dataset_signature(self.data_file) != self._synced['signature']
+    
+    def refresh(self) -> Tuple[bool, str]:
+        """
+        ดึงการแก้ไขจากโปรแกรมอื่น
+        ถ้าไฟล์หลักไม่เปลี่ยน (แก้ไขผ่าน journal) จะทำเฉพาะรายการใหม่ใน journal ไม่โหลดทั้งไฟล์
+
+        Returns:
+            (สำเร็จ, ข้อความ)
+        """
+        try:
+            with self._lock:
+                result = self._refresh()
+            messages = {
+                'none': "ข้อมูลเป็นปัจจุบันแล้ว",
+                'delta': "ดึงเฉพาะรายการที่เปลี่ยน",
+                'full': "โหลดข้อมูลใหม่ทั้งไฟล์",
+            }
+            return True, f"{messages[result]} (version {self.version})"
+        
+        except Exception as e:
+            return False, f"เกิดข้อผิดพลาด: {str(e)}"
+    
+    def _refresh(self) -> str:
+        """
+        ทำให้ self.df ตรงกับไฟล์ (เรียกภายใต้ล็อก)
+
+        Returns:
+            'none' (ไม่เปลี่ยน), 'delta' (ทำรายการใหม่ใน journal) หรือ 'full' (โหลดใหม่)
+        """
+        synced = self._synced
+        if self.df is not None and not self.has_changes():
+            return 'none'
+        if not self.data_file.exists():
+            return 'none'
+        
+        meta = read_meta(self.data_file)
+        if self.df is not None and synced is not None and meta is not None:
+            if meta.get('version') == synced['version']:
+                self._mark_synced()
+                return 'none'
+            
+            same_base = (meta.get('bytes'), meta.get('mtime_ns'), meta.get('segments', 0)) == synced['base']
+            new_ops = meta.get('journal_ops', 0) - synced['journal_ops']
+            if same_base and new_ops > 0:
+                entries = read_journal(self.data_file, offset=synced['journal_bytes'])
+                if len(entries) == new_ops:
+                    df = self.df.copy() if dataset_cache.is_shared(self.df) else self.df
+                    self.df = replay(df, entries)
+                    # index ที่สร้างไว้อาจไม่ตรงแล้ว: สร้างใหม่เมื่อค้นหาครั้งถัดไป
+                    self._barcode_index = None
+                    self._indexes = None
+                    self._mark_synced()
+                    dataset_cache.put(self.data_file, self.df)
+                    return 'delta'
+        
+        self.df = load_dataset(self.data_file)
+        self._mark_synced()
+        return 'full'
+    
+    @contextmanager
+    def transaction(self, expected_version: Optional[int] = None) -> Iterator['ProductManager']:
+        """
+        ล็อกไฟล์ข้อมูลและดึงการแก้ไขล่าสุดก่อน ใช้รวมการอ่าน-แก้ไขหลายขั้นโดยไม่มีโปรแกรมอื่นแทรก
+        (add_product / update_product / delete_product ใช้ภายในอยู่แล้ว)
+
+        ตัวอย่าง:
+            with manager.transaction():
+                product = manager.get_product_by_barcode(barcode)
+                manager.update_product(index, {'stock': product['stock'] - 1})
+
+        Args:
+            expected_version: version ที่ผู้เรียกเห็นล่าสุด (None = ไม่ตรวจ)
+
+        Raises:
+            VersionConflict: ข้อมูลถูกแก้ไขหลัง expected_version (self.df ถูกดึงใหม่แล้ว)
+        """
+        with self._lock:
+            self._refresh()
+            if expected_version is not None and self.version != expected_version:
+                raise VersionConflict(
+                    f"ข้อมูลถูกแก้ไขโดยโปรแกรมอื่น (version {expected_version} -> {self.version}) "
+                    f"กรุณาตรวจสอบข้อมูลล่าสุดแล้วลองใหม่")
+            yield self
+    
+    def _row_key(self, index: int) -> Optional[str]:
+        """บาร์โค้ดของแถวที่ตำแหน่ง index ใน self.df (None = ไม่มีแถว / ไม่มีบาร์โค้ด)"""
+        if self.df is None or 'barcode' not in self.df.columns or not 0 <= index < len(self.df):
+            return None
+        return normalize_barcode(self.df.at[index, 'barcode'])
+    
+    def _check_row(self, index: int, expected_key: Optional[str]) -> None:
+        """
+        ตรวจว่าแถวที่ตำแหน่ง index ยังเป็นสินค้าเดิมหลังดึงการแก้ไขล่าสุด
+        (โปรแกรมอื่นลบแถวก่อนหน้า แถวจะเลื่อนตำแหน่ง)
+
+        Raises:
+            VersionConflict: บาร์โค้ดของแถวไม่ตรงกับที่ผู้เรียกเห็น
+        """
+        if expected_key is not None and self._row_key(index) != expected_key:
+            raise VersionConflict(
+                f"สินค้าตำแหน่ง {index} ถูกเปลี่ยนโดยโปรแกรมอื่น (บาร์โค้ด {expected_key}) "
+                f"กรุณาค้นหาสินค้าใหม่แล้วลองใหม่")
+    
     def add_product(self, product_data: Dict) -> Tuple[bool, str]:
         """
         เพิ่มสินค้าใหม่
@@ -45,21 +221,117 @@ class ProductManager:
         Returns:
             (สำเร็จ, ข้อความ)
         """
+        success, message = self.add_products([product_data])
+        return success, "เพิ่มสินค้าสำเร็จ" if success else message
+    
+    def add_products(self, products: Iterable[Dict],
+                     expected_version: Optional[int] = None) -> Tuple[bool, str]:
+        """
+        เพิ่มสินค้าหลายรายการในครั้งเดียว
+        (รวมเป็นคอลัมน์แล้วต่อท้าย DataFrame ครั้งเดียว และบันทึกไฟล์ครั้งเดียว)
+
+        Args:
+            products: dict ข้อมูลสินค้าหลายรายการ
+            expected_version: version ที่ผู้เรียกเห็นล่าสุด (ไม่ตรงกับไฟล์ = ไม่บันทึก)
+
+        Returns:
+            (สำเร็จ, ข้อความ)
+        """
+        rows = [dict(product) for product in products]
+        if not rows:
+            return True, "ไม่มีสินค้าที่ต้องเพิ่ม"
+        
         try:
-            if self.df is None:
-                self.df = pd.DataFrame([product_data])
-            else:
-                self.df = pd.concat([self.df, pd.DataFrame([product_data])], ignore_index=True)
-            
-            self.df.to_csv(self.data_file, index=False)
-            return True, "เพิ่มสินค้าสำเร็จ"
+            with self.transaction(expected_version):
+                # รวมเป็นคอลัมน์ (แถวที่ไม่มีบางคอลัมน์เติม None)
+                columns: Dict[str, list] = {}
+                for position, row in enumerate(rows):
+                    for key, value in row.items():
+                        if key not in columns:
+                            columns[key] = [None] * position
+                        columns[key].append(value)
+                    for values in columns.values():
+                        if len(values) <= position:
+                            values.append(None)
+                new_rows = pd.DataFrame(columns)
+                
+                index = self._current_barcode_index()
+                indexes = self._current_indexes()
+                start = 0 if self.df is None else len(self.df)
+                if self.df is None:
+                    self.df = new_rows
+                else:
+                    self.df = pd.concat([self.df, new_rows], ignore_index=True)
+                
+                if index is not None:
+                    for position, value in enumerate(columns.get('barcode', []), start):
+                        key = normalize_barcode(value)
+                        if key is not None:
+                            index.setdefault(key, position)
+                    self._barcode_index_df = self.df
+                
+                if indexes is not None:
+                    if len(rows) > BULK_REBUILD_ROWS or not all(indexes.covers(row) for row in rows):
+                        # เพิ่มจำนวนมาก / มีคอลัมน์ใหม่: สร้าง index ใหม่เมื่อค้นหาครั้งถัดไป
+                        indexes = None
+                    else:
+                        for position, row in enumerate(rows, start):
+                            indexes.add(position, row)
+                self._indexes = indexes
+                self._indexes_df = self.df
+                
+                # ต่อท้าย journal แทนการเขียนทั้งไฟล์ (ชุดใหญ่จะเขียนทั้งไฟล์ครั้งเดียว)
+                journal_dataset(self.df, self.data_file, [add_entry(row) for row in rows])
+                self._mark_synced()
+                return True, f"เพิ่มสินค้าสำเร็จ: {len(rows)} รายการ"
+        
+        except VersionConflict as e:
+            return False, str(e)
         
         except Exception as e:
             return False, f"เกิดข้อผิดพลาด: {str(e)}"
     
+    @contextmanager
+    def batch(self) -> Iterator['ProductBatch']:
+        """
+        เพิ่มสินค้าหลายรายการเป็นชุดเดียว บันทึกพร้อมกันเมื่อจบ with
+        (ถ้าเกิดข้อผิดพลาดใน with จะยกเลิกทั้งชุด)
+
+        ตัวอย่าง:
+            with manager.batch() as batch:
+                for product in products:
+                    batch.add(product)
+            success, message = batch.result
+        """
+        session = ProductBatch(self)
+        yield session
+        session.commit()
+    
+    def _current_barcode_index(self) -> Optional[Dict[str, int]]:
+        """index บาร์โค้ดที่ตรงกับ self.df ปัจจุบัน (None ถ้ายังไม่สร้างหรือ self.df เปลี่ยนไปแล้ว)"""
+        if self._barcode_index is not None and self._barcode_index_df is self.df:
+            return self._barcode_index
+        return None
+    
+    def _get_barcode_index(self) -> Dict[str, int]:
+        """ดึง index บาร์โค้ด (สร้างใหม่ถ้ายังไม่มีหรือ self.df เปลี่ยน)"""
+        index = self._current_barcode_index()
+        if index is not None:
+            return index
+        
+        index = {}
+        if 'barcode' in self.df.columns:
+            # วนจากท้ายไปต้น เพื่อให้บาร์โค้ดซ้ำชี้ไปที่แถวแรก
+            keys = [normalize_barcode(value) for value in self.df['barcode'].tolist()]
+            index = {key: position for position, key in zip(range(len(keys) - 1, -1, -1), reversed(keys))
+                     if key is not None}
+        self._barcode_index = index
+        self._barcode_index_df = self.df
+        return index
+    
     def get_product_by_barcode(self, barcode: str) -> Dict:
         """
-        ค้นหาสินค้าตามบาร์โค้ด
+        ค้นหาสินค้าตามบาร์โค้ด (ค้นใน index ไม่ต้องสแกนทั้งคอลัมน์)
 
         Args:
             barcode: บาร์โค้ดสินค้า
@@ -70,16 +342,120 @@ class ProductManager:
         if self.df is None:
             return None
         
-        result = self.df[self.df.get('barcode', pd.Series()) == barcode]
+        position = self._get_barcode_index().get(normalize_barcode(barcode))
+        if position is None:
+            return None
         
-        if len(result) > 0:
-            return result.iloc[0].to_dict()
+        return self.df.iloc[position].to_dict()
+    
+    def get_products_by_barcodes(self, barcodes: List[str]) -> List[Optional[Dict]]:
+        """
+        ค้นหาสินค้าหลายบาร์โค้ดในครั้งเดียว (ดึงทุกแถวที่พบด้วยการเลือกแถวครั้งเดียว)
+
+        Args:
+            barcodes: รายการบาร์โค้ด
+
+        Returns:
+            list ข้อมูลสินค้าตามลำดับบาร์โค้ด (None ถ้าไม่พบ)
+        """
+        if self.df is None:
+            return [None] * len(barcodes)
         
+        index = self._get_barcode_index()
+        positions = [index.get(normalize_barcode(barcode)) for barcode in barcodes]
+        found = [position for position in positions if position is not None]
+        records = iter(self.df.iloc[found].to_dict('records'))
+        return [None if position is None else next(records) for position in positions]
+    
+    def _current_indexes(self) -> Optional[ProductIndexes]:
+        """index รองที่ตรงกับ self.df ปัจจุบัน (None ถ้ายังไม่สร้างหรือ self.df เปลี่ยนไปแล้ว)"""
+        if self._indexes is not None and self._indexes_df is self.df:
+            return self._indexes
         return None
     
-    def get_all_products(self) -> List[Dict]:
+    def _get_indexes(self) -> ProductIndexes:
+        """ดึง index รอง (สร้างใหม่ถ้ายังไม่มีหรือ self.df เปลี่ยน)"""
+        indexes = self._current_indexes()
+        if indexes is None:
+            indexes = ProductIndexes(self.df, self.name_column, self.category_column)
+            self._indexes = indexes
+            self._indexes_df = self.df
+        return indexes
+    
+    def _records(self, positions: List[int]) -> List[Dict]:
+        """แปลงตำแหน่งแถวเป็น list ของ dict"""
+        if len(positions) > SMALL_RESULT_ROWS:
+            return self.df.iloc[positions].to_dict('records')
+        columns = [(name, self.df[name]) for name in self.df.columns]
+        records = []
+        for position in positions:
+            record = {}
+            for name, series in columns:
+                value = series.iat[position]
+                record[name] = value.item() if isinstance(value, np.generic) else value
+            records.append(record)
+        return records
+    
+    def search_products(self, prefix: str, limit: Optional[int] = 10) -> List[Dict]:
+        """
+        ค้นหาสินค้าที่ชื่อขึ้นต้นด้วยข้อความ (ไม่สนตัวพิมพ์เล็ก/ใหญ่) สำหรับพิมพ์แล้วแสดงผลทันที
+
+        Args:
+            prefix: ข้อความขึ้นต้นของชื่อสินค้า
+            limit: จำนวนผลลัพธ์สูงสุด (None = ทั้งหมด)
+
+        Returns:
+            list ข้อมูลสินค้า เรียงตามชื่อ
+        """
+        if self.df is None:
+            return []
+        names = self._get_indexes().names
+        if names is None:
+            return []
+        return self._records(names.prefix(str(prefix).casefold(), limit))
+    
+    def get_products_by_category(self, category: str, limit: Optional[int] = None) -> List[Dict]:
+        """
+        ดึงสินค้าตามประเภท
+
+        Args:
+            category: ประเภทสินค้า
+            limit: จำนวนผลลัพธ์สูงสุด (None = ทั้งหมด)
+
+        Returns:
+            list ข้อมูลสินค้า เรียงตามลำดับในตาราง
+        """
+        if self.df is None:
+            return []
+        categories = self._get_indexes().categories
+        if categories is None:
+            return []
+        return self._records(categories.get(str(category).casefold(), limit))
+    
+    def get_products_in_range(self, column: str, low: Optional[float] = None, high: Optional[float] = None,
+                              limit: Optional[int] = None) -> List[Dict]:
+        """
+        ดึงสินค้าที่ค่าในคอลัมน์ตัวเลขอยู่ในช่วง [low, high] เช่น ช่วงราคา
+
+        Args:
+            column: คอลัมน์ตัวเลข (เช่น price)
+            low: ค่าต่ำสุด (None = ไม่จำกัด)
+            high: ค่าสูงสุด (None = ไม่จำกัด)
+            limit: จำนวนผลลัพธ์สูงสุด (None = ทั้งหมด)
+
+        Returns:
+            list ข้อมูลสินค้า เรียงตามค่าในคอลัมน์
         """
-        ดึงรายชื่อสินค้าทั้งหมด
+        if self.df is None:
+            return []
+        return self._records(self._get_indexes().numeric(self.df, column).between(low, high, limit))
+    
+    def get_all_products(self, columns: Optional[List[str]] = None) -> List[Dict]:
+        """
+        ดึงรายชื่อสินค้าทั้งหมด (ตารางใหญ่ควรใช้ get_products_page / iter_products)
+
+        Args:
+            columns: เฉพาะคอลัมน์เหล่านี้ (None = ทุกคอลัมน์)
 
         Returns:
             list ข้อมูลสินค้า
@@ -87,50 +463,239 @@ class ProductManager:
         if self.df is None:
             return []
         
-        return self.df.to_dict('records')
+        records, _ = self.get_products_page(0, len(self.df), columns)
+        return records
+    
+    @staticmethod
+    def _page_rows(df: pd.DataFrame, start: int, stop: int, columns: List[str]) -> List[tuple]:
+        """แถว [start, stop) เป็น tuple ตามลำดับคอลัมน์ (แปลงทีละคอลัมน์ เร็วกว่า to_dict)"""
+        page = df.iloc[start:stop]
+        return list(zip(*[page[column].tolist() for column in columns]))
     
-    def update_product(self, index: int, product_data: Dict) -> Tuple[bool, str]:
+    def _projection(self, df: pd.DataFrame, columns: Optional[List[str]]) -> List[str]:
+        if columns is None:
+            return list(df.columns)
+        missing = [column for column in columns if column not in df.columns]
+        if missing:
+            raise KeyError(f"ไม่พบคอลัมน์: {', '.join(map(str, missing))}")
+        return list(columns)
+    
+    def _cursor_position(self, cursor) -> int:
+        """
+        ตำแหน่งเริ่มของหน้าจาก cursor
+        ถ้าแถวก่อนหน้าเลื่อน (โปรแกรมอื่นลบแถวแล้ว refresh) จะหาแถวเดิมจากบาร์โค้ดแทนตำแหน่ง
+        """
+        if not isinstance(cursor, tuple):
+            return int(cursor)
+        offset, last_key, next_key = cursor
+        if last_key is None or self._row_key(offset - 1) == last_key:
+            return offset
+        
+        # การลบทำให้แถวเลื่อนขึ้นเท่านั้น: ค้นจากตำแหน่งเดิมย้อนขึ้นไป
+        keys = ([normalize_barcode(value) for value in self.df['barcode'].iloc[:offset + 1].tolist()]
+                if 'barcode' in self.df.columns else [])
+        for position in range(min(offset, len(keys)) - 1, -1, -1):
+            if keys[position] == last_key:
+                return position + 1
+        # แถวสุดท้ายของหน้าก่อนถูกลบ: เริ่มที่แถวแรกของหน้านี้ตามที่เห็นตอนสร้าง cursor
+        for position in range(min(offset, len(keys) - 1), -1, -1):
+            if keys[position] == next_key:
+                return position
+        return min(offset, len(self.df))
+    
+    def get_products_page(self, cursor=0, page_size: int = DEFAULT_PAGE_SIZE,
+                          columns: Optional[List[str]] = None) -> Tuple[List[Dict], Optional[tuple]]:
+        """
+        ดึงสินค้าทีละหน้า เรียงตามตำแหน่งในตาราง
+
+        cursor เก็บบาร์โค้ดของแถวสุดท้ายของหน้าก่อน (และแถวแรกของหน้าถัดไป) ไว้ด้วย
+        ถ้าระหว่างหน้ามีการลบแถว (refresh แล้ว) จะต่อจากสินค้าเดิม ไม่ข้ามหรือซ้ำแถว
+        (สินค้าที่ไม่มีบาร์โค้ดใช้ตำแหน่งอย่างเดียว: ต้องการข้อมูลชุดเดียวตลอดให้ใช้ iter_products)
+
+        Args:
+            cursor: 0 สำหรับหน้าแรก หรือค่าที่ได้จากหน้าก่อนหน้า
+            page_size: จำนวนสินค้าต่อหน้า
+            columns: เฉพาะคอลัมน์เหล่านี้ (None = ทุกคอลัมน์)
+
+        Returns:
+            (list ข้อมูลสินค้า, cursor ของหน้าถัดไป หรือ None ถ้าเป็นหน้าสุดท้าย)
+        """
+        if self.df is None:
+            return [], None
+        
+        columns = self._projection(self.df, columns)
+        start = self._cursor_position(cursor)
+        stop = min(start + page_size, len(self.df))
+        records = [dict(zip(columns, row)) for row in self._page_rows(self.df, start, stop, columns)]
+        if stop >= len(self.df):
+            return records, None
+        return records, (stop, self._row_key(stop - 1), self._row_key(stop))
+    
+    def iter_products(self, page_size: int = DEFAULT_PAGE_SIZE, columns: Optional[List[str]] = None,
+                      as_tuples: bool = False) -> Iterator:
+        """
+        วนอ่านสินค้าทีละรายการ (แปลงทีละหน้า ไม่สร้าง dict ของทั้งตารางพร้อมกัน)
+        ลำดับตามตำแหน่งในตาราง ณ ตอนเริ่มวน (การเพิ่ม/ลบระหว่างวนไม่ทำให้ข้ามหรือซ้ำแถว)
+
+        Args:
+            page_size: จำนวนแถวที่แปลงต่อครั้ง
+            columns: เฉพาะคอลัมน์เหล่านี้ (None = ทุกคอลัมน์)
+            as_tuples: คืน tuple ตามลำดับ columns แทน dict (ใช้หน่วยความจำน้อยกว่า)
+
+        Yields:
+            dict หรือ tuple ข้อมูลสินค้า
+        """
+        df = self.df
+        if df is None:
+            return
+        
+        columns = self._projection(df, columns)
+        for start in range(0, len(df), page_size):
+            rows = self._page_rows(df, start, start + page_size, columns)
+            if as_tuples:
+                yield from rows
+            else:
+                for row in rows:
+                    yield dict(zip(columns, row))
+    
+    def update_product(self, index: int, product_data: Dict,
+                       expected_version: Optional[int] = None) -> Tuple[bool, str]:
         """
         อัปเดตข้อมูลสินค้า
 
+        ถ้าโปรแกรมอื่นแก้ไขไฟล์จนแถวที่ index ไม่ใช่สินค้าเดิม (บาร์โค้ดไม่ตรง) จะไม่บันทึก
+
         Args:
             index: ตำแหน่งสินค้า
             product_data: dict ข้อมูลใหม่
+            expected_version: version ที่ผู้เรียกเห็นล่าสุด (ไม่ตรงกับไฟล์ = ไม่บันทึก)
 
         Returns:
             (สำเร็จ, ข้อความ)
         """
         try:
-            if self.df is None or index >= len(self.df):
-                return False, "ไม่พบสินค้า"
-            
-            for key, value in product_data.items():
-                self.df.at[index, key] = value
-            
-            self.df.to_csv(self.data_file, index=False)
-            return True, "อัปเดตสำเร็จ"
+            expected_key = self._row_key(index)
+            with self.transaction(expected_version):
+                self._check_row(index, expected_key)
+                if self.df is None or index >= len(self.df):
+                    return False, "ไม่พบสินค้า"
+                
+                barcode_index = self._current_barcode_index()
+                indexes = self._current_indexes()
+                old_values = {key: self.df.at[index, key] for key in product_data if key in self.df.columns}
+                
+                # DataFrame จากแคชใช้ร่วมกับโมดูลอื่น ต้อง copy ก่อนแก้ไข
+                if dataset_cache.is_shared(self.df):
+                    self.df = self.df.copy()
+                
+                old_key = normalize_barcode(self.df.at[index, 'barcode']) if 'barcode' in self.df.columns else None
+                
+                # คอลัมน์ category / ตัวเลขที่ลดขนาดไว้ต้องขยายก่อนรับค่าใหม่
+                for key, value in product_data.items():
+                    set_value(self.df, index, key, value)
+                
+                if barcode_index is not None and 'barcode' in product_data:
+                    new_key = normalize_barcode(product_data['barcode'])
+                    if barcode_index.get(old_key) == index and new_key != old_key:
+                        # อาจมีแถวหลังจากนี้ที่ใช้บาร์โค้ดเดิม: สร้าง index ใหม่เมื่อค้นหาครั้งถัดไป
+                        barcode_index = None
+                    elif new_key is not None and index < barcode_index.get(new_key, len(self.df)):
+                        barcode_index[new_key] = index
+                self._barcode_index = barcode_index
+                self._barcode_index_df = self.df
+                
+                if indexes is not None:
+                    if indexes.covers(product_data):
+                        indexes.update(index, old_values, product_data)
+                    else:
+                        indexes = None
+                self._indexes = indexes
+                self._indexes_df = self.df
+                
+                journal_dataset(self.df, self.data_file, [update_entry(index, product_data, old_values)])
+                self._mark_synced()
+                return True, "อัปเดตสำเร็จ"
+        
+        except VersionConflict as e:
+            return False, str(e)
         
         except Exception as e:
             return False, f"เกิดข้อผิดพลาด: {str(e)}"
     
-    def delete_product(self, index: int) -> Tuple[bool, str]:
+    def delete_product(self, index: int, expected_version: Optional[int] = None) -> Tuple[bool, str]:
         """
         ลบสินค้า
 
+        ถ้าโปรแกรมอื่นแก้ไขไฟล์จนแถวที่ index ไม่ใช่สินค้าเดิม (บาร์โค้ดไม่ตรง) จะไม่ลบ
+
         Args:
             index: ตำแหน่งสินค้า
+            expected_version: version ที่ผู้เรียกเห็นล่าสุด (ไม่ตรงกับไฟล์ = ไม่ลบ)
 
         Returns:
             (สำเร็จ, ข้อความ)
         """
         try:
-            if self.df is None or index >= len(self.df):
-                return False, "ไม่พบสินค้า"
-            
-            self.df = self.df.drop(index).reset_index(drop=True)
-            self.df.to_csv(self.data_file, index=False)
-            
-            return True, "ลบสำเร็จ"
+            expected_key = self._row_key(index)
+            with self.transaction(expected_version):
+                self._check_row(index, expected_key)
+                if self.df is None or index >= len(self.df):
+                    return False, "ไม่พบสินค้า"
+                
+                barcode_index = self._current_barcode_index()
+                if barcode_index is not None and 'barcode' in self.df.columns:
+                    old_key = normalize_barcode(self.df.at[index, 'barcode'])
+                    if barcode_index.get(old_key) == index:
+                        # แถวหลังจากนี้อาจใช้บาร์โค้ดเดียวกัน: สร้าง index ใหม่เมื่อค้นหาครั้งถัดไป
+                        barcode_index = None
+                    else:
+                        # แถวหลังตำแหน่งที่ลบเลื่อนขึ้นหนึ่งตำแหน่ง
+                        barcode_index = {key: position - 1 if position > index else position
+                                         for key, position in barcode_index.items()}
+                
+                old_row = self.df.iloc[index].to_dict()
+                indexes = self._current_indexes()
+                if indexes is not None:
+                    indexes.delete(index, old_row)
+                
+                self.df = self.df.drop(index).reset_index(drop=True)
+                self._barcode_index = barcode_index
+                self._barcode_index_df = self.df
+                self._indexes = indexes
+                self._indexes_df = self.df
+                journal_dataset(self.df, self.data_file, [delete_entry(index, old_row)])
+                self._mark_synced()
+                
+                return True, "ลบสำเร็จ"
+        
+        except VersionConflict as e:
+            return False, str(e)
         
         except Exception as e:
             return False, f"เกิดข้อผิดพลาด: {str(e)}"
+
+
+class ProductBatch:
+    """ชุดสินค้าที่รอเพิ่ม (ใช้ผ่าน ProductManager.batch)"""
+    
+    def __init__(self, manager: ProductManager):
+        self.manager = manager
+        self.pending: List[Dict] = []
+        # (สำเร็จ, ข้อความ) หลังบันทึก หรือ None ถ้ายังไม่บันทึก
+        self.result: Optional[Tuple[bool, str]] = None
+    
+    def __len__(self) -> int:
+        return len(self.pending)
+    
+    def add(self, product_data: Dict) -> None:
+        """เพิ่มสินค้าเข้าชุด (ยังไม่บันทึก)"""
+        if self.result is not None:
+            raise RuntimeError("ชุดนี้บันทึกไปแล้ว")
+        self.pending.append(dict(product_data))
+    
+    def commit(self) -> Tuple[bool, str]:
+        """บันทึกสินค้าทั้งชุดด้วย add_products"""
+        if self.result is None:
+            self.result = self.manager.add_products(self.pending)
+            self.pending = []
+        return self.result
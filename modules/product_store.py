@@ -0,0 +1,444 @@
+"""
+โมดูลสำหรับจัดเก็บข้อมูลสินค้าใน SQLite (ทางเลือกแทน ProductManager ที่ใช้ DataFrame)
+ค้นหา/แก้ไขรายแถวผ่าน index โดยไม่ต้องโหลดหรือเขียนทั้งแคตตาล็อก
+"""
+
+import datetime
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from modules.data_store import default_data_file, iter_batches, read_meta, write_table
+from modules.dataset_cache import compact_journal, dataset_cache
+from modules.product_manager import normalize_barcode
+
+
+_PRODUCTS_TABLE = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY
+);
+"""
+_SCHEMA = _PRODUCTS_TABLE + """
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+# จำนวนแถวต่อ transaction ตอนนำเข้า
+IMPORT_BATCH_ROWS = 50_000
+# จำนวนพารามิเตอร์สูงสุดต่อคำสั่ง IN (...)
+_MAX_IN_PARAMS = 500
+
+
+def _quote(name: str) -> str:
+    """ใส่เครื่องหมายคำพูดให้ชื่อคอลัมน์"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_type(dtype) -> str:
+    """ประเภทคอลัมน์ SQLite จาก dtype ของ pandas"""
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def _sql_value(value):
+    """แปลงค่าเป็นชนิดที่ SQLite รับได้ (ค่าว่าง = NULL, วันที่/เวลา = ข้อความ ISO 8601)"""
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, np.datetime64):
+        return None if np.isnat(value) else pd.Timestamp(value).isoformat()
+    if isinstance(value, (datetime.timedelta, np.timedelta64)):
+        return None if pd.isna(value) else str(pd.Timedelta(value))
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, (int, float, str, bytes)):
+        return value
+    return str(value)
+
+
+def _sql_column(series: pd.Series) -> list:
+    """ค่าของคอลัมน์เป็นชนิดที่ SQLite รับได้ สำหรับ executemany"""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        # astype(object) ได้ค่าชนิดของ Python (int, float, bool) และค่าว่างเป็น None
+        return series.astype(object).where(series.notna(), None).tolist()
+    return [_sql_value(value) for value in series.tolist()]
+
+
+def _restore_dtype(series: pd.Series, dtype: str) -> pd.Series:
+    """แปลงคอลัมน์ที่อ่านจาก SQLite กลับเป็นประเภทข้อมูลของไฟล์ต้นทาง (แปลงไม่ได้ = คงเดิม)"""
+    if str(series.dtype) == dtype:
+        return series
+    try:
+        if dtype.startswith('datetime64'):
+            values = pd.to_datetime(series, format='ISO8601', utc=',' in dtype)
+            return values.dt.tz_convert(dtype[dtype.index(',') + 1:-1].strip()) if ',' in dtype else values
+        if dtype.startswith('timedelta64'):
+            return pd.to_timedelta(series)
+        has_missing = bool(series.isna().any())
+        if dtype == 'bool' and has_missing:
+            return series.astype('boolean')
+        if dtype.startswith(('int', 'uint')) and has_missing:
+            # int ของ numpy เก็บค่าว่างไม่ได้: ใช้ int แบบ nullable ขนาดเดียวกัน
+            return series.astype(dtype[0].upper() + dtype[1:] if dtype.startswith('int') else 'U' + dtype[1:])
+        return series.astype(dtype)
+    except (TypeError, ValueError, OverflowError):
+        return series
+
+
+class _ConnectionPool:
+    """pool ของการเชื่อมต่อ SQLite ที่ใช้ซ้ำได้ระหว่าง thread (แต่ละการเชื่อมต่อเก็บ prepared statement ไว้)"""
+
+    def __init__(self, db_path: Path, size: int):
+        self._connections: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all: List[sqlite3.Connection] = []
+        for _ in range(size):
+            conn = sqlite3.connect(str(db_path), check_same_thread=False, cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._connections.put(conn)
+            self._all.append(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    def close(self) -> None:
+        for conn in self._all:
+            conn.close()
+
+
+class SQLiteProductManager:
+    """
+    คลาสสำหรับจัดการข้อมูลสินค้าใน SQLite (API เดียวกับ ProductManager)
+
+    index ของ update_product / delete_product คือ id ของสินค้า
+    (ตรงกับตำแหน่งแถวตอนนำเข้า และไม่เลื่อนเมื่อลบสินค้าอื่น) ผลการค้นหา/รายการสินค้ามี id ของแต่ละแถว
+    """
+
+    def __init__(self, data_file: Optional[str] = None, db_path: Optional[str] = None,
+                 category_column: str = 'type', pool_size: int = 4):
+        """
+        Args:
+            data_file: ไฟล์ข้อมูลสินค้าที่ใช้นำเข้า
+            db_path: ที่อยู่ฐานข้อมูล (None = <โฟลเดอร์ข้อมูล>/products.db)
+            category_column: คอลัมน์ประเภทสินค้าที่สร้าง index
+            pool_size: จำนวนการเชื่อมต่อใน pool
+        """
+        self.data_file = Path(data_file) if data_file else default_data_file("data")
+        self.db_path = Path(db_path) if db_path else self.data_file.parent / "products.db"
+        self.category_column = category_column
+        self._lock = threading.RLock()
+        self._pool = _ConnectionPool(self.db_path, pool_size)
+        with self._pool.connection() as conn:
+            conn.executescript(_SCHEMA)
+            conn.commit()
+        self._columns = self._read_columns()
+
+    def close(self) -> None:
+        """ปิดการเชื่อมต่อทั้งหมด"""
+        self._pool.close()
+
+    # ============ schema ============
+
+    def _read_columns(self, conn: Optional[sqlite3.Connection] = None) -> List[str]:
+        """คอลัมน์ของตารางสินค้าตามที่อยู่ในฐานข้อมูลจริง (PRAGMA table_info)"""
+        if conn is None:
+            with self._pool.connection() as conn:
+                return self._read_columns(conn)
+        return [row[1] for row in conn.execute("PRAGMA table_info(products)") if row[1] != 'id']
+
+    def _ensure_columns(self, conn: sqlite3.Connection, types: Dict[str, str], index: bool = True) -> None:
+        """เพิ่มคอลัมน์ที่ยังไม่มี และสร้าง index ของบาร์โค้ด / ประเภทสินค้า"""
+        with self._lock:
+            for name, sql_type in types.items():
+                if name == 'id' or name in self._columns:
+                    continue
+                conn.execute(f"ALTER TABLE products ADD COLUMN {_quote(name)} {sql_type}")
+                self._columns.append(name)
+            if index:
+                self._create_indexes(conn)
+
+    def _indexed_columns(self) -> List[str]:
+        return [name for name in ('barcode', self.category_column) if name in self._columns]
+
+    def _create_indexes(self, conn: sqlite3.Connection) -> None:
+        for name in self._indexed_columns():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote('idx_products_' + name)} ON products({_quote(name)})")
+
+    @staticmethod
+    def _row_values(product_data: Dict) -> Dict:
+        values = {key: _sql_value(value) for key, value in product_data.items() if key != 'id'}
+        # บาร์โค้ดเก็บเป็นข้อความเสมอ
+        if 'barcode' in values:
+            values['barcode'] = normalize_barcode(values['barcode'])
+        return values
+
+    def _types_of(self, values: Dict) -> Dict[str, str]:
+        return {key: "TEXT" if key == 'barcode' else _sql_type(pd.Series([value]).dtype)
+                for key, value in values.items() if key not in self._columns}
+
+    # ============ โหลด / นำเข้า ============
+
+    def load_data(self) -> Tuple[bool, str]:
+        """
+        เตรียมข้อมูลสินค้า: ใช้ฐานข้อมูลเดิมถ้าไฟล์ข้อมูลไม่เปลี่ยนตั้งแต่นำเข้าครั้งก่อน
+        ถ้าไฟล์ข้อมูลเปลี่ยน (เช่น อัปโหลดใหม่) จะนำเข้าใหม่ทั้งหมด
+
+        Returns:
+            (สำเร็จ, ข้อความ)
+        """
+        try:
+            if self.data_file.exists():
+                compact_journal(self.data_file)
+                meta = read_meta(self.data_file)
+                source_hash = meta['content_hash'] if meta else None
+                if source_hash is None or source_hash != self._get_state('source_hash'):
+                    rows = self.import_file(self.data_file)
+                    self._set_state('source_hash', source_hash)
+                    return True, f"นำเข้าสำเร็จ: {rows} สินค้า"
+            elif not self._columns:
+                return False, "ไฟล์ไม่พบ"
+
+            return True, f"โหลดสำเร็จ: {self.count()} สินค้า"
+
+        except Exception as e:
+            return False, f"เกิดข้อผิดพลาด: {str(e)}"
+
+    def import_file(self, path) -> int:
+        """
+        แทนที่ข้อมูลสินค้าทั้งหมดด้วยข้อมูลจากไฟล์ (อ่านทีละ batch แล้ว executemany)
+        สร้างตารางใหม่ตามคอลัมน์ของไฟล์ และเก็บประเภทข้อมูลต้นทางไว้ใช้ตอน export_data
+
+        Returns:
+            จำนวนสินค้าที่นำเข้า
+        """
+        rows = 0
+        dtypes: Dict[str, str] = {}
+        with self._lock, self._pool.connection() as conn:
+            try:
+                conn.execute("BEGIN")
+                # สร้างตารางใหม่: คอลัมน์ของข้อมูลเดิมที่ไม่มีในไฟล์ใหม่ไม่ค้างอยู่
+                # (index สร้างครั้งเดียวหลังเพิ่มข้อมูลครบ เร็วกว่าปรับ index ทุกแถว)
+                conn.execute("DROP TABLE IF EXISTS products")
+                conn.execute(_PRODUCTS_TABLE)
+                self._columns = []
+                for batch in iter_batches(path, batch_rows=IMPORT_BATCH_ROWS):
+                    for col, dtype in batch.dtypes.items():
+                        dtypes.setdefault(str(col), str(dtype))
+                    types = {str(col): "TEXT" if col == 'barcode' else _sql_type(dtype)
+                             for col, dtype in batch.dtypes.items()}
+                    self._ensure_columns(conn, types, index=False)
+                    columns = ['id'] + [str(col) for col in batch.columns]
+                    values = [range(rows, rows + len(batch))]
+                    for col in batch.columns:
+                        if col == 'barcode':
+                            values.append([normalize_barcode(value) for value in batch[col].tolist()])
+                        else:
+                            values.append(_sql_column(batch[col]))
+                    conn.executemany(
+                        f"INSERT INTO products ({', '.join(_quote(col) for col in columns)}) "
+                        f"VALUES ({', '.join('?' * len(columns))})",
+                        zip(*values)
+                    )
+                    rows += len(batch)
+                self._create_indexes(conn)
+                conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('dtypes', ?)",
+                             (json.dumps(dtypes),))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                # คอลัมน์ที่เพิ่มระหว่าง transaction ที่ยกเลิกไม่มีอยู่จริง: อ่านจากฐานข้อมูลใหม่
+                self._columns = self._read_columns(conn)
+        return rows
+
+    def export_data(self, path=None) -> int:
+        """
+        เขียนข้อมูลสินค้าทั้งหมดกลับเป็นไฟล์ข้อมูล (ให้โมดูลที่อ่านไฟล์เห็นการแก้ไข)
+
+        Args:
+            path: ไฟล์ปลายทาง (None = ไฟล์ข้อมูลที่ใช้นำเข้า)
+
+        Returns:
+            จำนวนสินค้า
+        """
+        path = Path(path) if path else self.data_file
+        with self._pool.connection() as conn:
+            df = pd.read_sql_query("SELECT * FROM products ORDER BY id", conn).drop(columns=['id'])
+        # SQLite เก็บ bool เป็น 0/1 และวันที่เป็นข้อความ: แปลงกลับเป็นประเภทของไฟล์ที่นำเข้า
+        dtypes = json.loads(self._get_state('dtypes') or '{}')
+        for col in df.columns:
+            if col in dtypes:
+                df[col] = _restore_dtype(df[col], dtypes[col])
+        write_table(df, path)
+        dataset_cache.invalidate(path)
+        if path == self.data_file:
+            meta = read_meta(path)
+            self._set_state('source_hash', meta['content_hash'] if meta else None)
+        return len(df)
+
+    def _get_state(self, key: str) -> Optional[str]:
+        with self._pool.connection() as conn:
+            row = conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value: Optional[str]) -> None:
+        with self._pool.connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, value))
+            conn.commit()
+
+    # ============ อ่าน ============
+
+    def count(self) -> int:
+        """จำนวนสินค้า"""
+        with self._pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def _records(self, cursor: sqlite3.Cursor) -> List[Dict]:
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def get_product_by_barcode(self, barcode: str) -> Optional[Dict]:
+        """
+        ค้นหาสินค้าตามบาร์โค้ด (ใช้ index ของคอลัมน์ barcode)
+
+        Returns:
+            dict ข้อมูลสินค้า (รวม id) หรือ None ถ้าไม่พบ
+        """
+        if 'barcode' not in self._columns:
+            return None
+        with self._pool.connection() as conn:
+            cursor = conn.execute(f"SELECT {self._select_list()} FROM products "
+                                  "WHERE barcode = ? ORDER BY id LIMIT 1", (normalize_barcode(barcode),))
+            records = self._records(cursor)
+        return records[0] if records else None
+
+    def get_products_by_barcodes(self, barcodes: List[str]) -> List[Optional[Dict]]:
+        """
+        ค้นหาสินค้าหลายบาร์โค้ด (คำสั่ง IN ครั้งละไม่เกิน 500 บาร์โค้ด)
+
+        Returns:
+            list ข้อมูลสินค้าตามลำดับบาร์โค้ด (None ถ้าไม่พบ)
+        """
+        keys = [normalize_barcode(barcode) for barcode in barcodes]
+        if 'barcode' not in self._columns:
+            return [None] * len(keys)
+
+        found: Dict[str, Dict] = {}
+        unique = list(dict.fromkeys(key for key in keys if key is not None))
+        with self._pool.connection() as conn:
+            for start in range(0, len(unique), _MAX_IN_PARAMS):
+                part = unique[start:start + _MAX_IN_PARAMS]
+                cursor = conn.execute(
+                    f"SELECT {self._select_list()} FROM products WHERE barcode IN "
+                    f"({', '.join('?' * len(part))}) ORDER BY id DESC", part)
+                # เรียง id จากมากไปน้อย: บาร์โค้ดซ้ำได้แถวแรกสุด
+                for record in self._records(cursor):
+                    found[record['barcode']] = record
+        return [found.get(key) for key in keys]
+
+    def get_all_products(self) -> List[Dict]:
+        """
+        ดึงรายชื่อสินค้าทั้งหมด (เรียงตาม id)
+
+        Returns:
+            list ข้อมูลสินค้า (รวม id สำหรับ update_product / delete_product)
+        """
+        with self._pool.connection() as conn:
+            return self._records(conn.execute(f"SELECT {self._select_list()} FROM products ORDER BY id"))
+
+    def _select_list(self) -> str:
+        # id คือคีย์ที่ update_product / delete_product ใช้ (ไม่ตรงกับลำดับในรายการหลังลบสินค้า)
+        return ', '.join(['id'] + [_quote(col) for col in self._columns])
+
+    # ============ แก้ไข ============
+
+    def add_product(self, product_data: Dict) -> Tuple[bool, str]:
+        """
+        เพิ่มสินค้าใหม่
+
+        Returns:
+            (สำเร็จ, ข้อความ)
+        """
+        try:
+            values = self._row_values(product_data)
+            with self._pool.connection() as conn:
+                self._ensure_columns(conn, self._types_of(values))
+                columns = ', '.join(['id'] + [_quote(col) for col in values])
+                conn.execute(
+                    f"INSERT INTO products ({columns}) "
+                    f"VALUES ((SELECT COALESCE(MAX(id) + 1, 0) FROM products){', ?' * len(values)})",
+                    list(values.values())
+                )
+                conn.commit()
+            return True, "เพิ่มสินค้าสำเร็จ"
+
+        except Exception as e:
+            return False, f"เกิดข้อผิดพลาด: {str(e)}"
+
+    def update_product(self, index: int, product_data: Dict) -> Tuple[bool, str]:
+        """
+        อัปเดตข้อมูลสินค้า
+
+        Args:
+            index: id ของสินค้า
+            product_data: dict ข้อมูลใหม่
+
+        Returns:
+            (สำเร็จ, ข้อความ)
+        """
+        try:
+            values = self._row_values(product_data)
+            if not values:
+                return False, "ไม่มีข้อมูลที่ต้องอัปเดต"
+            with self._pool.connection() as conn:
+                self._ensure_columns(conn, self._types_of(values))
+                assignments = ', '.join(f"{_quote(col)} = ?" for col in values)
+                cursor = conn.execute(f"UPDATE products SET {assignments} WHERE id = ?",
+                                      list(values.values()) + [int(index)])
+                conn.commit()
+            if cursor.rowcount == 0:
+                return False, "ไม่พบสินค้า"
+            return True, "อัปเดตสำเร็จ"
+
+        except Exception as e:
+            return False, f"เกิดข้อผิดพลาด: {str(e)}"
+
+    def delete_product(self, index: int) -> Tuple[bool, str]:
+        """
+        ลบสินค้า
+
+        Args:
+            index: id ของสินค้า
+
+        Returns:
+            (สำเร็จ, ข้อความ)
+        """
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.execute("DELETE FROM products WHERE id = ?", (int(index),))
+                conn.commit()
+            if cursor.rowcount == 0:
+                return False, "ไม่พบสินค้า"
+            return True, "ลบสำเร็จ"
+
+        except Exception as e:
+            return False, f"เกิดข้อผิดพลาด: {str(e)}"
@@ -0,0 +1,129 @@
+"""
+โมดูลสำหรับแคชผลการตรวจสอบข้อมูลลงดิสก์ (อ้างอิงตาม hash ของเนื้อหา)
+ข้อมูลที่ไม่เปลี่ยนได้ผลทันที และข้อมูลที่เปลี่ยนตรวจใหม่เฉพาะ chunk ที่เปลี่ยน
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, Optional
+import numpy as np
+import pandas as pd
+
+
+REPORTS_SUFFIX = ".reports"
+# เปลี่ยนเมื่อรูปแบบรายงานเปลี่ยน เพื่อไม่ใช้แคชเก่า
+REPORT_FORMAT_VERSION = 2
+
+
+def _update_column(digest, series: pd.Series) -> None:
+    """ใส่ค่าของคอลัมน์ลงใน digest แบบไม่สูญเสียข้อมูล (ค่าต่างกัน = ไบต์ต่างกัน)"""
+    missing = series.isna().to_numpy()
+    digest.update(missing.tobytes())
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        digest.update(series.cat.codes.to_numpy().tobytes())
+        _update_column(digest, pd.Series(series.cat.categories))
+        return
+    if pd.api.types.is_datetime64_any_dtype(series) or pd.api.types.is_timedelta64_dtype(series):
+        digest.update(series.to_numpy(copy=True).view(np.int64).tobytes())
+        return
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        numpy_dtype = getattr(series.dtype, 'numpy_dtype', series.dtype)
+        fill = False if pd.api.types.is_bool_dtype(numpy_dtype) else 0
+        digest.update(series.to_numpy(dtype=numpy_dtype, na_value=fill).tobytes())
+        return
+
+    # ข้อความ / object: เก็บความยาวของแต่ละค่าไว้ด้วย เพื่อไม่ให้การต่อข้อความกำกวม
+    values = series.to_numpy(dtype=object, na_value=None)[~missing].tolist()
+    if not all(isinstance(value, str) for value in values):
+        # ชนิดปนกัน: แยก 1 กับ '1' ด้วยชื่อชนิด
+        values = [f"{type(value).__name__}:{value!r}" for value in values]
+    encoded = [value.encode('utf-8', 'surrogatepass') for value in values]
+    digest.update(np.array([len(value) for value in encoded], dtype=np.int64).tobytes())
+    digest.update(b''.join(encoded))
+
+
+def chunk_key(chunk: pd.DataFrame) -> str:
+    """hash ของเนื้อหา chunk (ค่าทุกแถว + ชื่อคอลัมน์ + ประเภทข้อมูล) จากไบต์ของค่าจริงในแต่ละคอลัมน์"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in chunk.dtypes.items()],
+                             ensure_ascii=False).encode('utf-8'))
+    digest.update(np.int64(len(chunk)).tobytes())
+    for col in chunk.columns:
+        _update_column(digest, chunk[col])
+    return digest.hexdigest()
+
+
+class ReportCache:
+    """แคชรายงานผลการตรวจสอบของไฟล์ข้อมูล (ไฟล์ JSON ต่อรายการใน <ไฟล์ข้อมูล>.reports/)"""
+
+    def __init__(self, data_file):
+        """
+        Args:
+            data_file: ที่อยู่ไฟล์ข้อมูล
+        """
+        data_file = Path(data_file)
+        self.directory = data_file.with_name(data_file.name + REPORTS_SUFFIX)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """สร้างคีย์จากส่วนประกอบ (เช่น content_hash และ version ของชุดกฎ)"""
+        encoded = json.dumps([REPORT_FORMAT_VERSION, *parts], ensure_ascii=False).encode('utf-8')
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+    def _path(self, kind: str, key: str) -> Path:
+        return self.directory / f"{kind}-{key}.json"
+
+    def get(self, kind: str, key: str) -> Optional[Any]:
+        """
+        อ่านรายงานจากแคช
+
+        Args:
+            kind: ชนิดรายงาน (เช่น summary, rules)
+            key: คีย์จาก make_key หรือ chunk_key
+
+        Returns:
+            รายงาน หรือ None ถ้าไม่มีในแคช
+        """
+        try:
+            with open(self._path(kind, key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, kind: str, key: str, value: Any, replace: bool = False) -> None:
+        """
+        บันทึกรายงานลงแคช (เขียนไฟล์ชั่วคราวแล้วแทนที่)
+
+        Args:
+            kind: ชนิดรายงาน
+            key: คีย์
+            value: รายงาน (ต้องแปลงเป็น JSON ได้)
+            replace: ลบรายงานชนิดเดียวกันที่คีย์อื่นออก (เก็บเฉพาะล่าสุด)
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(kind, key)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        if replace:
+            self.prune(kind, [key])
+
+    def prune(self, kind: str, keep: Iterable[str]) -> int:
+        """
+        ลบรายงานชนิดนี้ที่ไม่อยู่ใน keep
+
+        Returns:
+            จำนวนไฟล์ที่ลบ
+        """
+        if not self.directory.exists():
+            return 0
+        keep = {self._path(kind, key).name for key in keep}
+        removed = 0
+        for path in self.directory.glob(f"{kind}-*.json"):
+            if path.name not in keep:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
@@ -0,0 +1,285 @@
+"""
+โมดูลสำหรับ index ของ hash ต่อแถว (ทั้งแถวหรือเฉพาะบางคอลัมน์) ที่บันทึกลงไฟล์
+ใช้นับแถวซ้ำและตรวจคีย์ซ้ำโดยไม่ต้องอ่านข้อมูลทั้งหมดใหม่
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+
+
+INDEX_SUFFIX = ".hashidx"
+# ส่วนต่างที่ยังไม่รวมเกินสัดส่วนนี้ของ index หลัก: เขียน index หลักใหม่ทั้งไฟล์
+DELTA_COMPACT_RATIO = 0.1
+# ส่วนต่างไม่เกินจำนวนนี้ บันทึกเป็นไฟล์ส่วนต่างเสมอ
+DELTA_COMPACT_MIN = 10_000
+
+
+# เปลี่ยนเมื่อวิธีคำนวณ hash เปลี่ยน เพื่อไม่ใช้ index ที่บันทึกด้วยวิธีเก่า
+HASH_FORMAT = 2
+# hash ของค่าว่างในแต่ละคอลัมน์ (ค่าว่างทุกแบบ None / NaN / NA / NaT ถือเป็นค่าเดียวกัน)
+_NULL_HASH = np.uint64(0x9E3779B97F4A7C15)
+# ผสมกับ bit ของทศนิยมที่ไม่ใช่จำนวนเต็ม เพื่อแยกจากจำนวนเต็มที่มีค่า bit เดียวกัน
+_FLOAT_TAG = np.uint64(0xC2B2AE3D27D4EB4F)
+
+
+def _hash_column(series: pd.Series) -> np.ndarray:
+    """
+    hash 64 บิตของค่าในคอลัมน์ตาม dtype ของคอลัมน์ (ไม่แปลงแบบเสียข้อมูล)
+    จำนวนเต็มทุกขนาด และทศนิยมที่เป็นจำนวนเต็มได้ hash เดียวกัน (เช่น คอลัมน์ int กับ float ที่มีค่าว่าง)
+    """
+    missing = series.isna().to_numpy()
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        filled = series.fillna(0) if missing.any() else series
+        if pd.api.types.is_unsigned_integer_dtype(filled) and len(filled) and filled.max() > np.iinfo(np.int64).max:
+            values = filled.to_numpy(dtype=np.uint64)
+        else:
+            values = filled.to_numpy(dtype=np.int64).view(np.uint64)
+        hashes = pd.util.hash_array(values)
+    elif pd.api.types.is_float_dtype(series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        integral = np.isfinite(values) & (np.floor(values) == values) & (np.abs(values) < 2.0 ** 63)
+        as_int = np.where(integral, values, 0).astype(np.int64).view(np.uint64)
+        bits = np.where(missing, 0, values).view(np.uint64) ^ _FLOAT_TAG
+        hashes = pd.util.hash_array(np.where(integral, as_int, bits))
+    elif pd.api.types.is_datetime64_any_dtype(series):
+        if getattr(series.dt, 'tz', None) is not None:
+            series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+        values = series.astype('datetime64[ns]').to_numpy().view(np.int64).view(np.uint64)
+        hashes = pd.util.hash_array(values)
+    else:
+        values = series.astype(object).to_numpy(copy=True)
+        values[missing] = ''
+        hashes = pd.util.hash_array(values.astype(str).astype(object))
+
+    if missing.any():
+        hashes = np.where(missing, _NULL_HASH, hashes)
+    return hashes.astype(np.uint64, copy=False)
+
+
+def hash_rows(df: pd.DataFrame, columns: Optional[List[str]] = None) -> np.ndarray:
+    """
+    คำนวณ hash 64 บิตของแต่ละแถว (hash แต่ละคอลัมน์ตาม dtype แล้วรวมตามลำดับคอลัมน์)
+    ค่าเดียวกันได้ hash เดียวกันแม้ dtype ของแต่ละไฟล์ต่างกัน (int8/int64/float, category/ข้อความ)
+    แต่ค่าต่างกันไม่ถูกรวมเป็นค่าเดียว (จำนวนเต็มเกิน 2**53 และค่าว่างกับข้อความ "None" แยกกัน)
+
+    Args:
+        df: DataFrame
+        columns: คอลัมน์ที่ใช้ (None = ทุกคอลัมน์)
+
+    Returns:
+        numpy array uint64 ขนาดเท่าจำนวนแถว
+    """
+    frame = df[list(columns)] if columns else df
+    n_columns = frame.shape[1]
+    result = np.full(len(frame), 0x345678, dtype=np.uint64)
+    multiplier = np.uint64(1000003)
+    for i in range(n_columns):
+        # รวมแบบเดียวกับ hash ของ tuple: ลำดับคอลัมน์มีผล
+        result = (result ^ _hash_column(frame.iloc[:, i])) * multiplier
+        multiplier += np.uint64(82520 + 2 * (n_columns - i))
+    return result + np.uint64(97531)
+
+
+def _merge_counts(hashes: np.ndarray, counts: np.ndarray, values: np.ndarray,
+                  deltas: np.ndarray, signed: bool = False):
+    """
+    รวมจำนวนครั้งของ hash ที่เรียงแล้วเข้ากับ multiset ที่เรียงแล้ว (แทรกด้วย searchsorted ไม่ต้องเรียงใหม่ทั้งหมด)
+
+    Args:
+        hashes, counts: multiset เดิม (hash ไม่ซ้ำ เรียงแล้ว)
+        values, deltas: hash ที่ไม่ซ้ำและเรียงแล้ว กับจำนวนที่เพิ่ม (ติดลบ = ลบออก)
+        signed: เก็บจำนวนติดลบไว้ (ใช้กับส่วนต่าง) แทนการตัดออก
+
+    Returns:
+        (hashes, counts) ใหม่
+    """
+    positions = np.searchsorted(hashes, values)
+    found = positions < len(hashes)
+    found[found] = hashes[positions[found]] == values[found]
+    counts = counts.copy()
+    counts[positions[found]] += deltas[found]
+    new = ~found
+    hashes = np.insert(hashes, positions[new], values[new])
+    counts = np.insert(counts, positions[new], deltas[new])
+    keep = counts != 0 if signed else counts > 0
+    return hashes[keep], counts[keep]
+
+
+class RowHashIndex:
+    """
+    index แบบ multiset ของ hash ต่อแถว (hash ที่เรียงแล้ว + จำนวนครั้ง)
+    ผูกกับ version ของ metadata ไฟล์ข้อมูล ถ้า version ไม่ตรงถือว่าต้องสร้างใหม่
+
+    บันทึกเป็นไฟล์หลัก + ไฟล์ส่วนต่างจากไฟล์หลัก (การนำเข้าแต่ละครั้งเขียนเฉพาะส่วนต่าง)
+    และรวมเป็นไฟล์หลักใหม่เมื่อส่วนต่างใหญ่เกิน DELTA_COMPACT_RATIO ของ index
+    """
+
+    def __init__(self, data_file, columns: Optional[List[str]] = None):
+        """
+        Args:
+            data_file: ที่อยู่ไฟล์ข้อมูล
+            columns: คอลัมน์ที่ใช้เป็นคีย์ (None = ทั้งแถว)
+        """
+        self.data_file = Path(data_file)
+        self.columns = list(columns) if columns else None
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.version = None
+        # version ของไฟล์หลักที่ index นี้ต่อยอดจาก และส่วนต่างตั้งแต่ไฟล์หลักนั้น
+        self._base_version: Optional[int] = None
+        self._delta_hashes = np.empty(0, dtype=np.uint64)
+        self._delta_counts = np.empty(0, dtype=np.int64)
+
+    @property
+    def index_file(self) -> Path:
+        """ที่อยู่ไฟล์ index"""
+        index_dir = self.data_file.with_name(self.data_file.name + INDEX_SUFFIX)
+        if self.columns is None:
+            return index_dir / "rows.npz"
+        digest = hashlib.blake2b(json.dumps(self.columns).encode('utf-8'), digest_size=6).hexdigest()
+        return index_dir / f"cols-{digest}.npz"
+
+    @property
+    def delta_file(self) -> Path:
+        """ที่อยู่ไฟล์ส่วนต่างของ index"""
+        return self.index_file.with_suffix('.delta.npz')
+
+    # ============ บันทึก / โหลด ============
+
+    def load(self, version: Optional[int]) -> bool:
+        """
+        โหลด index จากไฟล์
+
+        Args:
+            version: version ของ metadata ปัจจุบัน
+
+        Returns:
+            True ถ้าโหลดได้และ version ตรงกัน
+        """
+        if version is None:
+            return False
+        try:
+            with np.load(self.index_file) as data:
+                if int(data.get('format', 0)) != HASH_FORMAT:
+                    return False
+                base_version = int(data['version'])
+                hashes, counts = data['hashes'], data['counts']
+            if base_version != version:
+                # ไฟล์หลักเก่ากว่า: ใช้ได้เมื่อมีส่วนต่างจากไฟล์หลักนี้ถึง version ปัจจุบัน
+                with np.load(self.delta_file) as data:
+                    if (int(data.get('format', 0)) != HASH_FORMAT or int(data['base']) != base_version
+                            or int(data['version']) != version):
+                        return False
+                    delta_hashes, delta_counts = data['hashes'], data['counts']
+            else:
+                delta_hashes = np.empty(0, dtype=np.uint64)
+                delta_counts = np.empty(0, dtype=np.int64)
+        except (OSError, KeyError, ValueError):
+            return False
+        self.hashes, self.counts = _merge_counts(hashes, counts, delta_hashes, delta_counts)
+        self._base_version = base_version
+        self._delta_hashes, self._delta_counts = delta_hashes, delta_counts
+        self.version = version
+        return True
+
+    def save(self, version: int) -> None:
+        """
+        บันทึก index ลงไฟล์ (เฉพาะส่วนต่างถ้ายังเล็ก หรือเขียนไฟล์หลักใหม่ทั้งไฟล์)
+
+        Args:
+            version: version ของ metadata ที่ index นี้ตรงกับ
+        """
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        delta_size = len(self._delta_hashes)
+        if (self._base_version is not None and self._base_version != version
+                and delta_size <= max(DELTA_COMPACT_MIN, len(self.hashes) * DELTA_COMPACT_RATIO)):
+            tmp_path = self.delta_file.with_suffix('.tmp.npz')
+            np.savez(tmp_path, hashes=self._delta_hashes, counts=self._delta_counts,
+                     base=np.int64(self._base_version), version=np.int64(version),
+                     format=np.int64(HASH_FORMAT))
+            os.replace(tmp_path, self.delta_file)
+        else:
+            tmp_path = self.index_file.with_suffix('.tmp.npz')
+            np.savez(tmp_path, hashes=self.hashes, counts=self.counts, version=np.int64(version),
+                     format=np.int64(HASH_FORMAT))
+            os.replace(tmp_path, self.index_file)
+            self.delta_file.unlink(missing_ok=True)
+            self._base_version = version
+            self._delta_hashes = np.empty(0, dtype=np.uint64)
+            self._delta_counts = np.empty(0, dtype=np.int64)
+        self.version = version
+
+    # ============ สร้าง / ปรับปรุง ============
+
+    def build(self, df: pd.DataFrame) -> None:
+        """สร้าง index ใหม่จากข้อมูลทั้งหมด"""
+        self.set_hashes(hash_rows(df, self.columns))
+
+    def set_hashes(self, hashes: np.ndarray) -> None:
+        """แทนที่ index ทั้งหมดด้วย hash ของทุกแถว (บันทึกครั้งถัดไปจะเขียนไฟล์หลักใหม่)"""
+        self.set_counts(*np.unique(hashes.astype(np.uint64), return_counts=True))
+
+    def set_counts(self, hashes: np.ndarray, counts: np.ndarray) -> None:
+        """แทนที่ index ทั้งหมดด้วย hash ที่ไม่ซ้ำและเรียงแล้ว กับจำนวนครั้งของแต่ละ hash"""
+        self.hashes = hashes.astype(np.uint64, copy=False)
+        self.counts = counts.astype(np.int64, copy=False)
+        self._base_version = None
+        self._delta_hashes = np.empty(0, dtype=np.uint64)
+        self._delta_counts = np.empty(0, dtype=np.int64)
+
+    def _apply(self, hashes: np.ndarray, sign: int) -> None:
+        values, counts = np.unique(hashes.astype(np.uint64), return_counts=True)
+        deltas = sign * counts.astype(np.int64)
+        if sign < 0:
+            # ลบได้ไม่เกินจำนวนที่มีอยู่ ส่วนต่างจึงตรงกับการเปลี่ยนแปลงจริง
+            positions = np.clip(np.searchsorted(self.hashes, values), 0, max(len(self.hashes) - 1, 0))
+            present = np.where(self.hashes[positions] == values, self.counts[positions], 0)
+            deltas = -np.minimum(counts.astype(np.int64), present)
+        self.hashes, self.counts = _merge_counts(self.hashes, self.counts, values, deltas)
+        if self._base_version is not None:
+            self._delta_hashes, self._delta_counts = _merge_counts(
+                self._delta_hashes, self._delta_counts, values, deltas, signed=True)
+
+    def add(self, hashes: np.ndarray) -> None:
+        """เพิ่ม hash ของแถวใหม่"""
+        if len(hashes) == 0:
+            return
+        self._apply(hashes, 1)
+
+    def remove(self, hashes: np.ndarray) -> None:
+        """ลบ hash ของแถวที่ถูกแทนที่/ลบ (ครั้งละหนึ่งแถวต่อ hash ที่ส่งมา)"""
+        if len(hashes) == 0 or len(self.hashes) == 0:
+            return
+        self._apply(hashes, -1)
+
+    # ============ ค้นหา ============
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        ตรวจว่า hash อยู่ใน index หรือไม่
+
+        Returns:
+            boolean mask ขนาดเท่า hashes
+        """
+        if len(self.hashes) == 0:
+            return np.zeros(len(hashes), dtype=bool)
+        positions = np.clip(np.searchsorted(self.hashes, hashes), 0, len(self.hashes) - 1)
+        return self.hashes[positions] == hashes
+
+    @property
+    def total(self) -> int:
+        """จำนวนแถวทั้งหมดใน index"""
+        return int(self.counts.sum())
+
+    @property
+    def duplicate_count(self) -> int:
+        """จำนวนแถวซ้ำ (ไม่นับแถวแรกของแต่ละค่า)"""
+        return int(self.counts.sum() - len(self.counts))
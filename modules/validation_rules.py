@@ -0,0 +1,252 @@
+"""
+โมดูลสำหรับกฎตรวจสอบข้อมูลแบบ declarative (ช่วงค่า, regex, ค่าที่อนุญาต, เทียบข้ามคอลัมน์)
+กฎแต่ละข้อถูกแปลงเป็น mask แบบ vectorized และประมวลผลขนานด้วย process pool
+"""
+
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+
+RULE_TYPES = ('not_null', 'range', 'regex', 'allowed', 'compare')
+COMPARE_OPERATORS = {
+    '<': np.less, '<=': np.less_equal, '>': np.greater,
+    '>=': np.greater_equal, '==': np.equal, '!=': np.not_equal,
+}
+# จำนวนแถวต่อ block ระหว่างประเมินกฎ (mask มีขนาดไม่เกิน block)
+BLOCK_ROWS = 1_000_000
+# ต่ำกว่านี้ (แถว x กฎ) ประเมินใน process เดียว เพราะค่าส่งข้อมูลไป process อื่นแพงกว่า
+PARALLEL_MIN_CELLS = 10_000_000
+
+
+def _rule_columns(rule: Dict) -> List[str]:
+    """คอลัมน์ที่กฎใช้"""
+    if rule['type'] == 'compare':
+        return [rule['left'], rule['right']]
+    return [rule['column']]
+
+
+def _check_rule(rule: Dict, index: int) -> Dict:
+    """ตรวจสอบโครงสร้างกฎและเติมค่าเริ่มต้น"""
+    if not isinstance(rule, dict) or rule.get('type') not in RULE_TYPES:
+        raise ValueError(f"กฎข้อ {index + 1}: ประเภทไม่รองรับ (ต้องเป็น {', '.join(RULE_TYPES)})")
+
+    rule = dict(rule)
+    required = {
+        'not_null': ['column'],
+        'range': ['column'],
+        'regex': ['column', 'pattern'],
+        'allowed': ['column', 'values'],
+        'compare': ['left', 'op', 'right'],
+    }[rule['type']]
+    missing = [field for field in required if field not in rule]
+    if missing:
+        raise ValueError(f"กฎข้อ {index + 1}: ขาด {', '.join(missing)}")
+
+    if rule['type'] == 'range' and rule.get('min') is None and rule.get('max') is None:
+        raise ValueError(f"กฎข้อ {index + 1}: ต้องระบุ min หรือ max")
+    if rule['type'] == 'regex':
+        try:
+            re.compile(rule['pattern'])
+        except re.error as e:
+            raise ValueError(f"กฎข้อ {index + 1}: regex ไม่ถูกต้อง ({str(e)})")
+    if rule['type'] == 'compare' and rule['op'] not in COMPARE_OPERATORS:
+        raise ValueError(f"กฎข้อ {index + 1}: ตัวเปรียบเทียบไม่รองรับ: {rule['op']}")
+
+    rule.setdefault('name', f"{rule['type']}:{','.join(_rule_columns(rule))}")
+    return rule
+
+
+class RuleSet:
+    """ชุดกฎตรวจสอบข้อมูล"""
+
+    def __init__(self, rules: List[Dict]):
+        """
+        Args:
+            rules: list ของกฎ เช่น
+                {'type': 'range', 'column': 'weight', 'min': 0, 'max': 500}
+                {'type': 'regex', 'column': 'barcode', 'pattern': '[0-9]{13}'}
+                {'type': 'allowed', 'column': 'type', 'values': ['หมู', 'ไก่', 'วัว']}
+                {'type': 'not_null', 'column': 'price'}
+                {'type': 'compare', 'left': 'sale_price', 'op': '<=', 'right': 'price'}
+        """
+        self.rules = [_check_rule(rule, i) for i, rule in enumerate(rules)]
+
+    @classmethod
+    def load(cls, path) -> "RuleSet":
+        """โหลดกฎจากไฟล์ JSON (list ของกฎ หรือ {"rules": [...]})"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['rules'] if isinstance(data, dict) else data)
+
+    def save(self, path) -> None:
+        """บันทึกกฎเป็นไฟล์ JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'rules': self.rules}, f, ensure_ascii=False, indent=2)
+
+    @property
+    def version(self) -> str:
+        """hash ของชุดกฎ (เปลี่ยนเมื่อกฎเปลี่ยน)"""
+        encoded = json.dumps(self.rules, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def evaluate(self, df: pd.DataFrame, sample_size: int = 10,
+                 max_workers: Optional[int] = None, parallel: Optional[bool] = None) -> List[Dict]:
+        """
+        ประเมินกฎทั้งหมดกับ DataFrame
+
+        Args:
+            df: DataFrame
+            sample_size: จำนวนตำแหน่งแถวที่ผิดกฎที่เก็บเป็นตัวอย่างต่อกฎ
+            max_workers: จำนวน process (None = ตามจำนวน CPU)
+            parallel: ใช้ process pool หรือไม่ (None = เลือกตามขนาดข้อมูล)
+
+        Returns:
+            list ของ dict (name, type, columns, violations, sample_rows)
+        """
+        for rule in self.rules:
+            missing = [col for col in _rule_columns(rule) if col not in df.columns]
+            if missing:
+                raise ValueError(f"กฎ {rule['name']}: ไม่พบคอลัมน์ {', '.join(missing)}")
+
+        if parallel is None:
+            parallel = len(df) * len(self.rules) >= PARALLEL_MIN_CELLS and len(self.rules) > 1
+
+        # จัดกลุ่มกฎตามคอลัมน์ที่ใช้ แต่ละกลุ่มส่งเฉพาะคอลัมน์ของตัวเองไปยัง process หนึ่งครั้ง
+        groups: Dict[tuple, List[int]] = {}
+        for i, rule in enumerate(self.rules):
+            groups.setdefault(tuple(_rule_columns(rule)), []).append(i)
+        tasks = [([self.rules[i] for i in indices], {col: df[col] for col in columns}, sample_size)
+                 for columns, indices in groups.items()]
+
+        if parallel and len(tasks) > 1:
+            workers = min(len(tasks), max_workers or os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                group_results = list(pool.map(_evaluate_task, tasks))
+        else:
+            group_results = [_evaluate_task(task) for task in tasks]
+
+        results: List[Optional[tuple]] = [None] * len(self.rules)
+        for indices, outcome in zip(groups.values(), group_results):
+            for i, result in zip(indices, outcome):
+                results[i] = result
+
+        return [
+            {'name': rule['name'], 'type': rule['type'], 'columns': _rule_columns(rule),
+             'violations': count, 'sample_rows': sample}
+            for rule, (count, sample) in zip(self.rules, results)
+        ]
+
+
+# ============ แปลงกฎเป็น mask (ทำงานใน process ย่อยได้) ============
+
+def _category_mask(series: pd.Series, valid_categories: np.ndarray) -> np.ndarray:
+    """mask ผิดกฎของคอลัมน์ category: ประเมินเฉพาะค่า category แล้วกระจายตาม code"""
+    codes = series.cat.codes.to_numpy()
+    invalid = np.append(~valid_categories, False)  # code -1 (ค่าว่าง) ไม่ผิดกฎ
+    return invalid[codes]
+
+
+def _violation_mask(rule: Dict, columns: Dict[str, pd.Series]) -> np.ndarray:
+    """mask ของแถวที่ผิดกฎ (ค่าว่างไม่นับว่าผิด ยกเว้นกฎ not_null)"""
+    kind = rule['type']
+
+    if kind == 'not_null':
+        return columns[rule['column']].isna().to_numpy()
+
+    if kind == 'range':
+        series = columns[rule['column']]
+        values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        # ค่าที่ไม่ว่างแต่แปลงเป็นตัวเลขไม่ได้ (เช่น "abc") ผิดกฎ
+        mask = np.isnan(values) & series.notna().to_numpy()
+        with np.errstate(invalid='ignore'):
+            if rule.get('min') is not None:
+                mask |= values < rule['min']
+            if rule.get('max') is not None:
+                mask |= values > rule['max']
+        return mask
+
+    if kind in ('regex', 'allowed'):
+        series = columns[rule['column']]
+        if kind == 'regex':
+            pattern = rule['pattern']
+
+            def valid(values: pd.Series) -> np.ndarray:
+                return values.astype('string').str.fullmatch(pattern, na=False).to_numpy(dtype=bool)
+        else:
+            allowed = set(rule['values'])
+
+            def valid(values: pd.Series) -> np.ndarray:
+                return values.isin(allowed).to_numpy()
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return _category_mask(series, valid(pd.Series(series.cat.categories)))
+        notna = series.notna().to_numpy()
+        mask = np.zeros(len(series), dtype=bool)
+        mask[notna] = ~valid(series[notna])
+        return mask
+
+    left = pd.to_numeric(columns[rule['left']], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    right = pd.to_numeric(columns[rule['right']], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(invalid='ignore'):
+        satisfied = COMPARE_OPERATORS[rule['op']](left, right)
+    return ~satisfied & ~np.isnan(left) & ~np.isnan(right)
+
+
+def _evaluate_task(task) -> List[tuple]:
+    """
+    ประเมินกฎกลุ่มหนึ่ง (ใช้คอลัมน์ชุดเดียวกัน) ทีละ block
+    นับจำนวนที่ผิดและเก็บตำแหน่งแถวตัวอย่าง โดย mask มีขนาดไม่เกินหนึ่ง block
+
+    Returns:
+        list ของ (จำนวนที่ผิด, ตำแหน่งแถวตัวอย่าง) ตามลำดับกฎ
+    """
+    rules, columns, sample_size = task
+    rows = len(next(iter(columns.values())))
+    counts = [0] * len(rules)
+    samples: List[List[int]] = [[] for _ in rules]
+    for start in range(0, rows, BLOCK_ROWS):
+        block = {col: series.iloc[start:start + BLOCK_ROWS] for col, series in columns.items()}
+        for i, rule in enumerate(rules):
+            mask = _violation_mask(rule, block)
+            counts[i] += int(np.count_nonzero(mask))
+            if len(samples[i]) < sample_size:
+                positions = np.flatnonzero(mask)[:sample_size - len(samples[i])] + start
+                samples[i].extend(int(position) for position in positions)
+    return list(zip(counts, samples))
+
+
+def format_rule_results(results: List[Dict]) -> str:
+    """
+    สร้างข้อความสรุปผลการตรวจตามกฎ
+
+    Args:
+        results: ผลจาก RuleSet.evaluate
+
+    Returns:
+        ข้อความสรุป
+    """
+    failed = [result for result in results if result['violations'] > 0]
+    text = f"📏 ผลการตรวจตามกฎ ({len(results)} ข้อ, ผิด {len(failed)} ข้อ):\n"
+    for result in results:
+        if result['violations'] == 0:
+            text += f"├─ ✅ {result['name']}\n"
+        else:
+            rows = ", ".join(str(row) for row in result['sample_rows'])
+            text += f"├─ ⚠️ {result['name']}: {result['violations']} แถว (ตัวอย่างแถว: {rows})\n"
+    text += "└─ ✅ ผ่านทุกกฎ" if not failed else "└─ ⚠️ พบข้อมูลผิดกฎ"
+    return text
+
+
+def default_rules_file(data_file) -> Path:
+    """ที่อยู่ไฟล์กฎตรวจสอบของไฟล์ข้อมูล (ในโฟลเดอร์เดียวกัน)"""
+    return Path(data_file).parent / "validation_rules.json"
@@ -0,0 +1,82 @@
+"""
+โมดูลสำหรับโหลดไลบรารีขนาดใหญ่ (TensorFlow, scikit-learn, openpyxl) เบื้องหลังหลังหน้าต่างแสดงแล้ว
+"""
+
+import importlib
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+# ไลบรารีที่โหลดช้า เรียงตามลำดับที่ต้องใช้ก่อน
+HEAVY_MODULES = [
+    'openpyxl',
+    'sklearn.model_selection',
+    'sklearn.preprocessing',
+    'tensorflow',
+]
+
+
+class BackgroundWarmup:
+    """คลาสสำหรับ import ไลบรารีใน thread เบื้องหลัง พร้อมสถานะและเวลาที่ใช้"""
+
+    def __init__(self, modules: Optional[List[str]] = None):
+        """
+        Args:
+            modules: ชื่อโมดูลที่ต้องการโหลด (None = HEAVY_MODULES)
+        """
+        self.modules = list(modules) if modules is not None else list(HEAVY_MODULES)
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.current: Optional[str] = None
+        self.seconds = 0.0
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """เริ่มโหลดเบื้องหลัง (เรียกซ้ำได้ ไม่เริ่มใหม่)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        started = time.perf_counter()
+        for name in self.modules:
+            self.current = name
+            module_started = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                self.errors[name] = str(e)
+            self.timings[name] = time.perf_counter() - module_started
+        self.current = None
+        self.seconds = time.perf_counter() - started
+        self._done.set()
+
+    @property
+    def status(self) -> str:
+        """สถานะ: idle, loading, ready หรือ failed (มีโมดูลที่โหลดไม่ได้)"""
+        if self._thread is None:
+            return 'idle'
+        if not self._done.is_set():
+            return 'loading'
+        return 'failed' if self.errors else 'ready'
+
+    def is_done(self) -> bool:
+        """โหลดครบแล้ว (สำเร็จหรือไม่ก็ตาม)"""
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        รอให้โหลดเสร็จ
+
+        Args:
+            timeout: เวลารอสูงสุด (วินาที) None = รอจนเสร็จ
+
+        Returns:
+            True ถ้าโหลดเสร็จแล้ว
+        """
+        if self._thread is None:
+            self.start()
+        return self._done.wait(timeout)
@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+from modules import data_store
+from modules.cleaning_plan import CleaningPlan
+from modules.data_store import read_table, write_table
+from modules.data_validator import DataValidator
+
+
+def _frame():
+    return pd.DataFrame({
+        'barcode': ['1', '2', '2', '3', '4', None],
+        'grade': ['A', None, 'B', 'B', None, 'C'],
+        'price': [10.0, -5.0, 7.0, None, 300.0, 1.0],
+    })
+
+
+def _plan():
+    return CleaningPlan().fill('grade', 'C').dropna().dedupe(['barcode']).clip('price', lower=0, upper=100)
+
+
+def test_plan_matches_step_by_step_pandas():
+    df = _frame()
+    expected = df.assign(grade=df['grade'].fillna('C')).dropna()
+    expected = expected.drop_duplicates(subset=['barcode'])
+    expected = expected.assign(price=expected['price'].clip(lower=0, upper=100)).reset_index(drop=True)
+
+    report = _plan().dry_run(df)
+    cleaned, applied = _plan().apply(df)
+    pd.testing.assert_frame_equal(cleaned, expected)
+    pd.testing.assert_frame_equal(df, _frame())
+    assert report == applied
+    assert (report['rows_before'], report['rows_after'], report['rows_removed']) == (6, 3, 3)
+    # เติม 2 ค่า, ลบแถวที่มีค่าว่าง 2 แถว, แถวซ้ำ 1 แถว, จำกัดค่า -5 และ 300
+    assert [step['affected'] for step in report['steps']] == [2, 2, 1, 2]
+
+
+def test_unknown_column_is_rejected():
+    with pytest.raises(ValueError):
+        CleaningPlan().clip('weight', lower=0).apply(_frame())
+
+
+def test_apply_plan_writes_once_or_not_at_all(tmp_path, monkeypatch):
+    data_file = tmp_path / "data.parquet"
+    write_table(_frame(), data_file)
+    validator = DataValidator(str(data_file))
+    assert validator.load_data()[0]
+
+    assert validator.apply_plan(_plan(), dry_run=True)[0]
+    pd.testing.assert_frame_equal(read_table(data_file), _frame())
+
+    # เขียนไม่สำเร็จ: ไฟล์เดิมยังอยู่ครบ ไม่มีไฟล์ชั่วคราวค้าง
+    def fail(*args, **kwargs):
+        raise OSError("ดิสก์เต็ม")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(data_store.pq, 'write_table', fail)
+        success, message = validator.apply_plan(_plan())
+    assert not success and "ดิสก์เต็ม" in message
+    pd.testing.assert_frame_equal(read_table(data_file), _frame())
+    assert sorted(path.name for path in tmp_path.iterdir() if path.name.endswith('.tmp')) == []
+
+    validator = DataValidator(str(data_file))
+    validator.load_data()
+    assert validator.apply_plan(_plan())[0]
+    assert len(read_table(data_file)) == 3
@@ -0,0 +1,82 @@
+import pandas as pd
+
+from modules import data_ingest
+from modules.data_ingest import stream_ingest
+from modules.data_store import describe_frame, read_meta, read_table
+from modules.row_hash_index import RowHashIndex, hash_rows
+
+
+def _check_meta(target):
+    df = read_table(target)
+    meta = read_meta(target)
+    assert meta['rows'] == len(df)
+    assert meta['null_counts'] == describe_frame(df)['null_counts']
+    index = RowHashIndex(target)
+    assert index.load(meta['version'])
+    assert index.total == len(df)
+    assert index.contains(hash_rows(df)).all()
+    assert meta['duplicate_rows'] == int(df.duplicated().sum())
+
+
+def test_append_and_upsert_with_different_columns(tmp_path):
+    target = tmp_path / "data.parquet"
+    pd.DataFrame({'id': [1, 2], 'a': [1, 2], 'b': ['x', 'y']}).to_csv(tmp_path / "1.csv", index=False)
+    pd.DataFrame({'id': [3, 4], 'a': [3, 4], 'c': ['z', 'w']}).to_csv(tmp_path / "2.csv", index=False)
+    pd.DataFrame({'id': [2, 9], 'a': [2, 9]}).to_csv(tmp_path / "3.csv", index=False)
+
+    stream_ingest(tmp_path / "1.csv", target)
+    stream_ingest(tmp_path / "2.csv", target, mode='append')
+    assert read_meta(target)['null_counts'] == {'id': 0, 'a': 0, 'b': 2, 'c': 2}
+    _check_meta(target)
+
+    stream_ingest(tmp_path / "3.csv", target, mode='upsert', key_column='id')
+    _check_meta(target)
+
+
+def test_append_same_columns_keeps_index_consistent(tmp_path):
+    target = tmp_path / "data.parquet"
+    pd.DataFrame({'a': [1, 2], 'b': ['x', None]}).to_csv(tmp_path / "1.csv", index=False)
+    pd.DataFrame({'b': ['x', 'q'], 'a': [1, 5]}).to_csv(tmp_path / "2.csv", index=False)
+
+    stream_ingest(tmp_path / "1.csv", target)
+    stream_ingest(tmp_path / "2.csv", target, mode='append')
+    _check_meta(target)
+
+
+def test_chunked_ingest_widens_schema(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_ingest, 'SAMPLE_ROWS', 2)
+    source = tmp_path / "source.csv"
+    source.write_text(
+        "code,qty,note\n"
+        "101,1,\n"
+        "102,2,\n"
+        "103,2.5,\n"
+        "A12,4,ของแถม\n"
+        "105,5,\n",
+        encoding='utf-8'
+    )
+    target = tmp_path / "data.parquet"
+    progress = []
+    stats = stream_ingest(source, target, memory_limit_mb=0, progress_callback=progress.append)
+
+    assert stats['rows'] == 5
+    assert stats['chunks'] == len(progress) == 3
+    df = read_table(target)
+    # จำนวนเต็ม -> ทศนิยม -> ข้อความ และคอลัมน์ที่ว่างใน chunk แรกเป็นข้อความ
+    assert df['code'].tolist() == ['101', '102', '103', 'A12', '105']
+    assert df['qty'].tolist() == [1.0, 2.0, 2.5, 4.0, 5.0]
+    assert df['note'].isna().tolist() == [True, True, True, False, True]
+    assert df.loc[3, 'note'] == 'ของแถม'
+    assert not list(tmp_path.glob("*.widen"))
+    _check_meta(target)
+
+
+def test_append_widening_existing_column_rebuilds_index(tmp_path):
+    target = tmp_path / "data.parquet"
+    pd.DataFrame({'code': [101, 102]}).to_csv(tmp_path / "1.csv", index=False)
+    pd.DataFrame({'code': ['A12', '103']}).to_csv(tmp_path / "2.csv", index=False)
+
+    stream_ingest(tmp_path / "1.csv", target)
+    stream_ingest(tmp_path / "2.csv", target, mode='append')
+    assert read_table(target)['code'].astype(str).tolist() == ['101', '102', 'A12', '103']
+    _check_meta(target)
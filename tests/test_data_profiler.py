@@ -0,0 +1,123 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from modules.data_profiler import ProfileAccumulator, profile_frame
+from modules.data_store import write_table
+from modules.data_validator import DataValidator
+from modules.row_hash_index import RowHashIndex
+
+
+def _frame():
+    return pd.DataFrame({
+        'barcode': ['1', '2', '3', '3'],
+        'added': pd.to_datetime(['2024-01-01', '2024-01-01', '2024-02-01', '2024-02-01']),
+        'shelf_life': pd.to_timedelta(['1D', '2D', '2D', None]),
+    })
+
+
+def test_profile_top_values_are_json_safe():
+    df = _frame()
+    accumulator = ProfileAccumulator()
+    accumulator.update(df.iloc[:2])
+    accumulator.update(df.iloc[2:])
+    for profile in (profile_frame(df), accumulator.result()):
+        encoded = json.loads(json.dumps(profile.to_dict()))
+        assert ['2024-01-01T00:00:00', 2] in encoded['top_values']['added']
+
+
+def test_profile_frame_matches_pandas():
+    df = pd.DataFrame({
+        'kind': ['หมู', 'ไก่', 'หมู', None, 'หมู', 'ไก่'],
+        'price': [10.0, 20.5, 10.0, None, 10.0, 20.5],
+        'stock': [1, 2, 1, 4, 1, 2],
+    })
+    profile = profile_frame(df, top_n=2)
+
+    assert profile.rows == 6
+    assert profile.missing == {'kind': 1, 'price': 1}
+    assert profile.duplicate_rows == int(df.duplicated().sum()) == 3
+    stats = profile.numeric_stats['price']
+    assert stats['min'] == df['price'].min() and stats['max'] == df['price'].max()
+    assert np.isclose(stats['mean'], df['price'].mean()) and np.isclose(stats['std'], df['price'].std())
+    assert profile.cardinality == {col: int(df[col].nunique()) for col in df.columns}
+    assert profile.top_values['kind'] == [['หมู', 3], ['ไก่', 2]]
+    assert profile.memory_bytes == int(df.memory_usage(deep=True).sum())
+
+
+def test_accumulator_matches_profile_frame():
+    df = pd.DataFrame({'a': [i % 13 for i in range(500)], 'b': [f"x{i % 3}" for i in range(500)]})
+    df.loc[::50, 'a'] = None
+    accumulator = ProfileAccumulator(top_n=3)
+    for start in range(0, len(df), 64):
+        accumulator.update(df.iloc[start:start + 64])
+    streamed, exact = accumulator.result(), profile_frame(df, top_n=3)
+
+    assert (streamed.rows, streamed.null_counts, streamed.duplicate_rows) == \
+        (exact.rows, exact.null_counts, exact.duplicate_rows)
+    for key in ('min', 'max', 'mean', 'std'):
+        assert np.isclose(streamed.numeric_stats['a'][key], exact.numeric_stats['a'][key])
+    # จำนวนค่าไม่ซ้ำน้อยกว่าขนาด sketch: ได้ค่าจริง
+    assert streamed.cardinality == exact.cardinality
+    assert streamed.top_values['b'] == exact.top_values['b']
+    assert accumulator.chunks == 8
+
+
+def test_check_data_with_datetime_column(tmp_path):
+    data_file = tmp_path / "data.parquet"
+    write_table(_frame(), data_file)
+    validator = DataValidator(str(data_file))
+    first = validator.check_data()
+    second = validator.check_data()
+    assert first[0] and second[0], (first, second)
+    assert validator.last_cache_stats == {'cached_report': True}
+
+
+def _rows(n):
+    return pd.DataFrame({'a': [i % 7 for i in range(n)], 'b': [str(i % 5) for i in range(n)]})
+
+
+def test_accumulator_counts_duplicates_from_spilled_hashes(tmp_path):
+    df = _rows(1000)
+    accumulator = ProfileAccumulator(spill_dir=str(tmp_path))
+    for start in range(0, len(df), 128):
+        accumulator.update(df.iloc[start:start + 128])
+    # hash ต่อแถวอยู่ในไฟล์ ไม่ค้างในหน่วยความจำ
+    assert sum(path.stat().st_size for path in tmp_path.rglob('*.bin')) == 8 * len(df)
+    assert accumulator.result().duplicate_rows == profile_frame(df).duplicate_rows == 1000 - 35
+
+    expected = RowHashIndex(tmp_path / "data.parquet")
+    expected.build(df)
+    np.testing.assert_array_equal(accumulator.row_index.hashes, expected.hashes)
+    np.testing.assert_array_equal(accumulator.row_index.counts, expected.counts)
+    accumulator.close()
+    assert not list(tmp_path.rglob('*.bin'))
+
+
+def test_accumulator_reuses_loaded_index(tmp_path):
+    df = _rows(100)
+    index = RowHashIndex(tmp_path / "data.parquet")
+    index.build(df)
+    index.save(3)
+    loaded = RowHashIndex(tmp_path / "data.parquet")
+    assert loaded.load(3)
+
+    accumulator = ProfileAccumulator(row_index=loaded, spill_dir=str(tmp_path))
+    accumulator.update(df)
+    assert accumulator.result().duplicate_rows == 100 - 35
+    # นับจาก index ที่โหลด ไม่เขียน hash ต่อแถวลงดิสก์
+    assert not list(tmp_path.rglob('*.bin'))
+
+
+def test_validate_streaming_saves_then_reuses_row_index(tmp_path):
+    data_file = tmp_path / "data.parquet"
+    write_table(_rows(300), data_file)
+    validator = DataValidator(str(data_file))
+    first = validator.validate_streaming(chunk_rows=64)
+    second = validator.validate_streaming(chunk_rows=64)
+    assert first[0] and second[0], (first, second)
+    assert RowHashIndex(data_file).index_file.exists()
+    # ไม่รวมบรรทัดเวลา: ผลจาก index ที่บันทึกไว้ตรงกับการ hash ใหม่
+    assert first[1].split("\n⏱️")[0] == second[1].split("\n⏱️")[0]
+    assert f"{300 - 35:,}" in first[1]
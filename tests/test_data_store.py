@@ -0,0 +1,75 @@
+import pandas as pd
+
+from modules import data_loader
+from modules.data_loader import DataLoader
+from modules.data_store import (
+    LEGACY_CSV_NAME, describe_frame, export_csv, iter_batches, read_meta, read_table, write_table
+)
+
+
+def _frame():
+    return pd.DataFrame({
+        'barcode': ['001', '002', '003', '004', '005'],
+        'stock': [5, 0, 2, 7, 1],
+        'price': [10.5, 20.0, None, 3.25, 8.0],
+        'active': [True, False, True, True, False],
+        'added': pd.to_datetime(['2024-01-01', '2024-01-02', None, '2024-03-01', '2024-03-02']),
+    })
+
+
+def test_parquet_round_trip_with_projection(tmp_path):
+    df = _frame()
+    data_file = tmp_path / "data.parquet"
+    write_table(df, data_file)
+
+    pd.testing.assert_frame_equal(read_table(data_file), df)
+    pd.testing.assert_frame_equal(read_table(data_file, columns=['price', 'barcode']), df[['price', 'barcode']])
+    # รหัสที่ขึ้นต้นด้วย 0 ยังเป็นข้อความ ไม่ถูกแปลงเป็นตัวเลขแบบ CSV
+    assert read_table(data_file, columns=['barcode'])['barcode'].tolist() == df['barcode'].tolist()
+
+    batches = list(iter_batches(data_file, batch_rows=2, columns=['stock']))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), df[['stock']])
+
+    assert export_csv(data_file, tmp_path / "out.csv", chunk_rows=2) == len(df)
+    exported = pd.read_csv(tmp_path / "out.csv", dtype={'barcode': str}, parse_dates=['added'])
+    pd.testing.assert_frame_equal(exported, df, check_dtype=False)
+
+
+def test_data_loader_migrates_legacy_csv(tmp_path):
+    df = _frame()[['stock', 'price']]
+    df.to_csv(tmp_path / LEGACY_CSV_NAME, index=False)
+
+    loader = DataLoader(str(tmp_path))
+    assert loader.data_file.suffix == '.parquet'
+    assert loader.data_file.exists()
+    # load_data ย่อ dtype ให้เล็กลง (float32) ค่ายังตรงกัน
+    pd.testing.assert_frame_equal(loader.load_data(columns=['price']), df[['price']], check_dtype=False)
+    assert loader.get_data_info() == (len(df), 2)
+
+
+def test_data_info_comes_from_metadata_sidecar(tmp_path, monkeypatch):
+    loader = DataLoader(str(tmp_path))
+    df = _frame()
+    write_table(df, loader.data_file)
+    meta = read_meta(loader.data_file)
+    assert {key: meta[key] for key in ('rows', 'columns', 'dtypes', 'null_counts')} == describe_frame(df)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("ไม่ควรอ่านข้อมูล")
+
+    monkeypatch.setattr(data_loader, 'load_dataset', fail)
+    assert loader.get_data_info() == (5, 5)
+    assert loader.get_data_meta()['null_counts']['price'] == 1
+
+
+def test_metadata_rebuilt_after_external_write(tmp_path):
+    loader = DataLoader(str(tmp_path))
+    write_table(_frame(), loader.data_file)
+    version = read_meta(loader.data_file)['version']
+
+    # ไฟล์ถูกเขียนทับโดยไม่ผ่าน write_table: metadata เดิมใช้ไม่ได้
+    _frame().iloc[:2].to_parquet(loader.data_file, index=False)
+    assert read_meta(loader.data_file) is None
+    assert loader.get_data_info() == (2, 5)
+    assert read_meta(loader.data_file)['version'] == version + 1
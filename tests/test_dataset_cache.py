@@ -0,0 +1,54 @@
+import pandas as pd
+
+from modules.data_loader import DataLoader
+from modules.data_validator import DataValidator
+from modules.dataset_cache import DatasetCache, dataset_cache, save_dataset
+from modules.data_store import write_table
+from modules.product_manager import ProductManager
+
+
+def _frame(rows=5):
+    return pd.DataFrame({'barcode': [str(i) for i in range(rows)], 'name': ['x'] * rows, 'stock': range(rows)})
+
+
+def test_modules_share_one_frame(tmp_path):
+    loader = DataLoader(str(tmp_path))
+    save_dataset(_frame(), loader.data_file)
+
+    validator = DataValidator(str(loader.data_file))
+    manager = ProductManager(str(loader.data_file))
+    assert validator.load_data()[0] and manager.load_data()[0]
+    df = loader.load_data()
+    assert validator.df is df and manager.df is df
+    assert dataset_cache.is_shared(df)
+
+
+def test_cache_invalidates_when_file_changes(tmp_path):
+    data_file = tmp_path / "data.parquet"
+    write_table(_frame(), data_file)
+    cache = DatasetCache()
+
+    first = cache.get(data_file)
+    assert cache.get(data_file) is first
+    assert cache.stats() == {'entries': 1, 'hits': 1, 'misses': 1}
+
+    # เขียนไฟล์ใหม่จากภายนอก (ไม่ผ่านแคช): ต้องอ่านใหม่
+    write_table(_frame(3), data_file)
+    second = cache.get(data_file)
+    assert second is not first
+    assert len(second) == 3
+    assert cache.get(data_file, columns=['stock'])['stock'].tolist() == [0, 1, 2]
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = DatasetCache(max_entries=2)
+    files = [tmp_path / f"{i}.parquet" for i in range(3)]
+    for data_file in files:
+        write_table(_frame(), data_file)
+    first = cache.get(files[0])
+    cache.get(files[1])
+    assert cache.get(files[0]) is first
+    cache.get(files[2])
+    assert cache.stats()['entries'] == 2
+    assert cache.get(files[0]) is first
+    assert cache.stats()['misses'] == 3
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from modules.data_store import read_meta, write_table
+from modules.dataset_cache import compact_journal, dataset_cache, load_dataset, save_dataset
+from modules.dtype_optimizer import infer_schema, optimize_dtypes, set_value
+from modules.product_manager import ProductManager
+
+
+def test_set_value_keeps_exact_values():
+    df = optimize_dtypes(pd.DataFrame({'weight': [1, 2, 3], 'price': [1.5, 2.5, 3.5]}))
+    assert df['weight'].dtype == np.uint8
+    assert df['price'].dtype == np.float32
+
+    set_value(df, 0, 'weight', 12.345)
+    set_value(df, 1, 'price', 19.99)
+    set_value(df, 2, 'weight', 300)
+    assert df.at[0, 'weight'] == 12.345
+    assert df.at[1, 'price'] == 19.99
+    assert df.at[2, 'weight'] == 300
+
+
+def test_set_value_keeps_dtype_when_value_fits():
+    df = optimize_dtypes(pd.DataFrame({'stock': [1, 2, 3], 'price': [1.5, 2.5, 3.5]}))
+    set_value(df, 0, 'stock', 7)
+    set_value(df, 0, 'price', 2.25)
+    assert df['stock'].dtype == np.uint8
+    assert df['price'].dtype == np.float32
+
+
+def test_updated_price_survives_reload(tmp_path):
+    data_file = tmp_path / "products.parquet"
+    save_dataset(pd.DataFrame({
+        'barcode': ['8850000000001', '8850000000002'],
+        'price': [1.5, 2.5],
+        'weight': [1, 2],
+    }), data_file)
+    manager = ProductManager(str(data_file))
+    manager.load_data()
+    assert manager.update_product(0, {'price': 19.99, 'weight': 12.345})[0]
+
+    # โหลดจาก journal และหลังรวม journal เข้าไฟล์หลัก
+    for compact in (False, True):
+        if compact:
+            assert compact_journal(data_file)
+        dataset_cache.invalidate(data_file)
+        reloaded = ProductManager(str(data_file))
+        reloaded.load_data()
+        product = reloaded.get_product_by_barcode('8850000000001')
+        assert product['price'] == 19.99
+        assert product['weight'] == 12.345
+
+
+def test_infer_schema_picks_smallest_safe_types():
+    df = pd.DataFrame({
+        'small': [0, 200, 255, 1],
+        'signed': [-300, 5, 0, 7],
+        'big': [0, 1, 2, 2 ** 40],
+        'half': [0.5, 1.25, None, 2.0],
+        'precise': [0.1, 0.2, 0.3, 0.4],
+        'kind': ['หมู', 'ไก่', 'หมู', 'หมู'],
+        'code': ['a', 'b', 'c', 'd'],
+        'mixed': ['1', 2, '1', 2],
+        'flag': [True, False, True, True],
+    })
+    assert infer_schema(df) == {
+        'small': 'uint8', 'signed': 'int16', 'big': 'int64', 'half': 'float32', 'precise': 'float64',
+        'kind': 'category', 'code': str(df['code'].dtype), 'mixed': 'object', 'flag': 'bool',
+    }
+
+    optimized = optimize_dtypes(df)
+    assert optimized.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
+    pd.testing.assert_frame_equal(optimized.astype(object), df.astype(object), check_dtype=False)
+
+
+def test_load_applies_and_remembers_schema(tmp_path):
+    data_file = tmp_path / "data.parquet"
+    write_table(pd.DataFrame({'qty': [1, 2, 3, 4], 'kind': ['a', 'b', 'a', 'a']}), data_file)
+    assert 'schema' in read_meta(data_file)
+
+    df = load_dataset(data_file)
+    assert str(df['qty'].dtype) == 'uint8'
+    assert isinstance(df['kind'].dtype, pd.CategoricalDtype)
+    # อ่านเฉพาะบางคอลัมน์ก็ใช้ schema เดิม
+    assert str(load_dataset(data_file, columns=['qty'])['qty'].dtype) == 'uint8'
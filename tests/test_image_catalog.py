@@ -0,0 +1,56 @@
+import os
+import struct
+
+from modules.data_loader import DataLoader
+from modules.image_catalog import ImageCatalog
+
+
+def _png(path, width, height, payload=b''):
+    path.write_bytes(b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR' + struct.pack('>II', width, height) + payload)
+
+
+def test_rescan_tracks_disk_changes(tmp_path):
+    images_dir = tmp_path / "images"
+    images_dir.mkdir()
+    for i in range(3):
+        _png(images_dir / f"{i}.png", i + 1, i + 1)
+    (images_dir / "readme.txt").write_text("x")
+    catalog = ImageCatalog(str(images_dir))
+    try:
+        assert catalog.rescan() == {'added': 3, 'updated': 0, 'removed': 0, 'scanned': 3}
+        # โฟลเดอร์ไม่เปลี่ยน: ไม่สแกนซ้ำ
+        assert catalog.rescan()['scanned'] == 0
+
+        _png(images_dir / "1.png", 7, 9, b'new')
+        (images_dir / "2.png").unlink()
+        _png(images_dir / "3.png", 4, 4)
+        stat = images_dir.stat()
+        os.utime(images_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        assert catalog.rescan() == {'added': 1, 'updated': 1, 'removed': 1, 'scanned': 3}
+
+        images = {image['name']: image for image in catalog.get_images()}
+        assert sorted(images) == ['0.png', '1.png', '3.png']
+        assert (images['1.png']['width'], images['1.png']['height'], images['1.png']['format']) == (7, 9, 'PNG')
+    finally:
+        catalog.close()
+
+
+def test_catalog_paging_and_labels(tmp_path):
+    loader = DataLoader(str(tmp_path))
+    for i in range(5):
+        _png(loader.images_dir / f"{i}.png", 1, 1, bytes([i]))
+    assert loader.count_images() == 5
+    loader.image_catalog.set_label(['0.png', '3.png'], 'ไก่')
+
+    assert loader.get_image_list(offset=1, limit=2) == ['1.png', '2.png']
+    assert loader.get_image_list(label='ไก่') == ['0.png', '3.png']
+    assert loader.count_images(label='ไก่') == 2
+    assert loader.image_catalog.label_counts() == {None: 3, 'ไก่': 2}
+
+    # catalog ถาวร: เปิดใหม่ได้ข้อมูลเดิมโดยไม่ต้องสแกน
+    loader.image_catalog.close()
+    reopened = ImageCatalog(str(loader.images_dir))
+    try:
+        assert reopened.count(label='ไก่') == 2
+    finally:
+        reopened.close()
@@ -0,0 +1,57 @@
+import struct
+import zipfile
+
+from modules.image_catalog import ImageCatalog
+from modules.image_importer import ImageImporter
+
+
+def _png(width, height, payload=b''):
+    """header PNG ที่อ่านขนาดได้ (ไม่ต้องเป็นภาพที่ decode ได้)"""
+    return b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR' + struct.pack('>II', width, height) + payload
+
+
+def _sources(tmp_path):
+    folder = tmp_path / "incoming"
+    (folder / "sub").mkdir(parents=True)
+    (folder / "a.png").write_bytes(_png(4, 3, b'a'))
+    (folder / "sub" / "copy_of_a.PNG").write_bytes(_png(4, 3, b'a'))
+    (folder / "c.png").write_bytes(_png(8, 8, b'c'))
+    (folder / "notes.txt").write_text("ไม่ใช่ภาพ")
+    with zipfile.ZipFile(tmp_path / "batch.zip", 'w') as zf:
+        zf.writestr("x/a.png", _png(4, 3, b'a'))
+        zf.writestr("x/d.png", _png(2, 5, b'd'))
+    return [str(folder), str(tmp_path / "batch.zip")]
+
+
+def test_parallel_import_deduplicates_by_content(tmp_path):
+    images_dir = tmp_path / "images"
+    catalog = ImageCatalog(str(images_dir), db_path=str(tmp_path / "catalog.db"))
+    try:
+        importer = ImageImporter(str(images_dir), catalog=catalog, max_workers=4)
+        progress = []
+        sources = _sources(tmp_path)
+        stats = importer.import_sources(sources, label='หมู', progress_callback=progress.append)
+
+        assert (stats['files'], stats['imported'], stats['duplicates'], stats['known']) == (5, 3, 2, 0)
+        assert stats['errors'] == []
+        # ไฟล์ภาพ 3 ไฟล์ + ไฟล์บีบอัด 1 ไฟล์
+        assert progress and progress[-1]['total'] == 4
+        stored = sorted(path.name for path in images_dir.iterdir())
+        assert len(stored) == 3 and all(name.endswith('.png') for name in stored)
+        assert catalog.count(label='หมู') == 3
+        sizes = {(image['width'], image['height']) for image in catalog.get_images()}
+        assert sizes == {(4, 3), (8, 8), (2, 5)}
+
+        # นำเข้าซ้ำด้วย importer ใหม่: จำไฟล์ต้นฉบับจาก catalog ไม่ต้องอ่านเนื้อไฟล์
+        again = ImageImporter(str(images_dir), catalog=catalog).import_sources(sources[:1])
+        assert (again['known'], again['imported'], again['bytes']) == (3, 0, 0)
+    finally:
+        catalog.close()
+
+
+def test_import_reports_unreadable_archive(tmp_path):
+    (tmp_path / "broken.zip").write_bytes(b"not a zip")
+    importer = ImageImporter(str(tmp_path / "images"))
+    stats = importer.import_sources([str(tmp_path / "broken.zip")])
+    assert stats['files'] == 0
+    assert len(stats['errors']) == 1 and stats['errors'][0].startswith("broken.zip")
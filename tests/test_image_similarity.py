@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('PIL')
+from PIL import Image
+
+from modules.image_catalog import ImageCatalog
+from modules.image_similarity import DEFAULT_MAX_DISTANCE, BKTree, ImageSimilarityIndex, compute_hashes, hamming
+
+
+def _save(path, seed, noise=0):
+    rng = np.random.default_rng(seed)
+    pixels = np.kron(rng.integers(0, 256, (8, 8)), np.ones((8, 8))).astype(np.int16)
+    pixels += np.random.default_rng(seed + 100).integers(-noise, noise + 1, pixels.shape)
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(path)
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    images_dir = tmp_path / "images"
+    images_dir.mkdir()
+    _save(images_dir / "a.png", 1)
+    _save(images_dir / "a_copy.png", 1, noise=3)
+    _save(images_dir / "b.png", 2)
+    catalog = ImageCatalog(str(images_dir))
+    catalog.rescan(force=True)
+    yield catalog
+    catalog.close()
+
+
+def test_bktree_remove():
+    tree = BKTree()
+    for value, item in [(0b0000, 'a'), (0b0001, 'b'), (0b0011, 'c')]:
+        tree.add(value, item)
+    assert tree.remove(0b0000, 'a')
+    assert not tree.remove(0b0000, 'a')
+    assert len(tree) == 2
+    # node ว่างยังพาไปยัง node ลูกได้
+    assert sorted(tree.query(0b0000, 2)) == [('b', 1), ('c', 2)]
+
+
+def test_update_queries_only_requested_hashes(catalog):
+    index = ImageSimilarityIndex(catalog)
+    assert index.update() == {'computed': 3, 'failed': 0}
+
+    requested = []
+    original = catalog.load_perceptual_hashes
+
+    def spy(hashes=None):
+        requested.append(hashes)
+        return original(hashes)
+
+    catalog.load_perceptual_hashes = spy
+    _save(catalog.images_dir / "c.png", 3)
+    catalog.rescan(force=True)
+    assert index.update(['c.png']) == {'computed': 1, 'failed': 0}
+    assert index.update(['c.png']) == {'computed': 0, 'failed': 0}
+    assert None not in requested
+
+
+def test_deleted_images_are_pruned(catalog):
+    index = ImageSimilarityIndex(catalog)
+    assert index.near_duplicate_groups() == [['a.png', 'a_copy.png']]
+    copy_hash = catalog.get_images_by_names(['a_copy.png'])[0]['hash']
+    a_hash = catalog.get_images_by_names(['a.png'])[0]['hash']
+    assert [other for other, _ in index.find_similar(a_hash)] == [copy_hash]
+
+    (catalog.images_dir / "a_copy.png").unlink()
+    assert catalog.rescan(force=True)['removed'] == 1
+    assert copy_hash not in catalog.load_perceptual_hashes()
+
+    assert index.find_similar(a_hash) == []
+    assert index.near_duplicate_groups() == []
+    assert len(index._tree) == 2
+
+
+def test_changed_image_prunes_old_hash(catalog):
+    old_hash = catalog.get_images_by_names(['b.png'])[0]['hash']
+    ImageSimilarityIndex(catalog).update()
+    _save(catalog.images_dir / "b.png", 4)
+    assert catalog.rescan(force=True)['updated'] == 1
+    assert old_hash not in catalog.load_perceptual_hashes()
+
+
+def test_bktree_query_matches_brute_force():
+    rng = np.random.default_rng(0)
+    values = [int(v) for v in rng.integers(0, 2 ** 63, 300, dtype=np.int64)]
+    # เพิ่มค่าที่ต่างกันไม่กี่บิตให้มีคู่ที่ใกล้กัน
+    values += [v ^ (1 << int(bit)) for v, bit in zip(values[:50], rng.integers(0, 64, 50))]
+    tree = BKTree()
+    for i, value in enumerate(values):
+        tree.add(value, i)
+    for probe in values[:20] + [0]:
+        expected = sorted((i, hamming(probe, value)) for i, value in enumerate(values)
+                          if hamming(probe, value) <= 10)
+        assert sorted(tree.query(probe, 10)) == expected
+
+
+def test_reencoded_image_is_near_duplicate(tmp_path):
+    _save(tmp_path / "a.png", 5)
+    with Image.open(tmp_path / "a.png") as image:
+        image.convert('RGB').save(tmp_path / "a.jpg", quality=60)
+    _save(tmp_path / "b.png", 6)
+    a, jpeg, b = (compute_hashes(tmp_path / name) for name in ("a.png", "a.jpg", "b.png"))
+    assert hamming(a['phash'], jpeg['phash']) <= DEFAULT_MAX_DISTANCE
+    assert hamming(a['phash'], b['phash']) > DEFAULT_MAX_DISTANCE
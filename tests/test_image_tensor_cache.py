@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('PIL')
+from PIL import Image
+
+from modules import image_tensor_cache
+from modules.image_catalog import ImageCatalog
+from modules.image_tensor_cache import ImageTensorCache, decode_image
+
+
+def _save(path, value):
+    Image.fromarray(np.full((6, 10, 3), value, dtype=np.uint8)).save(path)
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    images_dir = tmp_path / "images"
+    images_dir.mkdir()
+    for i in range(4):
+        _save(images_dir / f"img{i}.png", 40 * i)
+    (images_dir / "zbroken.png").write_bytes(b"not an image")
+    catalog = ImageCatalog(str(images_dir))
+    catalog.rescan(force=True)
+    catalog.set_label(['img0.png', 'img1.png'], 'cat')
+    catalog.set_label(['img2.png', 'img3.png'], 'dog')
+    yield catalog
+    catalog.close()
+
+
+def _cache(catalog, tmp_path):
+    return ImageTensorCache(catalog, cache_dir=str(tmp_path / "cache"), image_size=(4, 4), shard_size=2)
+
+
+def _hash(catalog, name):
+    return catalog.get_images_by_names([name])[0]['hash']
+
+
+def _decoded(catalog, name):
+    return decode_image(catalog.images_dir / name, (4, 4), 'float16')
+
+
+def test_build_and_memmap_reads(catalog, tmp_path):
+    cache = _cache(catalog, tmp_path)
+    stats = cache.build()
+    assert (stats['added'], stats['failed'], stats['total'], stats['shards']) == (4, 1, 4, 2)
+    assert len(cache) == 4
+    assert cache.labels == ['cat', 'dog']
+
+    data, labels = cache.shard(0)
+    assert isinstance(data, np.memmap)
+    batches = list(cache.iter_batches(batch_size=2))
+    assert all(isinstance(images, np.memmap) for images, _ in batches)
+    assert sum(len(images) for images, _ in batches) == 4
+    assert sorted(np.concatenate([ids for _, ids in batches]).tolist()) == [0, 0, 1, 1]
+    np.testing.assert_array_equal(cache.get(_hash(catalog, 'img2.png')), _decoded(catalog, 'img2.png'))
+
+    # เปิดใหม่จาก index ที่บันทึกไว้
+    reopened = _cache(catalog, tmp_path)
+    np.testing.assert_array_equal(reopened.get(_hash(catalog, 'img3.png')), _decoded(catalog, 'img3.png'))
+
+
+def test_failed_images_are_not_retried(catalog, tmp_path, monkeypatch):
+    _cache(catalog, tmp_path).build()
+    decoded = []
+    original = image_tensor_cache.decode_image
+    monkeypatch.setattr(image_tensor_cache, 'decode_image',
+                        lambda path, *args: decoded.append(path) or original(path, *args))
+
+    stats = _cache(catalog, tmp_path).build()
+    assert decoded == []
+    assert (stats['added'], stats['failed'], stats['skipped']) == (0, 0, 1)
+
+    # เนื้อหาเปลี่ยน (hash ใหม่): ลอง decode อีกครั้ง
+    (catalog.images_dir / "zbroken.png").unlink()
+    _save(catalog.images_dir / "fixed.png", 200)
+    stats = _cache(catalog, tmp_path).build()
+    assert [path.name for path in decoded] == ['fixed.png']
+    assert (stats['added'], stats['skipped']) == (1, 0)
+
+
+def test_incremental_add_and_remove(catalog, tmp_path):
+    cache = _cache(catalog, tmp_path)
+    cache.build()
+    first_shard = tmp_path / "cache" / cache.index['shards'][0]['file']
+    written = first_shard.stat().st_mtime_ns
+
+    _save(catalog.images_dir / "img4.png", 250)
+    stats = cache.build()
+    assert (stats['added'], stats['removed'], stats['total'], stats['shards']) == (1, 0, 5, 3)
+    assert first_shard.stat().st_mtime_ns == written
+
+    # ลบหนึ่งภาพจาก shard 0: ทำเครื่องหมายลบ ไม่สร้างใหม่
+    removed_hash = _hash(catalog, 'img0.png')
+    (catalog.images_dir / "img0.png").unlink()
+    stats = cache.build()
+    assert (stats['added'], stats['removed'], stats['total']) == (0, 1, 4)
+    assert first_shard.stat().st_mtime_ns == written
+    assert cache.get(removed_hash) is None
+    rows = np.concatenate([images for images, _ in cache.iter_batches(batch_size=3)])
+    assert len(rows) == len(cache) == 4
+    # img0 เป็นภาพสีดำทั้งภาพ
+    assert not any((row == 0).all() for row in rows)
+    shuffled = np.concatenate([ids for _, ids in cache.iter_batches(batch_size=3, shuffle=True, seed=1)])
+    assert sorted(shuffled.tolist()) == [-1, 0, 1, 1]
+
+    # ลบภาพที่เหลือใน shard 0: เกินครึ่ง shard จึงคัดลอกเฉพาะแถวที่เหลือ
+    (catalog.images_dir / "img1.png").unlink()
+    stats = cache.build()
+    assert stats['removed'] == 1
+    assert not first_shard.exists()
+    assert cache.index['shards'][0]['count'] == 0
+    assert len(cache) == 3
+    for name in ('img2.png', 'img3.png', 'img4.png'):
+        np.testing.assert_array_equal(cache.get(_hash(catalog, name)), _decoded(catalog, name))
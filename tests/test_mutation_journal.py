@@ -0,0 +1,46 @@
+import json
+
+import pandas as pd
+
+from modules.data_store import describe_frame
+from modules.mutation_journal import add_entry, delete_entry, describe_entries, replay, update_entry
+
+
+def _round_trip(entries):
+    return [json.loads(json.dumps(entry)) for entry in entries]
+
+
+def test_replay_keeps_datetime_dtype():
+    df = pd.DataFrame({
+        'name': ['a', 'b'],
+        'added': pd.to_datetime(['2024-01-01', None]),
+        'local': pd.to_datetime(['2024-01-01', '2024-01-02']).tz_localize('Asia/Bangkok'),
+    })
+    entries = _round_trip([
+        update_entry(1, {'added': pd.Timestamp('2025-05-05 10:00')}),
+        add_entry({'name': 'c', 'added': pd.Timestamp('2025-01-01'),
+                   'local': pd.Timestamp('2024-06-01', tz='Asia/Bangkok')}),
+    ])
+    result = replay(df.copy(), entries)
+    assert result['added'].dtype == df['added'].dtype
+    assert result['local'].dtype == df['local'].dtype
+    assert result.loc[1, 'added'] == pd.Timestamp('2025-05-05 10:00')
+    assert result.loc[2, 'local'] == pd.Timestamp('2024-06-01', tz='Asia/Bangkok')
+
+
+def test_describe_entries_matches_full_count():
+    df = pd.DataFrame({'name': ['a', None, 'c'], 'stock': [1.0, 2.0, None]})
+    meta = describe_frame(df)
+    entries = [
+        update_entry(1, {'name': 'b'}, {'name': None}),
+        add_entry({'name': None, 'extra': 'x'}),
+        delete_entry(0, df.iloc[0].to_dict()),
+    ]
+    after = replay(df.copy(), _round_trip(entries))
+    assert describe_entries(meta, after, entries) == describe_frame(after)
+
+
+def test_describe_entries_needs_old_values():
+    df = pd.DataFrame({'name': ['a', None]})
+    after = replay(df.copy(), [update_entry(1, {'name': 'b'})])
+    assert describe_entries(describe_frame(df), after, [update_entry(1, {'name': 'b'})]) is None
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.outlier_detector import KLLSketch, OutlierAccumulator, detect_outliers, outlier_bounds
+
+
+def _frame(rows=20_000):
+    rng = np.random.default_rng(1)
+    weight = rng.normal(100, 15, rows)
+    weight[::997] = 1_000
+    price = rng.exponential(50, rows)
+    price[::50] = np.nan
+    return pd.DataFrame({'weight': weight, 'price': price, 'name': 'x'})
+
+
+def _rank_error(sorted_values, estimate, q):
+    return abs(np.searchsorted(sorted_values, estimate) / len(sorted_values) - q)
+
+
+def test_kll_quantiles_within_rank_error():
+    values = np.random.default_rng(2).lognormal(size=100_000)
+    sketch, left, right = KLLSketch(), KLLSketch(seed=1), KLLSketch(seed=2)
+    for chunk in np.array_split(values, 37):
+        sketch.update(chunk)
+    left.update(values[:30_000])
+    right.update(values[30_000:])
+    left.merge(right)
+
+    ordered = np.sort(values)
+    qs = np.linspace(0.01, 0.99, 25)
+    for estimate in (sketch, left):
+        assert estimate.count == len(values)
+        assert sum(len(level) for level in estimate.levels) < 2_000
+        assert max(_rank_error(ordered, value, q) for value, q in zip(estimate.quantile(qs), qs)) < 0.02
+        assert estimate.quantile(0) == values.min() and estimate.quantile(1) == values.max()
+
+
+@pytest.mark.parametrize('method', ['zscore', 'iqr', 'mad'])
+def test_streaming_bounds_match_exact(method):
+    df = _frame()
+    exact = detect_outliers(df, method=method)
+    assert sorted(exact) == ['price', 'weight']
+
+    accumulator = OutlierAccumulator(method=method)
+    chunks = [df.iloc[start:start + 1_500] for start in range(0, len(df), 1_500)]
+    for chunk in chunks:
+        accumulator.update(chunk)
+    for chunk in chunks:
+        accumulator.count(chunk)
+    streamed = accumulator.result()
+
+    for col, result in exact.items():
+        width = result['upper'] - result['lower']
+        assert streamed[col]['count'] == result['count']
+        assert abs(streamed[col]['lower'] - result['lower']) < 0.03 * width
+        assert abs(streamed[col]['upper'] - result['upper']) < 0.03 * width
+        # จำนวนค่าผิดปกติต้องตรงกับขอบเขตที่ประมาณได้ และใกล้กับค่าจริง
+        values = df[col].dropna()
+        outside = ((values < streamed[col]['lower']) | (values > streamed[col]['upper'])).sum()
+        assert streamed[col]['outliers'] == outside
+        assert abs(streamed[col]['outliers'] - result['outliers']) <= max(3, 0.15 * result['outliers'])
+    # ค่า 1000 ที่ใส่ไว้ถูกตรวจพบทุกวิธี
+    assert streamed['weight']['outliers'] >= len(df.index[::997])
+
+
+def test_outlier_bounds_exact_values():
+    values = np.array([1, 2, 3, 4, 5, 6, 7, 8, np.nan])
+    assert outlier_bounds(values, 'iqr') == pytest.approx((2.75 - 1.5 * 3.5, 6.25 + 1.5 * 3.5))
+    assert outlier_bounds(np.array([np.nan]), 'mad') is None
+    with pytest.raises(ValueError):
+        outlier_bounds(values, 'unknown')
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+from modules.dataset_cache import save_dataset
+from modules.product_manager import ProductManager
+
+
+def _manager(tmp_path, rows=10):
+    data_file = tmp_path / "products.parquet"
+    save_dataset(pd.DataFrame({
+        'barcode': [f"88500000000{i:02d}" for i in range(rows)],
+        'name': [f"สินค้า {i}" for i in range(rows)],
+        'stock': 0,
+    }), data_file)
+    manager = ProductManager(str(data_file))
+    manager.load_data()
+    return manager, data_file
+
+
+def test_page_cursor_survives_concurrent_delete(tmp_path):
+    manager, data_file = _manager(tmp_path)
+    other = ProductManager(str(data_file))
+    other.load_data()
+
+    first, cursor = manager.get_products_page(0, 4)
+    # โปรแกรมอื่นลบแถวในหน้าแรก ทั้งแถวก่อนหน้าและแถวสุดท้ายของหน้า
+    assert other.delete_product(3)[0]
+    assert other.delete_product(0)[0]
+    manager.refresh()
+
+    second, cursor = manager.get_products_page(cursor, 4)
+    third, cursor = manager.get_products_page(cursor, 4)
+    assert cursor is None
+    names = [row['name'] for row in first + second + third]
+    assert names == [f"สินค้า {i}" for i in range(10)]
+
+
+def test_update_rejects_shifted_row(tmp_path):
+    manager, data_file = _manager(tmp_path)
+    other = ProductManager(str(data_file))
+    other.load_data()
+
+    index = 5
+    assert other.delete_product(0)[0]
+    success, _ = manager.update_product(index, {'stock': 7})
+    assert not success
+    assert manager.get_product_by_barcode("8850000000005")['stock'] == 0
+    assert manager.get_product_by_barcode("8850000000006")['stock'] == 0
+
+
+def _expected(df, mask, order=None):
+    matched = df[mask]
+    if order is not None:
+        matched = matched.assign(_key=order[mask]).sort_values('_key', kind='stable')
+    return matched['barcode'].tolist()
+
+
+def _check_indexes(manager):
+    df = manager.df
+    names = df['name'].str.casefold()
+    for prefix in ['', 'a', 'ap', 'apple 1', 'ข', 'zzz']:
+        found = [row['barcode'] for row in manager.search_products(prefix, limit=None)]
+        assert found == _expected(df, names.str.startswith(prefix.casefold()).fillna(False), names)
+    for category in ['fruit', 'FRUIT', 'ขนม', 'none']:
+        found = [row['barcode'] for row in manager.get_products_by_category(category)]
+        assert found == _expected(df, (df['type'].str.casefold() == category.casefold()).fillna(False))
+    for low, high in [(None, None), (10, 40), (25.5, None), (None, 5), (60, 50)]:
+        found = manager.get_products_in_range('price', low, high)
+        mask = df['price'].notna()
+        if low is not None:
+            mask &= df['price'] >= low
+        if high is not None:
+            mask &= df['price'] <= high
+        prices = [row['price'] for row in found]
+        assert prices == sorted(prices)
+        assert sorted(row['barcode'] for row in found) == sorted(df.loc[mask, 'barcode'])
+
+
+def test_secondary_indexes_match_dataframe_filter(tmp_path):
+    rng = np.random.default_rng(3)
+    words = ['Apple', 'apple', 'Apricot', 'ขนมปัง', 'ข้าว', 'Banana']
+    types = ['fruit', 'Fruit', 'ขนม', 'drink']
+
+    def product(i):
+        price = round(float(rng.uniform(0, 50)), 1) if rng.random() > 0.1 else None
+        return {'barcode': f"99{i:010d}", 'name': f"{words[i % len(words)]} {i}",
+                'type': types[int(rng.integers(len(types)))], 'price': price}
+
+    data_file = tmp_path / "products.parquet"
+    save_dataset(pd.DataFrame([product(i) for i in range(40)]), data_file)
+    manager = ProductManager(str(data_file))
+    manager.load_data()
+    # สร้าง index ก่อน เพื่อให้การแก้ไขด้านล่างปรับ index ทีละแถว
+    _check_indexes(manager)
+    indexes = manager._indexes
+
+    next_id = 40
+    for step in range(60):
+        action = step % 3
+        if action == 0:
+            assert manager.add_products([product(next_id), product(next_id + 1)])[0]
+            next_id += 2
+        elif action == 1:
+            position = int(rng.integers(len(manager.df)))
+            changes = {'name': f"{words[int(rng.integers(len(words)))]} x{step}",
+                       'type': types[int(rng.integers(len(types)))],
+                       'price': round(float(rng.uniform(0, 50)), 1)}
+            assert manager.update_product(position, changes)[0]
+        else:
+            assert manager.delete_product(int(rng.integers(len(manager.df))))[0]
+        _check_indexes(manager)
+    # ใช้ index เดิมตลอด ไม่ได้สร้างใหม่ทุกครั้ง
+    assert manager._indexes is indexes
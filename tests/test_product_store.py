@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from modules.data_store import read_table, write_table
+from modules.product_store import SQLiteProductManager
+
+
+def _source():
+    return pd.DataFrame({
+        'barcode': ['8850000000001', '8850000000002', '8850000000003'],
+        'name': ['หมู', 'ไก่', 'ปลา'],
+        'active': [True, False, True],
+        'stock': np.array([5, 0, 2], dtype='int16'),
+        'price': [10.5, 20.0, None],
+        'added': pd.to_datetime(['2024-01-01 00:00', '2024-02-03 10:00', None]),
+    })
+
+
+def test_round_trip_import_edit_export(tmp_path):
+    data_file = tmp_path / "products.parquet"
+    write_table(_source(), data_file)
+    store = SQLiteProductManager(str(data_file), db_path=str(tmp_path / "products.db"), pool_size=1)
+    try:
+        assert store.load_data()[0]
+        assert store.count() == 3
+
+        # ลบสินค้าแรก: id ของแถวที่เหลือไม่ตรงกับลำดับในรายการแล้ว
+        first = store.get_product_by_barcode('8850000000001')
+        assert store.delete_product(first['id'])[0]
+        listed = store.get_all_products()
+        fish = next(row for row in listed if row['name'] == 'ปลา')
+        assert listed.index(fish) != fish['id']
+        assert store.update_product(fish['id'], {'stock': 9, 'added': pd.Timestamp('2025-05-05')})[0]
+        assert store.add_product({'barcode': '8850000000004', 'name': 'กุ้ง', 'active': False,
+                                  'stock': 1, 'price': 99.0, 'added': pd.Timestamp('2025-01-01')})[0]
+
+        assert store.export_data() == 3
+        exported = read_table(data_file)
+    finally:
+        store.close()
+
+    expected = _source().iloc[1:].reset_index(drop=True)
+    expected.loc[1, ['stock', 'added']] = [9, pd.Timestamp('2025-05-05')]
+    expected.loc[2] = ['8850000000004', 'กุ้ง', False, 1, 99.0, pd.Timestamp('2025-01-01')]
+    assert list(exported.columns) == list(expected.columns)
+    assert exported['active'].dtype == bool
+    assert exported['stock'].dtype == np.int16
+    assert pd.api.types.is_datetime64_any_dtype(exported['added'])
+    pd.testing.assert_frame_equal(exported, expected.astype(exported.dtypes.to_dict()))
+
+
+def test_reimport_drops_old_columns(tmp_path):
+    data_file = tmp_path / "products.parquet"
+    write_table(_source(), data_file)
+    store = SQLiteProductManager(str(data_file), db_path=str(tmp_path / "products.db"), pool_size=1)
+    try:
+        store.load_data()
+        write_table(pd.DataFrame({'barcode': ['9'], 'name': ['ใหม่']}), data_file)
+        assert store.load_data()[0]
+        assert store.get_all_products() == [{'id': 0, 'barcode': '9', 'name': 'ใหม่'}]
+    finally:
+        store.close()
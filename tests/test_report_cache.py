@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from modules.report_cache import chunk_key
+
+
+def test_chunk_key_distinguishes_close_values():
+    base = pd.DataFrame({'x': [2**60, 1], 's': ['a', 'b']})
+    changed = base.copy()
+    changed.loc[0, 'x'] = 2**60 + 1
+    assert chunk_key(base) != chunk_key(changed)
+    assert chunk_key(pd.DataFrame({'f': [0.1]})) != chunk_key(pd.DataFrame({'f': [0.1000000000000001]}))
+
+
+def test_chunk_key_distinguishes_text_boundaries_and_types():
+    assert chunk_key(pd.DataFrame({'s': ['ab', 'c']})) != chunk_key(pd.DataFrame({'s': ['a', 'bc']}))
+    assert chunk_key(pd.DataFrame({'s': [None, 'c']})) != chunk_key(pd.DataFrame({'s': ['None', 'c']}))
+    assert (chunk_key(pd.DataFrame({'o': [1, 'x']}, dtype=object)) !=
+            chunk_key(pd.DataFrame({'o': ['1', 'x']}, dtype=object)))
+
+
+def test_chunk_key_is_stable():
+    df = pd.DataFrame({
+        'i': pd.array([1, None], dtype='Int64'),
+        't': pd.to_datetime(['2024-01-01', None]),
+        'c': pd.Categorical(['a', None]),
+        'f': [np.nan, 1.5],
+    })
+    assert chunk_key(df) == chunk_key(df.copy())
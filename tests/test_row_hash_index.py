@@ -0,0 +1,107 @@
+"""
+ทดสอบ hash ต่อแถว (ใช้ตัดสินว่าแถวซ้ำแล้วลบข้อมูล จึงต้องไม่รวมค่าที่ต่างกันเป็นค่าเดียว)
+"""
+
+import numpy as np
+import pandas as pd
+
+from modules.row_hash_index import RowHashIndex, hash_rows
+
+
+def _single(values, dtype=None) -> np.ndarray:
+    return hash_rows(pd.DataFrame({'a': pd.Series(values, dtype=dtype)}))
+
+
+def test_large_integers_are_distinct():
+    hashes = _single([2 ** 60, 2 ** 60 + 1, 2 ** 60 + 2])
+    assert len(np.unique(hashes)) == 3
+
+
+def test_null_is_not_the_text_none():
+    hashes = _single(['None', None, 'nan', np.nan], dtype=object)
+    assert hashes[0] != hashes[1]
+    assert hashes[2] != hashes[3]
+    # ค่าว่างทุกแบบเป็นค่าเดียวกัน (แบบเดียวกับ drop_duplicates)
+    assert hashes[1] == hashes[3]
+
+
+def test_equal_values_match_across_dtypes():
+    expected = _single([1, -2, 3])
+    assert (_single([1, -2, 3], dtype='int8') == expected).all()
+    assert (_single([1.0, -2.0, 3.0]) == expected).all()
+    assert (_single([1, -2, 3], dtype='Int64') == expected).all()
+    assert (_single(['x', 'y', None], dtype='category') == _single(['x', 'y', None], dtype=object)).all()
+    assert (_single([1, None], dtype='Int64') == _single([1.0, np.nan])).all()
+
+
+def test_different_values_differ():
+    assert _single([1.5])[0] != _single([1])[0]
+    assert _single([0.1])[0] != _single([0.2])[0]
+    assert _single(['1'])[0] != _single(['01'])[0]
+    assert _single([0])[0] != _single([None], dtype='Int64')[0]
+
+
+def test_column_order_and_subset():
+    df = pd.DataFrame({'a': [1, 2], 'b': [2, 1]})
+    hashes = hash_rows(df)
+    assert hashes[0] != hashes[1]
+    assert (hash_rows(df, ['a']) == hash_rows(pd.DataFrame({'a': [1, 2]}))).all()
+
+
+def test_duplicates_agree_with_pandas():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'id': rng.integers(0, 50, 2000) + 2 ** 60,
+        'name': rng.choice(['a', 'b', None, 'None'], 2000),
+        'price': rng.choice([1.0, 2.5, np.nan], 2000),
+    })
+    hashes = hash_rows(df)
+    assert len(df) - len(np.unique(hashes)) == int(df.duplicated().sum())
+
+
+def test_index_counts_duplicates(tmp_path):
+    df = pd.DataFrame({'id': [2 ** 60, 2 ** 60 + 1, 2 ** 60, 7]})
+    index = RowHashIndex(tmp_path / 'data.parquet')
+    index.build(df)
+    assert index.total == 4
+    assert index.duplicate_count == 1
+    index.save(3)
+
+    loaded = RowHashIndex(tmp_path / 'data.parquet')
+    assert loaded.load(3)
+    assert not loaded.load(4)
+    assert loaded.contains(hash_rows(pd.DataFrame({'id': [7, 8]}))).tolist() == [True, False]
+
+
+def test_index_delta_file_round_trip(tmp_path):
+    data_file = tmp_path / "data.parquet"
+    index = RowHashIndex(data_file)
+    index.build(pd.DataFrame({'a': range(100)}))
+    index.save(1)
+
+    index.add(hash_rows(pd.DataFrame({'a': [5, 200, 200]})))
+    index.remove(hash_rows(pd.DataFrame({'a': [7, 999]})))
+    index.save(2)
+    assert index.delta_file.exists()
+
+    loaded = RowHashIndex(data_file)
+    assert loaded.load(2)
+    assert np.array_equal(loaded.hashes, index.hashes)
+    assert np.array_equal(loaded.counts, index.counts)
+    assert loaded.total == 102
+    assert loaded.duplicate_count == 2
+    assert not RowHashIndex(data_file).load(3)
+
+
+def test_index_compacts_large_delta(tmp_path):
+    data_file = tmp_path / "data.parquet"
+    index = RowHashIndex(data_file)
+    index.build(pd.DataFrame({'a': range(10)}))
+    index.save(1)
+    index.add(hash_rows(pd.DataFrame({'a': range(100, 20_100)})))
+    index.save(2)
+    assert not index.delta_file.exists()
+
+    loaded = RowHashIndex(data_file)
+    assert loaded.load(2)
+    assert loaded.total == 20_010
@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from modules import validation_rules
+from modules.validation_rules import RuleSet
+
+
+def _frame():
+    return pd.DataFrame({
+        'weight': ['12', 'abc', None, '700', '-1', '5.5'],
+        'barcode': ['8850000000001', '885', None, '8850000000004', 'x', '8850000000006'],
+        'kind': pd.Categorical(['หมู', 'ไก่', 'ปลา', 'หมู', None, 'วัว']),
+        'price': [10, 20, 30, 40, 50, 60],
+        'sale_price': [9, 25, None, 40, 55, 1],
+    })
+
+
+RULES = [
+    {'type': 'range', 'column': 'weight', 'min': 0, 'max': 500},
+    {'type': 'regex', 'column': 'barcode', 'pattern': '[0-9]{13}'},
+    {'type': 'allowed', 'column': 'kind', 'values': ['หมู', 'ไก่', 'วัว']},
+    {'type': 'not_null', 'column': 'barcode'},
+    {'type': 'compare', 'left': 'sale_price', 'op': '<=', 'right': 'price'},
+]
+
+
+def test_rules_count_violations():
+    results = RuleSet(RULES).evaluate(_frame())
+    by_name = {result['name']: result for result in results}
+    # ข้อความที่ไม่ใช่ตัวเลข ("abc") ผิดกฎช่วงค่า ค่าว่างไม่ผิด
+    assert by_name['range:weight']['sample_rows'] == [1, 3, 4]
+    assert by_name['regex:barcode']['sample_rows'] == [1, 4]
+    assert by_name['allowed:kind']['sample_rows'] == [2]
+    assert by_name['not_null:barcode']['sample_rows'] == [2]
+    assert by_name['compare:sale_price,price']['sample_rows'] == [1, 4]
+    assert [result['violations'] for result in results] == [3, 2, 1, 1, 2]
+
+
+def test_parallel_and_blocked_evaluation_match(monkeypatch):
+    df = pd.concat([_frame()] * 50, ignore_index=True)
+    serial = RuleSet(RULES).evaluate(df, sample_size=3, parallel=False)
+    parallel = RuleSet(RULES).evaluate(df, sample_size=3, parallel=True, max_workers=2)
+    monkeypatch.setattr(validation_rules, 'BLOCK_ROWS', 7)
+    blocked = RuleSet(RULES).evaluate(df, sample_size=3, parallel=False)
+    assert serial == parallel == blocked
+    assert serial[0]['violations'] == 150
+
+
+def test_rule_validation_and_round_trip(tmp_path):
+    with pytest.raises(ValueError, match="ต้องระบุ min หรือ max"):
+        RuleSet([{'type': 'range', 'column': 'weight'}])
+    with pytest.raises(ValueError, match="regex"):
+        RuleSet([{'type': 'regex', 'column': 'barcode', 'pattern': '['}])
+    with pytest.raises(ValueError, match="ไม่พบคอลัมน์"):
+        RuleSet([{'type': 'not_null', 'column': 'missing'}]).evaluate(_frame())
+
+    rules = RuleSet(RULES)
+    rules.save(tmp_path / "rules.json")
+    loaded = RuleSet.load(tmp_path / "rules.json")
+    assert loaded.rules == rules.rules
+    assert loaded.version == rules.version
+    assert RuleSet(RULES[:-1]).version != rules.version